@@ -0,0 +1,92 @@
+# ============================================================
+# bench_catalog.py — CATALOG SIZE vs RECOMMENDATION LATENCY
+# ============================================================
+# Generates synthetic catalogs (default 1k / 10k / 100k products),
+# loads each into the recommendation engine and reports:
+#   - catalog load + index compile time
+#   - cold top_k latency (first query, walks posting lists)
+#   - make_recommendation latency (p50 / p99), which should stay
+#     flat as the catalog grows
+#
+# Usage:
+#   python bench_catalog.py --sizes 1000 10000 100000
+# ============================================================
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+import recommendation_model as rm
+from product_catalog import CATEGORIES, ProductCatalog
+
+# which attributes each category is usually tagged with
+_CATEGORY_ATTRS = {
+    "foundation": ("tones",), "lipstick": ("tones",), "blush": ("tones",),
+    "hair_color": ("tones",), "hairstyle": ("faces",),
+    "accessory_face": ("faces",), "accessory_tone": ("tones",),
+    "accessory_event": ("events",), "clothing_color": ("tones",),
+    "outfit": ("genders", "events"), "bag": ("events",),
+    "shoes": ("genders", "events"),
+}
+_VALUES = {"tones": rm.TONES, "faces": rm.FACES, "genders": rm.GENDERS, "events": rm.EVENTS}
+
+
+def synthetic_catalog(n, seed=0):
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        p = {"sku": f"sku-{i:07d}", "category": category,
+             "name": f"{category.replace('_', ' ').title()} {i}",
+             "score": rng.random()}
+        for field in _CATEGORY_ATTRS[category]:
+            values = _VALUES[field]
+            # mostly specific, sometimes "any"
+            p[field] = [] if rng.random() < 0.1 else rng.sample(values, rng.randint(1, 2))
+        products.append(p)
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--n", type=int, default=50000, help="Recommendations per size")
+    args = parser.parse_args()
+
+    reqs = [
+        rm.RecommendationRequest(face_shape=f, skin_tone=t, gender=g, event=e, body_type=b)
+        for (t, f, g, e, b) in rm.RECOMMENDATION_INDEX
+    ]
+
+    print(f"{'products':>10} {'load s':>8} {'compile s':>10} {'cold topk us':>13} "
+          f"{'rec p50 us':>11} {'rec p99 us':>11}")
+    for size in args.sizes:
+        products = synthetic_catalog(size)
+
+        t0 = time.perf_counter()
+        catalog = ProductCatalog(products, source=f"synthetic-{size}")
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        catalog.top_k("foundation", tone=rm.TONES[0])
+        cold_us = (time.perf_counter() - t0) * 1e6
+
+        t0 = time.perf_counter()
+        rm.set_catalog(catalog)
+        compile_s = time.perf_counter() - t0
+
+        lat = np.empty(args.n)
+        for i in range(args.n):
+            req = reqs[i % len(reqs)]
+            t0 = time.perf_counter()
+            rm.make_recommendation(req)
+            lat[i] = (time.perf_counter() - t0) * 1e6
+
+        print(f"{size:>10} {load_s:>8.2f} {compile_s:>10.2f} {cold_us:>13.1f} "
+              f"{np.percentile(lat, 50):>11.1f} {np.percentile(lat, 99):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# ============================================================
+# bench_endpoints.py — IMAGE ENDPOINT BENCHMARK SUITE
+# ============================================================
+# Drives every image endpoint in-process through the ASGI app
+# (fastapi TestClient, no network) with synthetic face-like fixtures
+# at several resolutions, and reports per endpoint x resolution:
+#   latency p50 / p90 / p99 / max, throughput, status counts,
+#   peak RSS growth, allocated blocks and tracemalloc peak (--alloc)
+#
+# Results go to JSON; --baseline compares against a stored run and
+# exits 1 when p50 or p99 regress by more than --threshold.
+#
+# Usage:
+#   python bench_endpoints.py --out bench.json
+#   python bench_endpoints.py --sizes 720 1080 --iters 30 --baseline bench.json
+#   python bench_endpoints.py --images ./faces      # real photos instead
+#   python bench_endpoints.py --soak 600 --max-rss-growth-mb 64
+#
+# --soak hammers all selected endpoints with unique images for N
+# seconds and fails (exit 1) if current RSS grows by more than
+# --max-rss-growth-mb after the warm-up fifth of the run.
+#
+# Synthetic faces are drawn with cv2 (oval, eyes, brows, nose, lips)
+# and may not be detected by MediaPipe; success counts are reported
+# so "no face" fast paths are not mistaken for speedups. --unique
+# changes one pixel per request so content caches (STONE) miss.
+# ============================================================
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from fastapi.testclient import TestClient
+
+from memory_diagnostics import current_rss_bytes
+
+DEFAULT_SIZES = (480, 720, 1080, 1920)
+
+
+# ============================================================
+# FIXTURES
+# ============================================================
+def synthetic_face(long_side, seed=0, aspect=0.75):
+    """Portrait-ish BGR image with a skin-coloured face drawn at the centre."""
+    rng = np.random.default_rng(seed)
+    w, h = int(long_side * aspect), long_side
+    bg = rng.integers(40, 200, 3).tolist()
+    img = np.full((h, w, 3), bg, np.uint8)
+    img = cv2.add(img, rng.integers(0, 12, (h, w, 3), dtype=np.uint8))
+
+    skin = [int(v) for v in rng.choice([(190, 210, 240), (140, 170, 215), (80, 110, 160), (50, 70, 110)])]
+    cx, cy = w // 2, int(h * 0.48)
+    fw, fh = int(w * 0.28), int(h * 0.30)
+    cv2.ellipse(img, (cx, cy), (fw, fh), 0, 0, 360, skin, -1, cv2.LINE_AA)
+
+    dark = (40, 40, 50)
+    ex, ey = int(fw * 0.42), cy - int(fh * 0.18)
+    for sx in (-1, 1):
+        cv2.ellipse(img, (cx + sx * ex, ey), (int(fw * 0.18), int(fh * 0.07)), 0, 0, 360, (245, 245, 245), -1)
+        cv2.circle(img, (cx + sx * ex, ey), int(fh * 0.05), dark, -1)
+        cv2.ellipse(img, (cx + sx * ex, ey - int(fh * 0.14)), (int(fw * 0.22), int(fh * 0.04)),
+                    0, 180, 360, dark, max(2, fh // 60))
+    nose = np.array([[cx, cy - int(fh * 0.05)], [cx - int(fw * 0.1), cy + int(fh * 0.22)],
+                     [cx + int(fw * 0.1), cy + int(fh * 0.22)]], np.int32)
+    cv2.polylines(img, [nose], True, [max(0, c - 40) for c in skin], max(2, fh // 80), cv2.LINE_AA)
+    cv2.ellipse(img, (cx, cy + int(fh * 0.48)), (int(fw * 0.32), int(fh * 0.08)), 0, 0, 360,
+                (90, 70, 170), -1, cv2.LINE_AA)
+    return cv2.GaussianBlur(img, (5, 5), 0)
+
+
+def encode_jpeg(img, quality=90):
+    ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return buf.tobytes()
+
+
+def load_fixtures(sizes, images_dir=None):
+    """{label: BGR image}"""
+    if images_dir:
+        out = {}
+        for path in sorted(glob.glob(os.path.join(images_dir, "*"))):
+            img = cv2.imread(path)
+            if img is not None:
+                out[os.path.basename(path)] = img
+        if not out:
+            sys.exit(f"No readable images in {images_dir}")
+        return out
+    return {f"synthetic_{s}": synthetic_face(s, seed=s) for s in sizes}
+
+
+# ============================================================
+# ENDPOINTS
+# ============================================================
+def _image(name="image"):
+    return lambda jpg, jpg2: {"files": {name: ("face.jpg", jpg, "image/jpeg")}}
+
+
+ENDPOINTS = {
+    "/api/classify": _image("file"),
+    "/api/face/face_scan": _image(),
+    "/api/face/skin_tone": _image(),
+    "/api/face/classify": _image(),
+    "/api/lipstick/apply_makeup": lambda jpg, jpg2: {
+        "files": {"image": ("face.jpg", jpg, "image/jpeg")},
+        "data": {"req": json.dumps({"makeup": {"lips": [180, 40, 120], "intensity": 0.7}})},
+    },
+    "/api/makeup_guide/get_makeup_guide": lambda jpg, jpg2: {
+        "files": {"image": ("face.jpg", jpg, "image/jpeg")},
+        "data": {"makeupLooks": "foundation,blush,lipstick", "returnMaskPNG": "true"},
+    },
+    "/api/makeup_guide/compare_makeup": lambda jpg, jpg2: {
+        "files": {"originalImage": ("a.jpg", jpg, "image/jpeg"),
+                  "afterImage": ("b.jpg", jpg2, "image/jpeg")},
+    },
+}
+
+
+def _response_ok(resp):
+    if resp.status_code != 200:
+        return False
+    try:
+        body = resp.json()
+    except ValueError:
+        return False
+    if body.get("success") is False:
+        return False
+    return body.get("makeup_image_base64", "") is not None and body.get("faces", [1]) != []
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+def peak_rss_mb():
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024.0 * 1024.0) if sys.platform == "darwin" else r / 1024.0
+
+
+def percentile(sorted_ms, q):
+    if not sorted_ms:
+        return None
+    k = min(len(sorted_ms) - 1, max(0, int(round(q / 100.0 * (len(sorted_ms) - 1)))))
+    return sorted_ms[k]
+
+
+def run_case(client, path, build, img, iters, warmup, unique, alloc):
+    jpg = encode_jpeg(img)
+    after = encode_jpeg(cv2.convertScaleAbs(img, alpha=1.05, beta=8))
+    payloads = []
+    for i in range(iters):
+        if unique:
+            var = img.copy()
+            var[0, 0] = (i % 256, (i // 256) % 256, 7)
+            payloads.append(build(encode_jpeg(var), after))
+        else:
+            payloads.append(build(jpg, after))
+
+    for _ in range(warmup):
+        client.post(path, **build(jpg, after))
+
+    gc.collect()
+    rss_before = peak_rss_mb()
+    blocks_before = sys.getallocatedblocks()
+    if alloc:
+        tracemalloc.reset_peak()
+
+    latencies, statuses, ok = [], {}, 0
+    t0 = time.perf_counter()
+    for payload in payloads:
+        t = time.perf_counter()
+        resp = client.post(path, **payload)
+        latencies.append((time.perf_counter() - t) * 1000.0)
+        statuses[str(resp.status_code)] = statuses.get(str(resp.status_code), 0) + 1
+        ok += _response_ok(resp)
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    out = {
+        "iters": iters,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(iters / wall, 2),
+        "statuses": statuses,
+        "success": ok,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        "allocated_blocks_delta": sys.getallocatedblocks() - blocks_before,
+    }
+    if alloc:
+        out["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    return out
+
+
+# ============================================================
+# SOAK
+# ============================================================
+def soak(client, endpoints, fixtures, seconds, max_growth_mb, warmup_frac=0.2):
+    """Unique-image traffic for `seconds`; returns (passed, report)."""
+    after = {label: encode_jpeg(cv2.convertScaleAbs(img, alpha=1.05, beta=8))
+             for label, img in fixtures.items()}
+    cases = [(p, label, img) for p in endpoints for label, img in fixtures.items()]
+    samples = []   # (t, rss_mb)
+    statuses = {}
+    t0 = time.perf_counter()
+    i = 0
+    while time.perf_counter() - t0 < seconds:
+        path, label, img = cases[i % len(cases)]
+        var = img.copy()
+        var[0, 0] = (i % 256, (i // 256) % 256, (i // 65536) % 256)
+        resp = client.post(path, **ENDPOINTS[path](encode_jpeg(var), after[label]))
+        statuses[str(resp.status_code)] = statuses.get(str(resp.status_code), 0) + 1
+        i += 1
+        if i % 10 == 0:
+            samples.append((time.perf_counter() - t0, current_rss_bytes() / (1024.0 * 1024.0)))
+
+    settled = [s for s in samples if s[0] >= seconds * warmup_frac] or samples[-1:]
+    base = settled[0][1]
+    growth = max(r for _, r in settled) - base
+    ts = np.array([t for t, _ in settled])
+    rs = np.array([r for _, r in settled])
+    slope = float(np.polyfit(ts, rs, 1)[0]) * 60.0 if len(settled) > 2 else 0.0
+
+    report = {
+        "seconds": seconds,
+        "requests": i,
+        "statuses": statuses,
+        "rss_start_mb": round(samples[0][1], 1) if samples else None,
+        "rss_after_warmup_mb": round(base, 1),
+        "rss_end_mb": round(settled[-1][1], 1),
+        "rss_growth_mb": round(growth, 1),
+        "rss_slope_mb_per_min": round(slope, 2),
+        "max_rss_growth_mb": max_growth_mb,
+    }
+    return growth <= max_growth_mb, report
+
+
+# ============================================================
+# BASELINE DIFF
+# ============================================================
+def compare(results, baseline, threshold):
+    """[(case, metric, before, after, ratio)] for regressions over threshold."""
+    regressions = []
+    for case, cur in results["cases"].items():
+        base = baseline.get("cases", {}).get(case)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            before, after = base.get(metric), cur.get(metric)
+            if before and after and after > before * (1 + threshold):
+                regressions.append((case, metric, before, after, after / before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image endpoint benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Long side of the synthetic fixtures")
+    parser.add_argument("--images", help="Directory of real face photos (replaces synthetic)")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--unique", action="store_true", help="Defeat content caches")
+    parser.add_argument("--alloc", action="store_true", help="tracemalloc peak (slow)")
+    parser.add_argument("--out", default="bench_endpoints.json")
+    parser.add_argument("--baseline", help="Earlier --out file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed p50/p99 slowdown before flagging (0.10 = 10%%)")
+    parser.add_argument("--soak", type=float, default=0.0,
+                        help="Soak for N seconds instead of benchmarking")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.sizes, args.images)
+
+    if args.alloc:
+        tracemalloc.start()
+    rss_start = peak_rss_mb()
+    from main import app
+    client = TestClient(app)
+
+    if args.soak:
+        passed, report = soak(client, args.endpoints, fixtures, args.soak, args.max_rss_growth_mb)
+        print(json.dumps(report, indent=2))
+        with open(args.out, "w") as f:
+            json.dump({"soak": report}, f, indent=2)
+        if not passed:
+            print(f"\n❌ RSS grew {report['rss_growth_mb']} MB (> {args.max_rss_growth_mb} MB) "
+                  f"after warm-up; slope {report['rss_slope_mb_per_min']} MB/min")
+            sys.exit(1)
+        print(f"\n✅ RSS bounded: +{report['rss_growth_mb']} MB after warm-up")
+        return
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "iters": args.iters,
+            "unique": args.unique,
+            "fixtures": {k: list(v.shape[:2]) for k, v in fixtures.items()},
+            "peak_rss_after_import_mb": round(peak_rss_mb(), 1),
+            "peak_rss_before_import_mb": round(rss_start, 1),
+        },
+        "cases": {},
+    }
+
+    print(f"\n{'endpoint':38s} {'fixture':16s} {'p50':>8s} {'p99':>8s} {'req/s':>7s} {'ok':>5s}")
+    for path in args.endpoints:
+        for label, img in fixtures.items():
+            r = run_case(client, path, ENDPOINTS[path], img,
+                         args.iters, args.warmup, args.unique, args.alloc)
+            results["cases"][f"{path} @ {label}"] = r
+            print(f"{path:38s} {label:16s} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} "
+                  f"{r['throughput_rps']:7.1f} {r['success']:>2d}/{r['iters']:<2d}")
+
+    results["meta"]["peak_rss_end_mb"] = round(peak_rss_mb(), 1)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for case, metric, before, after, ratio in regressions:
+                print(f"   {case:56s} {metric}: {before:.1f} -> {after:.1f} ms ({ratio:.2f}x)")
+            sys.exit(1)
+        print(f"\n✅ No p50/p99 regressions over {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
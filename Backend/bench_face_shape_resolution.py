@@ -0,0 +1,115 @@
+# ============================================================
+# bench_face_shape_resolution.py — ACCURACY / LATENCY SWEEP
+# ============================================================
+# Sweeps the face shape CNN input resolution over a labeled set
+# of face crops and reports, per resolution:
+#   - top-1 accuracy
+#   - mean confidence and share of crops above CONFIDENCE_THRESHOLD
+#   - per-image latency (mean / p50 / p95)
+#
+# Crop folder layout (same as the ImageFolder used for training):
+#   <crops_dir>/Diamond/*.jpg
+#   <crops_dir>/Heart/*.jpg
+#   ...
+#
+# Usage:
+#   python bench_face_shape_resolution.py <crops_dir> --sizes 224 260 300 380
+# ============================================================
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import predict_tone_shape as pts
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+def load_labeled_crops(root):
+    crops = []
+    for label in pts.FACE_LABELS:
+        label_dir = os.path.join(root, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if not name.lower().endswith(IMAGE_EXTS):
+                continue
+            img = cv2.imread(os.path.join(label_dir, name), cv2.IMREAD_COLOR)
+            if img is not None:
+                crops.append((img, label))
+    return crops
+
+
+def run_sweep(crops, sizes, warmup=3):
+    rows = []
+    for size in sizes:
+        pts.set_face_shape_input_size(size)
+        pts.init_face_shape_model()
+
+        for img, _ in crops[:warmup]:
+            pts.face_shape_probs(img)
+
+        latencies = []
+        confidences = []
+        correct = 0
+
+        for img, label in crops:
+            t0 = time.perf_counter()
+            probs = pts.face_shape_probs(img)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+            idx = int(np.argmax(probs))
+            confidences.append(float(probs[idx]))
+            correct += int(pts.FACE_LABELS[idx] == label)
+
+        lat = np.array(latencies)
+        conf = np.array(confidences)
+        rows.append({
+            "size": size,
+            "images": len(crops),
+            "accuracy": correct / len(crops),
+            "mean_confidence": float(conf.mean()),
+            "above_threshold": float((conf >= pts.CONFIDENCE_THRESHOLD).mean()),
+            "latency_ms_mean": float(lat.mean()),
+            "latency_ms_p50": float(np.percentile(lat, 50)),
+            "latency_ms_p95": float(np.percentile(lat, 95)),
+        })
+    return rows
+
+
+def print_table(rows):
+    print(f"\nDevice: {pts.DEVICE}   threshold: {pts.CONFIDENCE_THRESHOLD}")
+    print(f"{'size':>6} {'acc':>7} {'conf':>7} {'>=thr':>7} "
+          f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in rows:
+        print(f"{r['size']:>6} {r['accuracy']:>7.3f} {r['mean_confidence']:>7.3f} "
+              f"{r['above_threshold']:>7.3f} {r['latency_ms_mean']:>9.2f} "
+              f"{r['latency_ms_p50']:>9.2f} {r['latency_ms_p95']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face shape resolution sweep")
+    parser.add_argument("crops_dir", help="Folder with one sub-folder per face shape label")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[224, 260, 300, 340, 380])
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    crops = load_labeled_crops(args.crops_dir)
+    if not crops:
+        raise SystemExit(f"No labeled crops found under {args.crops_dir}")
+
+    rows = run_sweep(crops, args.sizes)
+    print_table(rows)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n🎯 Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
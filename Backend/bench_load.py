@@ -0,0 +1,169 @@
+# ============================================================
+# bench_load.py — MIXED-TRAFFIC CONCURRENCY SWEEP
+# ============================================================
+# Starts `uvicorn main:app` locally (same helpers as
+# bench_workers_threads.py), replays a weighted mix of
+#   classify       POST /api/classify
+#   guide          POST /api/makeup_guide/get_makeup_guide
+#   lipstick       POST /api/lipstick/apply_makeup
+#   recommend      POST /api/makeup_recommendation
+# with a closed loop at increasing concurrency, and reports the
+# latency-vs-throughput curve, error rate and the saturation point:
+# the first step where throughput grows < --knee, the error rate
+# exceeds --max-error-rate or p99 passes --slo-ms.
+#
+# Usage:
+#   python bench_load.py --workers 2
+#   python bench_load.py face.jpg --mix classify=2,guide=1,lipstick=1,recommend=6 \
+#       --concurrency 1 2 4 8 16 32 --duration 15 --json load.json
+#
+# Without a photo the synthetic face from bench_endpoints.py is used.
+# ============================================================
+
+import argparse
+import itertools
+import json
+import os
+import random
+
+import cv2
+
+from bench_endpoints import synthetic_face, encode_jpeg
+from bench_workers_threads import encode_multipart, start_server, wait_ready, stop_server, drive
+
+DEFAULT_MIX = "classify=2,guide=1,lipstick=1,recommend=6"
+
+FACES = ["oval", "round", "square", "heart"]
+TONES = ["fair", "light", "medium", "olive", "tan", "caramel"]
+GENDERS = ["female", "male"]
+EVENTS = ["casual", "formal", "party", "wedding"]
+BODIES = ["slim", "average", "muscular", "heavy"]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    unknown = set(mix) - {"classify", "guide", "lipstick", "recommend"}
+    if unknown:
+        raise SystemExit(f"Unknown traffic kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def build_requests(jpg, mix, seed=0):
+    """Weighted, shuffled list of (method, path, body, headers) for drive()."""
+    kinds = {}
+
+    body, ctype = encode_multipart({}, {"file": ("face.jpg", jpg, "image/jpeg")})
+    kinds["classify"] = [("POST", "/api/classify", body, {"Content-Type": ctype})]
+
+    body, ctype = encode_multipart(
+        {"makeupLooks": "foundation,blush,lipstick", "returnMaskPNG": "false"},
+        {"image": ("face.jpg", jpg, "image/jpeg")})
+    kinds["guide"] = [("POST", "/api/makeup_guide/get_makeup_guide", body, {"Content-Type": ctype})]
+
+    body, ctype = encode_multipart(
+        {"req": json.dumps({"makeup": {"lips": [180, 40, 120], "intensity": 0.7}})},
+        {"image": ("face.jpg", jpg, "image/jpeg")})
+    kinds["lipstick"] = [("POST", "/api/lipstick/apply_makeup", body, {"Content-Type": ctype})]
+
+    kinds["recommend"] = [
+        ("POST", "/api/makeup_recommendation",
+         json.dumps({"face_shape": f, "skin_tone": t, "gender": g, "event": e, "body_type": b}).encode(),
+         {"Content-Type": "application/json"})
+        for f, t, g, e, b in itertools.product(FACES, TONES, GENDERS, EVENTS, BODIES)
+    ]
+
+    # 16 slots per unit of weight keeps the ratio exact; recommendation
+    # bodies are drawn from every profile combination
+    rng = random.Random(seed)
+    out = []
+    for kind, weight in mix.items():
+        out.extend(rng.choice(kinds[kind]) for _ in range(weight * 16))
+    rng.shuffle(out)
+    return out
+
+
+def find_saturation(rows, knee, max_error_rate, slo_ms):
+    """Index of the first saturated step (or None) and why."""
+    for i, row in enumerate(rows):
+        if row["error_rate"] > max_error_rate:
+            return i, f"error rate {row['error_rate']:.1%} > {max_error_rate:.1%}"
+        if slo_ms and row["latency_ms_p99"] > slo_ms:
+            return i, f"p99 {row['latency_ms_p99']:.0f} ms > SLO {slo_ms:.0f} ms"
+        if i and row["throughput_rps"] < rows[i - 1]["throughput_rps"] * (1 + knee):
+            return i, f"throughput +{row['throughput_rps'] / rows[i - 1]['throughput_rps'] - 1:.0%} < {knee:.0%}"
+    return None, "not reached"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-traffic concurrency sweep")
+    parser.add_argument("image", nargs="?", help="Face photo (default: synthetic face)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,... (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("AURA_WORKERS", "1")))
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--knee", type=float, default=0.10,
+                        help="Saturated when a step adds less throughput than this")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--slo-ms", type=float, default=0.0, help="p99 latency objective (0 = none)")
+    parser.add_argument("--keep-going", action="store_true", help="Run all steps past saturation")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    if args.image:
+        img = cv2.imread(args.image)
+        if img is None:
+            raise SystemExit(f"Cannot read {args.image}")
+    else:
+        img = synthetic_face(1080)
+    mix = parse_mix(args.mix)
+    requests = build_requests(encode_jpeg(img), mix)
+
+    proc = start_server(args.port, args.workers)
+    rows = []
+    try:
+        if not wait_ready(args.port):
+            raise SystemExit("⚠️ server did not start")
+        drive(args.port, requests, max(args.concurrency[0], 2), args.warmup)
+
+        print(f"\nworkers={args.workers} mix={args.mix}")
+        print(f"{'conc':>5s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'errors':>7s}")
+        for conc in args.concurrency:
+            row = drive(args.port, requests, conc, args.duration)
+            row["concurrency"] = conc
+            rows.append(row)
+            print(f"{conc:5d} {row['throughput_rps']:8.2f} {row['latency_ms_p50']:9.1f} "
+                  f"{row['latency_ms_p95']:9.1f} {row['latency_ms_p99']:9.1f} {row['error_rate']:7.2%}")
+            sat, _ = find_saturation(rows, args.knee, args.max_error_rate, args.slo_ms)
+            if sat is not None and not args.keep_going:
+                break
+    finally:
+        stop_server(proc)
+
+    sat, reason = find_saturation(rows, args.knee, args.max_error_rate, args.slo_ms)
+    if sat is None:
+        print(f"\n📈 No saturation up to concurrency {rows[-1]['concurrency']}; extend --concurrency")
+        best = rows[-1]
+    else:
+        best = rows[max(0, sat - 1)]
+        print(f"\n🎯 Saturates at concurrency {rows[sat]['concurrency']} ({reason})")
+        print(f"   sustainable: ~{best['throughput_rps']:.1f} req/s at concurrency {best['concurrency']} "
+              f"(p99 {best['latency_ms_p99']:.0f} ms) with {args.workers} worker(s)")
+
+    print("\nper endpoint at that point:")
+    for path, r in best["by_path"].items():
+        print(f"   {path:40s} {r['throughput_rps']:7.2f} req/s  p50 {r['latency_ms_p50']:8.1f} ms  "
+              f"p99 {r['latency_ms_p99']:8.1f} ms  err {r['error_rate']:.1%}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"workers": args.workers, "mix": mix, "rows": rows,
+                       "saturation_index": sat, "saturation_reason": reason}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
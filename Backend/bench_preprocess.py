@@ -0,0 +1,80 @@
+# ============================================================
+# bench_preprocess.py — FACE CROP PREPROCESSING MICROBENCHMARK
+# ============================================================
+# Compares the torchvision/PIL pipeline (cvtColor -> Image.fromarray
+# -> Resize -> ToTensor -> Normalize) against the NumPy-native
+# preprocess_face_crop / preprocess_face_batch path.
+#
+# Usage:
+#   python bench_preprocess.py --crop 600 --size 380 --iters 200
+# ============================================================
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+import predict_tone_shape as pts
+
+
+def synthetic_crop(side, seed=0):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(img, (7, 7), 0)
+
+
+def torchvision_path(crop, transform):
+    rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+    return transform(Image.fromarray(rgb)).unsqueeze(0)
+
+
+def timeit(fn, iters):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing microbenchmark")
+    parser.add_argument("--crop", type=int, default=600, help="Input crop side in px")
+    parser.add_argument("--size", type=int, default=pts.FACE_SHAPE_INPUT_SIZE)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--iters", type=int, default=200)
+    args = parser.parse_args()
+
+    crop = synthetic_crop(args.crop)
+    crops = [synthetic_crop(args.crop, seed=i) for i in range(args.batch)]
+    transform = pts.build_face_transform(args.size)
+    out = np.empty((3, args.size, args.size), dtype=np.float32)
+
+    ref = torchvision_path(crop, transform)[0].numpy()
+    fast = pts.preprocess_face_crop(crop, size=args.size)
+    max_diff = float(np.abs(ref - fast).max())
+    mean_diff = float(np.abs(ref - fast).mean())
+
+    tv_ms = timeit(lambda: torchvision_path(crop, transform), args.iters)
+    np_ms = timeit(lambda: pts.preprocess_face_crop(crop, out=out, size=args.size), args.iters)
+    tv_batch_ms = timeit(
+        lambda: torch.cat([torchvision_path(c, transform) for c in crops]),
+        max(1, args.iters // args.batch),
+    )
+    np_batch_ms = timeit(
+        lambda: pts.preprocess_face_batch(crops, size=args.size),
+        max(1, args.iters // args.batch),
+    )
+
+    print(f"\ncrop {args.crop}px -> {args.size}px, batch {args.batch}")
+    print(f"torchvision single : {tv_ms:8.3f} ms")
+    print(f"numpy single       : {np_ms:8.3f} ms   ({tv_ms / np_ms:.2f}x)")
+    print(f"torchvision batch  : {tv_batch_ms:8.3f} ms")
+    print(f"numpy batch        : {np_batch_ms:8.3f} ms   ({tv_batch_ms / np_batch_ms:.2f}x)")
+    print(f"abs diff vs ref    : max {max_diff:.4f}  mean {mean_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# ============================================================
+# bench_recommendations.py — RECOMMENDATION ENGINE THROUGHPUT
+# ============================================================
+# Measures recommendations per second of make_recommendation over
+# a mix of requests covering the whole input space, next to the
+# original per-call implementation (lowercase + substring scan +
+# link building on every request) for comparison.
+#
+# Usage:
+#   python bench_recommendations.py --n 200000
+# ============================================================
+
+import argparse
+import itertools
+import random
+import time
+
+import recommendation_model as rm
+
+
+def request_mix():
+    tones = ["Porcelain", "Fair", "Light", "Medium", "Tan", "Brown", "Deep Brown", "Wheatish"]
+    combos = itertools.product(
+        tones, [f.capitalize() for f in rm.FACES], rm.GENDERS, rm.EVENTS, rm.BODY_TYPES
+    )
+    return [
+        rm.RecommendationRequest(face_shape=f, skin_tone=t, gender=g, event=e, body_type=b)
+        for t, f, g, e, b in combos
+    ]
+
+
+def legacy_summary(req, tone):
+    return (
+        f"For the {tone} skin tone and {req.face_shape.lower()} face shape, "
+        f"the AI suggests suitable makeup shades and hairstyles. "
+        f"Based on the {req.body_type.lower()} body type and {req.event.lower()} event, "
+        f"it recommends well-fitted outfits, accessories, and footwear for a complete look."
+    )
+
+
+def legacy_make_recommendation(req):
+    raw = req.skin_tone.lower()
+    tone = next((v for k, v in rm.LEGACY_TONE_MAP.items() if k in raw), "warm beige")
+    face, gender, event = req.face_shape.lower(), req.gender.lower(), req.event.lower()
+
+    makeup = {
+        "foundation": random.choice(rm.FOUNDATION_PRODUCTS[tone]),
+        "lipstick": random.choice(rm.LIPSTICK_PRODUCTS[tone]),
+        "blush": random.choice(rm.BLUSH_PRODUCTS[tone]),
+        "hairstyles": rm.HAIRSTYLE_BY_FACE[face],
+        "hairColors": rm.HAIR_COLOR_BY_TONE[tone],
+        "accessories": rm.generate_accessories(face, tone, event),
+    }
+    palette = rm.CLOTHING_COLORS[tone]
+    outfits = []
+    for item in rm.EVENT_CLOTHING[gender][event]:
+        color = random.choice(palette)
+        outfits.append({
+            "item": item,
+            "color": color,
+            "link": f"https://www.google.com/search?q={item.replace(' ','+')}+{color.replace(' ','+')}",
+        })
+    fashion = {
+        "colorPalette": palette,
+        "recommendedColor": palette[0],
+        "outfits": outfits,
+        "bag": random.choice(rm.BAG_MAP[event]),
+        "shoes": random.choice(rm.SHOE_MAP[gender][event]),
+    }
+    return {"makeup": makeup, "fashion": fashion, "summary": legacy_summary(req, tone)}
+
+
+def rate(fn, reqs, n):
+    for r in reqs:
+        fn(r)
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(reqs[i % len(reqs)])
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommendation engine throughput")
+    parser.add_argument("--n", type=int, default=200000)
+    args = parser.parse_args()
+
+    reqs = request_mix()
+    legacy = rate(legacy_make_recommendation, reqs, args.n)
+    compiled = rate(rm.make_recommendation, reqs, args.n)
+
+    print(f"\n{len(reqs)} distinct requests, {args.n} calls")
+    print(f"legacy   : {legacy:12,.0f} rec/s")
+    print(f"compiled : {compiled:12,.0f} rec/s   ({compiled / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
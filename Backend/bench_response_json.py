@@ -0,0 +1,81 @@
+# ============================================================
+# bench_response_json.py — RESPONSE SERIALIZATION THROUGHPUT
+# ============================================================
+# Before/after for /api/makeup_recommendation bodies:
+#   before: RecommendationsResponse(...) -> FastAPI response_model
+#           re-validation -> jsonable_encoder -> stdlib json
+#   after:  validate once -> fast_json.dumps (orjson if installed)
+# plus end-to-end endpoint throughput through the ASGI app, with
+# the response cache and matrix bypassed (explicit seeds).
+#
+# Usage:
+#   python bench_response_json.py --n 20000
+# ============================================================
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+import fast_json
+import recommendation_model as rm
+from models import RecommendationsResponse
+from recommendation_matrix import validate_response
+
+
+def legacy_serialize(result):
+    response = RecommendationsResponse(
+        makeup=result["makeup"], fashion=result["fashion"], summary=result["summary"]
+    )
+    # FastAPI validated the returned model against response_model again
+    revalidated = RecommendationsResponse(**fast_json.model_to_dict(response))
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def fast_serialize(result):
+    return fast_json.dumps(validate_response(result))
+
+
+def rate(fn, items, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(items[i % len(items)])
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--http", type=int, default=2000, help="End-to-end requests per mode")
+    args = parser.parse_args()
+
+    reqs = [
+        rm.RecommendationRequest(face_shape=f, skin_tone=t, gender=g, event=e, body_type=b)
+        for (t, f, g, e, b) in rm.RECOMMENDATION_INDEX
+    ]
+    results = [rm.make_recommendation(r) for r in reqs]
+
+    before = rate(legacy_serialize, results, args.n)
+    after = rate(fast_serialize, results, args.n)
+    print(f"\nencoder: {'orjson' if fast_json.ORJSON_AVAILABLE else 'stdlib json'}")
+    print(f"serialize before : {before:10,.0f} bodies/s")
+    print(f"serialize after  : {after:10,.0f} bodies/s   ({after / before:.2f}x)")
+
+    from main import app
+    client = TestClient(app)
+    payloads = [
+        {"face_shape": f, "skin_tone": t, "gender": g, "event": e, "body_type": b, "seed": i}
+        for i, (t, f, g, e, b) in enumerate(rm.RECOMMENDATION_INDEX)
+    ]
+    t0 = time.perf_counter()
+    for i in range(args.http):
+        resp = client.post("/api/makeup_recommendation", json=payloads[i % len(payloads)])
+        resp.raise_for_status()
+    http_rate = args.http / (time.perf_counter() - t0)
+    print(f"endpoint (uncached, in-process): {http_rate:10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# ============================================================
+# bench_worker_memory.py — PER-WORKER MEMORY: UVICORN vs SERVE.PY
+# ============================================================
+# Starts the backend with N workers both ways,
+#   uvicorn   `uvicorn main:app --workers N` (every worker loads all)
+#   preload   `python serve.py --workers N`  (load once, fork, COW)
+# sends mixed traffic until every worker has served each endpoint,
+# then reads /proc/<pid>/smaps_rollup of the master and every worker:
+#   USS  pages only this process has (what one more worker costs)
+#   PSS  shared pages split between the processes sharing them;
+#        the PSS sum is the real footprint of the whole server
+#
+# Usage:
+#   python bench_worker_memory.py --workers 4
+#   python bench_worker_memory.py face.jpg --workers 2 4 --json mem.json
+#
+# Linux only (smaps_rollup).
+# ============================================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+
+from bench_endpoints import synthetic_face, encode_jpeg
+from bench_load import DEFAULT_MIX, parse_mix, build_requests
+from bench_workers_threads import HOST, start_server, wait_ready, stop_server, drive
+from memory_diagnostics import smaps_rollup, MB
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def start_preforked(port, workers):
+    env = dict(os.environ)
+    env["AURA_WORKERS"] = str(workers)
+    cmd = [sys.executable, "serve.py", "--host", HOST, "--port", str(port),
+           "--workers", str(workers)]
+    return subprocess.Popen(cmd, env=env, cwd=HERE)
+
+
+def descendants(pid):
+    out = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                for child in f.read().split():
+                    out.append(int(child))
+                    out.extend(descendants(int(child)))
+    except OSError:
+        pass
+    return out
+
+
+def cmdline(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def measure(proc):
+    """Master + workers (multiprocessing helpers are skipped)."""
+    rows = []
+    for pid in [proc.pid] + descendants(proc.pid):
+        if "resource_tracker" in cmdline(pid):
+            continue
+        mem = smaps_rollup(pid)
+        if mem is None:
+            continue
+        rows.append({"pid": pid, "role": "master" if pid == proc.pid else "worker",
+                     **{k: round(v / MB, 1) for k, v in mem.items()}})
+    return rows
+
+
+def run_mode(mode, port, workers, requests, duration):
+    proc = start_server(port, workers) if mode == "uvicorn" else start_preforked(port, workers)
+    try:
+        if not wait_ready(port):
+            raise SystemExit(f"⚠️ {mode} server did not start")
+        # Enough concurrency that every worker loads every lazy model
+        drive(port, requests, max(2, workers * 4), duration)
+        time.sleep(1.0)
+        rows = measure(proc)
+    finally:
+        stop_server(proc)
+
+    workers_rows = [r for r in rows if r["role"] == "worker"]
+    uss = [r["uss"] for r in workers_rows]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "processes": rows,
+        "worker_uss_mb_mean": round(sum(uss) / len(uss), 1) if uss else None,
+        "total_pss_mb": round(sum(r["pss"] for r in rows), 1),
+        "total_rss_mb": round(sum(r["rss"] for r in rows), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker USS / PSS: uvicorn --workers vs serve.py")
+    parser.add_argument("image", nargs="?", help="Face photo (default: synthetic face)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--modes", nargs="+", default=["uvicorn", "preload"], choices=["uvicorn", "preload"])
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--duration", type=float, default=20.0, help="Traffic before measuring (s)")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("Needs Linux /proc/<pid>/smaps_rollup")
+
+    if args.image:
+        img = cv2.imread(args.image)
+        if img is None:
+            raise SystemExit(f"Cannot read {args.image}")
+    else:
+        img = synthetic_face(1080)
+    requests = build_requests(encode_jpeg(img), parse_mix(args.mix))
+
+    results = []
+    print(f"{'mode':8s} {'workers':>7s} {'worker USS':>11s} {'total PSS':>10s} {'total RSS':>10s}")
+    for workers in args.workers:
+        for mode in args.modes:
+            r = run_mode(mode, args.port, workers, requests, args.duration)
+            results.append(r)
+            print(f"{mode:8s} {workers:7d} {r['worker_uss_mb_mean'] or 0:9.0f}MB "
+                  f"{r['total_pss_mb']:8.0f}MB {r['total_rss_mb']:8.0f}MB")
+
+    for workers in args.workers:
+        by_mode = {r["mode"]: r for r in results if r["workers"] == workers}
+        if {"uvicorn", "preload"} <= set(by_mode):
+            base, pre = by_mode["uvicorn"], by_mode["preload"]
+            print(f"\n💾 {workers} workers: preload saves "
+                  f"{base['total_pss_mb'] - pre['total_pss_mb']:.0f} MB in total "
+                  f"({(base['worker_uss_mb_mean'] or 0) - (pre['worker_uss_mb_mean'] or 0):.0f} MB "
+                  f"unique memory per worker)")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
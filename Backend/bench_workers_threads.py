@@ -0,0 +1,219 @@
+# ============================================================
+# bench_workers_threads.py — WORKERS x THREADS LOAD TEST
+# ============================================================
+# Starts `uvicorn main:app` locally for every (workers, threads)
+# split, drives /api/classify with a fixed number of concurrent
+# clients and reports throughput and latency per split.
+#
+# Usage:
+#   python bench_workers_threads.py face.jpg
+#   python bench_workers_threads.py face.jpg --workers 1 2 4 --threads 1 2 4 8
+#
+# By default only splits with workers * threads <= cores are run.
+# ============================================================
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+HOST = "127.0.0.1"
+
+
+def encode_multipart(fields, files):
+    """
+    fields: {name: str}
+    files:  {name: (filename, bytes, content_type)}
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+            f"{value}\r\n".encode()
+        )
+    for name, (filename, data, ctype) in files.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"; "
+            f"filename=\"{filename}\"\r\nContent-Type: {ctype}\r\n\r\n".encode()
+            + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def start_server(port, workers, env_overrides=None):
+    env = dict(os.environ)
+    env.update(env_overrides or {})
+    env["AURA_WORKERS"] = str(workers)
+    cmd = [sys.executable, "-m", "uvicorn", "main:app",
+           "--host", HOST, "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_ready(port, timeout=180.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def drive(port, requests, concurrency, duration):
+    """
+    Closed loop: each client sends its next request as soon as the
+    previous one returns. `requests` is a list of
+    (method, path, body, headers) tuples picked round-robin.
+    Also returns the same numbers per path under "by_path".
+    """
+    latencies = []
+    samples = []   # (path, ms, error)
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection(HOST, port, timeout=60)
+        i = offset
+        local_lat, local_err, local_samples = [], 0, []
+        while time.perf_counter() < stop_at:
+            method, path, body, headers = requests[i % len(requests)]
+            i += 1
+            t0 = time.perf_counter()
+            failed = False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                failed = resp.status >= 400
+            except (OSError, http.client.HTTPException):
+                failed = True
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, port, timeout=60)
+            ms = (time.perf_counter() - t0) * 1000.0
+            local_err += failed
+            local_lat.append(ms)
+            local_samples.append((path, ms, failed))
+        with lock:
+            latencies.extend(local_lat)
+            samples.extend(local_samples)
+            errors[0] += local_err
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    t_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+
+    by_path = {}
+    for path in sorted({s[0] for s in samples}):
+        ms = np.array([s[1] for s in samples if s[0] == path])
+        errs = sum(1 for s in samples if s[0] == path and s[2])
+        by_path[path] = {
+            "requests": len(ms),
+            "error_rate": errs / len(ms),
+            "throughput_rps": len(ms) / elapsed,
+            "latency_ms_p50": float(np.percentile(ms, 50)),
+            "latency_ms_p99": float(np.percentile(ms, 99)),
+        }
+
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "by_path": by_path,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "error_rate": errors[0] / max(1, len(latencies)),
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms_p50": float(np.percentile(lat, 50)),
+        "latency_ms_p95": float(np.percentile(lat, 95)),
+        "latency_ms_p99": float(np.percentile(lat, 99)),
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Workers x threads load test")
+    parser.add_argument("image", help="Face photo posted to /api/classify")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Concurrent clients (default: 2 per worker)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--all", action="store_true",
+                        help="Also run splits with workers * threads > cores")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        body, ctype = encode_multipart({}, {"file": ("face.jpg", f.read(), "image/jpeg")})
+    requests = [("POST", "/api/classify", body, {"Content-Type": ctype})]
+
+    rows = []
+    for workers in args.workers:
+        for threads in args.threads:
+            if workers * threads > cores and not args.all:
+                continue
+
+            env = {
+                "AURA_TORCH_THREADS": str(threads),
+                "AURA_CV2_THREADS": str(threads),
+                "OMP_NUM_THREADS": str(threads),
+            }
+            proc = start_server(args.port, workers, env)
+            try:
+                if not wait_ready(args.port):
+                    print(f"⚠️ server did not start for workers={workers} threads={threads}")
+                    continue
+                concurrency = args.concurrency or 2 * workers
+                drive(args.port, requests, concurrency, min(3.0, args.duration))  # warm-up
+                row = drive(args.port, requests, concurrency, args.duration)
+                row.update({"workers": workers, "threads": threads,
+                            "concurrency": concurrency})
+                rows.append(row)
+                print(f"workers={workers:<2} threads={threads:<2} "
+                      f"rps={row['throughput_rps']:7.2f} p50={row['latency_ms_p50']:8.1f}ms "
+                      f"p95={row['latency_ms_p95']:8.1f}ms err={row['error_rate']:.2%}")
+            finally:
+                stop_server(proc)
+
+    if not rows:
+        raise SystemExit("No split was run")
+
+    best = max(rows, key=lambda r: r["throughput_rps"] * (1.0 - r["error_rate"]))
+    print(f"\n🎯 Best split on {cores} cores: workers={best['workers']} "
+          f"threads={best['threads']} ({best['throughput_rps']:.2f} req/s)")
+    print(f"   AURA_WORKERS={best['workers']} AURA_TORCH_THREADS={best['threads']} "
+          f"AURA_CV2_THREADS={best['threads']}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"cores": cores, "rows": rows, "best": best}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
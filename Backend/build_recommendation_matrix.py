@@ -0,0 +1,23 @@
+# ============================================================
+# build_recommendation_matrix.py — BUILD STEP
+# ============================================================
+# Renders every default recommendation into the memory-mapped
+# artifact served by recommendation_matrix.py. Re-run after any
+# change to the rule tables (stale artifacts are ignored at load).
+#
+# Usage:
+#   python build_recommendation_matrix.py [output_path]
+# ============================================================
+
+import os
+import sys
+import time
+
+from recommendation_matrix import MATRIX_PATH, build_matrix
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else MATRIX_PATH
+    t0 = time.perf_counter()
+    count = build_matrix(path)
+    print(f"🎯 {count} recommendations written to {path} "
+          f"({os.path.getsize(path) / 1024:.1f} KiB, {time.perf_counter() - t0:.2f}s)")
@@ -4,9 +4,13 @@
 
 import traceback
 import logging
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from fast_json import FastJSONResponse
+from model_registry import registry
+from image_sessions import resolve_image
 from predict_tone_shape import (
     SkinFaceClassifierAPI,
     load_image_bytes_to_bgr,
@@ -16,25 +20,29 @@ from predict_tone_shape import (
 router = APIRouter()
 logger = logging.getLogger("uvicorn.error")
 
-_classifier = None
-def get_classifier():
-    global _classifier
-    if _classifier is None:
-        _classifier = SkinFaceClassifierAPI()
-    return _classifier
+def get_classifier() -> SkinFaceClassifierAPI:
+    # Same instance main.py uses (model_registry.py)
+    return registry.get("classifier")
+
+async def read_image(image: Optional[UploadFile], image_id: Optional[str]):
+    """BGR image from an upload or a session handle (image_sessions.py)."""
+    if image is not None and not image_id and not image.content_type.startswith("image/"):
+        raise HTTPException(400, "Not an image")
+    img, _ = await resolve_image(image, image_id, load_image_bytes_to_bgr)
+    return img
 
 # ============================================================
 # /face_scan
 # ============================================================
 @router.post("/face_scan")
-async def face_scan(image: UploadFile = File(...)):
+async def face_scan(
+    image: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
+    img = await read_image(image, image_id)
     try:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(400, "Not an image")
-
-        img = load_image_bytes_to_bgr(await image.read())
         clf = get_classifier()
-        res = clf.classify_image(img)
+        res = await run_in_threadpool(clf.classify_image, img)
 
         if not res["success"]:
             return {"success": False, "faces": []}
@@ -54,13 +62,13 @@ async def face_scan(image: UploadFile = File(...)):
 # /skin_tone
 # ============================================================
 @router.post("/skin_tone")
-async def skin_tone(image: UploadFile = File(...)):
+async def skin_tone(
+    image: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
+    img = await read_image(image, image_id)
     try:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(400, "Not an image")
-
-        img = load_image_bytes_to_bgr(await image.read())
-        tone = classify_skin_tone(img)
+        tone = await run_in_threadpool(classify_skin_tone, img)
 
         return {
             "skin_tone": tone["bucket"],
@@ -75,19 +83,19 @@ async def skin_tone(image: UploadFile = File(...)):
 # /classify
 # ============================================================
 @router.post("/classify")
-async def classify(image: UploadFile = File(...)):
+async def classify(
+    image: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
+    img = await read_image(image, image_id)
     try:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(400, "Not an image")
-
-        img = load_image_bytes_to_bgr(await image.read())
         clf = get_classifier()
-        res = clf.classify_image(img)
+        res = await run_in_threadpool(clf.classify_image, img)
 
         if res.get("face_shape"):
             res["face_shape"]["shape"] = res["face_shape"]["shape"].capitalize()
 
-        return JSONResponse(res)
+        return FastJSONResponse(res)
 
     except Exception:
         traceback.print_exc()
@@ -3,21 +3,15 @@ import numpy as np
 import cv2
 import dlib
 from typing import Dict, Any, List
-from ultralytics import YOLO
 import io
 from PIL import Image
 from torchvision import transforms
 import base64
 
-# Load YOLOv8 face detection model
-yolo_model = YOLO("yolov8n-face-lindevs.pt")
-yolo_model.conf = 0.5
-
-# Load dlib landmark detector
-predictor_path = 'models/shape_predictor_68_face_landmarks.dat'
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor(predictor_path)
+from model_registry import registry
 
+# YOLOv8 face detector and dlib 68-point predictor are loaded on first
+# use through the model registry ("yolo_face", "dlib_predictor").
 
 
 def bytes_to_cv2(image_bytes: bytes):
@@ -49,6 +43,8 @@ def cv2_to_base64(img: np.ndarray) -> str:
 
 def detect_faces_and_landmarks(image_bytes: bytes) -> Dict[str, Any]:
     img = bytes_to_cv2(image_bytes)  # BGR image from bytes
+    yolo_model = registry.get("yolo_face")
+    predictor = registry.get("dlib_predictor")
     results = yolo_model(img)
 
     faces_data = []
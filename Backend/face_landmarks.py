@@ -0,0 +1,118 @@
+# ============================================================
+# face_landmarks.py — SHARED LANDMARK CONTAINER
+# ============================================================
+# One conversion from MediaPipe landmarks (FaceMesh solution or the
+# Tasks FaceLandmarker) to a (N, 3) float32 array of normalized
+# x, y, z. Pixel coordinates are derived once with one multiply, and
+# every region is a precomputed NumPy index array, so crops, polygons
+# and distances are fancy-indexing operations instead of per-point
+# Python loops.
+#
+# Index lists are the MediaPipe 468/478-point topology.
+# ============================================================
+
+from itertools import chain
+
+import numpy as np
+
+
+def _idx(*points):
+    return np.array(points, dtype=np.intp)
+
+
+# ============================================================
+# REGION INDICES
+# ============================================================
+FACE_OVAL = _idx(
+    10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
+    397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150,
+    136, 172, 58, 132, 93, 234, 127,
+    162, 21, 54, 103, 67, 109
+)
+
+OUTER_LIPS = _idx(
+    61,185,40,39,37,0,267,269,270,409,
+    291,308,415,310,311,312,13,82,81,
+    80,191,78,95,88,178,87,14,317,
+    402,318,324,308,291,375,321,405,
+    314,17,84,181,91,146,61
+)
+
+LEFT_EYE_UPPER = _idx(33, 160, 158, 157, 173, 133)
+RIGHT_EYE_UPPER = _idx(263, 387, 385, 384, 398, 362)
+
+LEFT_CHEEK = _idx(101, 118, 50, 205)
+RIGHT_CHEEK = _idx(330, 347, 280, 425)
+
+HIGHLIGHT = _idx(101, 118, 50, 330, 347, 280, 168, 5)
+
+
+# ============================================================
+# CONTAINER
+# ============================================================
+class FaceLandmarks:
+    """
+    Landmarks of one face in an image of size (w, h).
+
+    .norm    (N, 3) float32 normalized x, y, z
+    .points  (N, 2) float32 pixel x, y
+    .px      (N, 2) int32 pixel x, y (truncated, like int(p.x * w))
+    """
+
+    __slots__ = ("norm", "w", "h", "_points", "_px")
+
+    def __init__(self, norm: np.ndarray, w: int, h: int):
+        self.norm = norm
+        self.w = w
+        self.h = h
+        self._points = None
+        self._px = None
+
+    @classmethod
+    def from_mediapipe(cls, landmarks, w: int, h: int) -> "FaceLandmarks":
+        """From a NormalizedLandmarkList (FaceMesh) or a list of
+        NormalizedLandmark (FaceLandmarker)."""
+        pts = getattr(landmarks, "landmark", landmarks)
+        n = len(pts)
+        flat = np.fromiter(chain.from_iterable((p.x, p.y, p.z) for p in pts),
+                           dtype=np.float32, count=3 * n)
+        return cls(flat.reshape(n, 3), w, h)
+
+    def __len__(self):
+        return len(self.norm)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory once .points and .px are built (for session budgets)."""
+        # + points (N, 2) float32 + px (N, 2) int32
+        return self.norm.nbytes + len(self.norm) * 16
+
+    @property
+    def points(self) -> np.ndarray:
+        if self._points is None:
+            self._points = self.norm[:, :2] * np.array([self.w, self.h], dtype=np.float32)
+        return self._points
+
+    @property
+    def px(self) -> np.ndarray:
+        if self._px is None:
+            self._px = self.points.astype(np.int32)
+        return self._px
+
+    def region(self, idx: np.ndarray) -> np.ndarray:
+        """(k, 2) int32 pixel points of a region; indices past N are dropped."""
+        if len(idx) and idx.max() >= len(self.norm):
+            idx = idx[idx < len(self.norm)]
+        return self.px[idx]
+
+    def bbox(self):
+        """(xmin, ymin, xmax, ymax) of all points in pixels."""
+        px = self.px
+        xmin, ymin = px.min(axis=0)
+        xmax, ymax = px.max(axis=0)
+        return int(xmin), int(ymin), int(xmax), int(ymax)
+
+    def distances(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Pixel distances between point pairs a[i], b[i]."""
+        d = self.points[a] - self.points[b]
+        return np.hypot(d[:, 0], d[:, 1])
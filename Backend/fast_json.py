@@ -0,0 +1,60 @@
+# ============================================================
+# fast_json.py — FAST JSON RESPONSES
+# ============================================================
+# orjson when installed (NumPy arrays and scalars serialized natively),
+# stdlib json with a NumPy-aware `default` otherwise. Output is compact
+# UTF-8 either way.
+#
+# FastJSONResponse is used for bodies that are already validated (or
+# plain analysis dicts), so FastAPI does not run jsonable_encoder or
+# re-validate against response_model.
+# ============================================================
+
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+
+
+def _default(obj: Any):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTS)
+    return json.dumps(obj, default=_default, separators=(",", ":"),
+                      ensure_ascii=False).encode("utf-8")
+
+
+def model_to_dict(model) -> dict:
+    """Plain dict of an already-validated pydantic model (v1 or v2)."""
+    if hasattr(model, "model_dump"):
+        return model.model_dump()
+    return model.dict()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,350 @@
+# ============================================================
+# image_sessions.py — UPLOAD ONCE, REFER BY HANDLE
+# ============================================================
+# The makeup flow sends the same selfie to classify, analyze_face,
+# get_makeup_guide and apply_makeup. Instead:
+#
+#   POST   /api/session/upload        file -> {"image_id", "expires_in", ...}
+#   GET    /api/session/{image_id}    size / expiry / what is computed
+#   DELETE /api/session/{image_id}
+#
+# and every image endpoint takes `image_id` (form field) in place of
+# the file. A session holds the decoded (EXIF-rotated) image, read-only,
+# plus whatever the endpoints computed from it (resized copies,
+# landmarks) via session.memo(), so follow-up calls skip the transfer,
+# the decode and the landmark pass.
+#
+# Bounded: sessions expire AURA_SESSION_TTL seconds after upload
+# (900) and the least recently used go once the decoded images and
+# memos pass AURA_SESSION_MAX_MB (256).
+#
+# With several workers (shared cache backend, result_cache.py) the
+# upload bytes are also kept in the shared SQLite file, so a worker
+# that never saw the upload decodes it once and carries on. That copy
+# has its own budget, AURA_SESSION_SHARED_MAX_MB (default: the same as
+# AURA_SESSION_MAX_MB) of decoded size; expired rows are skipped on
+# read and deleted on every write.
+# ============================================================
+
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+
+from predict_tone_shape import load_image_bytes_to_bgr
+from result_cache import CACHE_PATH, cache_backend
+
+logger = logging.getLogger("aura")
+
+MB = 1024 * 1024
+SESSION_TTL = float(os.environ.get("AURA_SESSION_TTL", "900"))
+SESSION_MAX_BYTES = int(float(os.environ.get("AURA_SESSION_MAX_MB", "256")) * MB)
+MAX_UPLOAD_BYTES = int(float(os.environ.get("AURA_SESSION_MAX_UPLOAD_MB", "10")) * MB)
+SHARED_MAX_BYTES = int(float(os.environ.get("AURA_SESSION_SHARED_MAX_MB",
+                                            str(SESSION_MAX_BYTES / MB))) * MB)
+
+_MISSING = object()
+_TOUCH_SECONDS = 30.0
+
+
+class ImageSession:
+    def __init__(self, image_id, image, expires, on_grow=None):
+        image.flags.writeable = False   # shared by concurrent requests
+        self.id = image_id
+        self.image = image
+        self.expires = expires
+        self.nbytes = image.nbytes
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._on_grow = on_grow
+
+    def memo(self, name, fn):
+        """fn() once per session (None results included)."""
+        value = self._memo.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            value = self._memo.get(name, _MISSING)
+            if value is _MISSING:
+                value = fn()
+                self._memo[name] = value
+                grown = getattr(value, "nbytes", 0)
+                self.nbytes += grown
+            else:
+                grown = 0
+        # Memos count against the store's budget too
+        if grown and self._on_grow is not None:
+            self._on_grow()
+        return value
+
+    def describe(self):
+        h, w = self.image.shape[:2]
+        return {
+            "image_id": self.id,
+            "width": w,
+            "height": h,
+            "expires_in": max(0, round(self.expires - time.time())),
+            "computed": sorted(self._memo),
+        }
+
+
+class SharedSessions:
+    """
+    Upload bytes by image_id in a SQLite file every worker opens,
+    capped by the decoded size of the images (what a worker pays to
+    hold them) and by expiry.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=SHARED_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS image_sessions ("
+            " id TEXT NOT NULL PRIMARY KEY, data BLOB NOT NULL,"
+            " decoded INTEGER NOT NULL, expires REAL NOT NULL, atime REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put(self, image_id, data, decoded, expires):
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM image_sessions WHERE expires <= ?", (now,))
+                conn.execute("INSERT OR REPLACE INTO image_sessions (id, data, decoded, expires, atime)"
+                             " VALUES (?, ?, ?, ?, ?)", (image_id, data, decoded, expires, now))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception:
+            logger.warning("⚠️ Shared image session write failed", exc_info=True)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(decoded), 0) FROM image_sessions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        # Oldest first; the newest row (just written) always stays
+        rows = conn.execute("SELECT id, decoded FROM image_sessions ORDER BY atime").fetchall()
+        for image_id, decoded in rows[:-1]:
+            victims.append((image_id,))
+            total -= decoded
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM image_sessions WHERE id = ?", victims)
+
+    def get(self, image_id):
+        """(expires, data) of a live entry, else None."""
+        try:
+            conn = self._conn()
+            now = time.time()
+            row = conn.execute("SELECT expires, data, atime FROM image_sessions"
+                               " WHERE id = ? AND expires > ?", (image_id, now)).fetchone()
+            if row is None:
+                return None
+            # Reads stay reads unless the LRU time is stale
+            if now - row[2] > _TOUCH_SECONDS:
+                conn.execute("UPDATE image_sessions SET atime = ? WHERE id = ?", (now, image_id))
+            return row[0], row[1]
+        except Exception:
+            logger.warning("⚠️ Shared image session read failed", exc_info=True)
+            return None
+
+    def delete(self, image_id):
+        try:
+            cur = self._conn().execute("DELETE FROM image_sessions WHERE id = ?", (image_id,))
+            return cur.rowcount > 0
+        except Exception:
+            logger.warning("⚠️ Shared image session delete failed", exc_info=True)
+            return False
+
+
+class ImageSessionStore:
+    def __init__(self, max_bytes=SESSION_MAX_BYTES, ttl=SESSION_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._shared = None
+        if cache_backend() == "sqlite":
+            try:
+                self._shared = SharedSessions(CACHE_PATH)
+            except Exception:
+                logger.exception("Shared image sessions unavailable; handles are per worker")
+
+    def _decode(self, data):
+        if not data:
+            raise ValueError("Empty image")
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise ValueError("Image too large")
+        try:
+            return load_image_bytes_to_bgr(data)
+        except Exception as e:
+            raise ValueError("Invalid image") from e
+
+    def create(self, data: bytes) -> ImageSession:
+        session = ImageSession(secrets.token_urlsafe(16), self._decode(data), time.time() + self.ttl,
+                               on_grow=self._trim)
+        if session.nbytes > self.max_bytes:
+            raise ValueError("Image too large")
+        self._add(session)
+        if self._shared is not None:
+            self._shared.put(session.id, data, session.nbytes, session.expires)
+        return session
+
+    def _add(self, session):
+        with self._lock:
+            self._sessions[session.id] = session
+            self._expire_locked()
+
+    def _trim(self):
+        with self._lock:
+            self._expire_locked()
+
+    def _expire_locked(self):
+        now = time.time()
+        for sid in [sid for sid, s in self._sessions.items() if s.expires <= now]:
+            del self._sessions[sid]
+        total = sum(s.nbytes for s in self._sessions.values())
+        while total > self.max_bytes and len(self._sessions) > 1:
+            _, old = self._sessions.popitem(last=False)
+            total -= old.nbytes
+            self.evicted += 1
+
+    def get(self, image_id) -> Optional[ImageSession]:
+        with self._lock:
+            session = self._sessions.get(image_id)
+            if session is not None and session.expires <= time.time():
+                del self._sessions[image_id]
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(image_id)
+                self.hits += 1
+                return session
+
+        # Uploaded through another worker?
+        if self._shared is not None:
+            entry = self._shared.get(image_id)
+            if entry is not None:
+                try:
+                    session = ImageSession(image_id, self._decode(entry[1]), entry[0],
+                                           on_grow=self._trim)
+                except ValueError:
+                    session = None
+                if session is not None:
+                    self._add(session)
+                    with self._lock:
+                        self.hits += 1
+                    return session
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def delete(self, image_id):
+        with self._lock:
+            found = self._sessions.pop(image_id, None) is not None
+        # Uploaded through another worker: only the shared copy exists here
+        if self._shared is not None and self._shared.delete(image_id):
+            found = True
+        return found
+
+    def stats(self):
+        with self._lock:
+            self._expire_locked()
+            sessions = len(self._sessions)
+            total = sum(s.nbytes for s in self._sessions.values())
+        return {
+            "sessions": sessions,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "shared": self._shared is not None,
+        }
+
+
+SESSIONS = ImageSessionStore()
+
+
+# ============================================================
+# ENDPOINT HELPERS
+# ============================================================
+def require_session(image_id: str) -> ImageSession:
+    session = SESSIONS.get(image_id)
+    if session is None:
+        raise HTTPException(404, "Unknown or expired image_id; upload the image again")
+    return session
+
+
+async def resolve_image(upload: Optional[UploadFile], image_id: Optional[str], decode):
+    """
+    (image, session) for an endpoint that takes either a file or an
+    image_id; session is None for a plain upload, which is decoded
+    with the endpoint's own `decode(bytes)`.
+    """
+    if image_id:
+        session = require_session(image_id)
+        return session.image, session
+    if upload is None:
+        raise HTTPException(422, "Send an image file or an image_id")
+    return decode(await upload.read()), None
+
+
+# ============================================================
+# ROUTER (/api/session)
+# ============================================================
+router = APIRouter()
+
+
+@router.post("/upload")
+async def upload_image(image: UploadFile = File(...)):
+    """Decode once; pass the returned image_id to the image endpoints."""
+    try:
+        session = SESSIONS.create(await image.read())
+    except ValueError as e:
+        raise HTTPException(413 if "too large" in str(e) else 400, str(e))
+    return {"success": True, **session.describe()}
+
+
+@router.get("/stats")
+async def session_stats():
+    return SESSIONS.stats()
+
+
+@router.get("/{image_id}")
+async def get_session(image_id: str):
+    return require_session(image_id).describe()
+
+
+@router.delete("/{image_id}")
+async def delete_session(image_id: str):
+    if not SESSIONS.delete(image_id):
+        raise HTTPException(404, "Unknown or expired image_id")
+    return {"success": True}
@@ -2,22 +2,62 @@ import base64
 import json
 import cv2
 import numpy as np
-import mediapipe as mp   # pyright: ignore
-FaceMesh = mp.solutions.face_mesh.FaceMesh
-
 from fastapi import APIRouter, File, Form, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import logging
+import os
+from typing import Optional
+
+from face_landmarks import FaceLandmarks, OUTER_LIPS
+from metrics import stage_timer
+from model_registry import registry
+from result_cache import make_cache, image_key
+from image_sessions import resolve_image
 
 router = APIRouter()
 logger = logging.getLogger("aura")
 
+# (norm, w, h) per image content, () when no face was found
+MESH_LANDMARK_CACHE = make_cache("face_mesh_landmarks",
+                                 int(os.environ.get("AURA_LANDMARK_CACHE_SIZE", "512")))
+
+
+def decode_upload(img_bytes):
+    with stage_timer("decode"):
+        return cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+
+def get_mesh_landmarks(img):
+    """FaceMesh landmarks of a BGR image (shared FaceMesh from the registry)."""
+    key = image_key(img)
+    cached = MESH_LANDMARK_CACHE.get(key)
+    if cached is not None:
+        return FaceLandmarks(*cached) if cached else None
+
+    h, w = img.shape[:2]
+    rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    with registry.lease("face_mesh") as fm, stage_timer("landmarks"):
+        res = fm.process(rgb_img)
+
+    if not res.multi_face_landmarks:
+        MESH_LANDMARK_CACHE.set(key, ())
+        return None
+
+    lm = FaceLandmarks.from_mediapipe(res.multi_face_landmarks[0], w, h)
+    MESH_LANDMARK_CACHE.set(key, (lm.norm, w, h))
+    return lm
+
 
 @router.post("/apply_makeup")
-async def apply_makeup(image: UploadFile = File(...), req: str = Form(...)):
+async def apply_makeup(
+    image: Optional[UploadFile] = File(None),
+    req: str = Form(...),
+    image_id: Optional[str] = Form(None),
+):
     """
     Apply virtual lipstick using mediapipe lip landmarks.
     Expects:
-        - image: uploaded file
+        - image: uploaded file, or image_id from /api/session/upload
         - req: JSON string:
             {
                 "makeup": {
@@ -48,66 +88,13 @@ async def apply_makeup(image: UploadFile = File(...), req: str = Form(...)):
         # ---------------------------------------------------
         # Decode image uploaded by user
         # ---------------------------------------------------
-        img_bytes = await image.read()
-        arr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        img, session = await resolve_image(image, image_id, decode_upload)
 
         if img is None:
             raise HTTPException(status_code=400, detail="Invalid image")
 
-        h, w = img.shape[:2]
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-        # ---------------------------------------------------
-        # Detect facial landmarks
-        # ---------------------------------------------------
-        with FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            refine_landmarks=True
-        ) as fm:
-            res = fm.process(rgb_img)
-
-            if not res.multi_face_landmarks:
-                return {"makeup_image_base64": None}
-
-            lm = res.multi_face_landmarks[0]
-
-            # Lip pts from MediaPipe standard
-            lips_idx = [
-                61,185,40,39,37,0,267,269,270,409,291,308,415,310,
-                311,312,13,82,81,80,191,78,95,88,178,87,14,317,
-                402,318,324,308,291,375,321,405,314,17,84,181,
-                91,146,61
-            ]
-            pts = [(int(lm.landmark[i].x * w), int(lm.landmark[i].y * h))
-                   for i in lips_idx]
-
-            # ---------------------------------------------------
-            # Create lip mask
-            # ---------------------------------------------------
-            mask = np.zeros((h, w), dtype=np.uint8)
-            cv2.fillPoly(mask, [np.array(pts, dtype=np.int32)], 255)
-            mask = cv2.GaussianBlur(mask, (9, 9), 0)
-
-            # Normalize & apply intensity
-            mask_f = (mask.astype(float) / 255.0) * alpha
-
-            # Lip overlay (convert RGB → BGR)
-            overlay = np.full_like(img, lips_color[::-1])
-
-            # Final blending
-            img = (
-                overlay * mask_f[..., None]
-                + img * (1 - mask_f[..., None])
-            ).astype(np.uint8)
-
-        # ---------------------------------------------------
-        # Encode final output image
-        # ---------------------------------------------------
-        _, buf = cv2.imencode(".jpg", img)
-        final_b64 = base64.b64encode(buf).decode()
-
+        # Landmarks wait on the leased FaceMesh: keep the loop free
+        final_b64 = await run_in_threadpool(render_lipstick, img, session, lips_color, alpha)
         return {"makeup_image_base64": final_b64}
 
     except HTTPException:
@@ -115,3 +102,52 @@ async def apply_makeup(image: UploadFile = File(...), req: str = Form(...)):
     except Exception as e:
         logger.exception("apply_makeup failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def render_lipstick(img, session, lips_color, alpha):
+    """Base64 JPEG with the lips tinted, or None when no face is found."""
+    h, w = img.shape[:2]
+
+    # ---------------------------------------------------
+    # Detect facial landmarks (cached per image content,
+    # computed once per session)
+    # ---------------------------------------------------
+    if session is not None:
+        lm = session.memo("mesh_landmarks", lambda: get_mesh_landmarks(img))
+    else:
+        lm = get_mesh_landmarks(img)
+    if lm is None:
+        return None
+
+    # Lip pts from MediaPipe standard
+    pts = lm.region(OUTER_LIPS)
+
+    # ---------------------------------------------------
+    # Create lip mask
+    # ---------------------------------------------------
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(mask, [pts], 255)
+    mask = cv2.GaussianBlur(mask, (9, 9), 0)
+
+    # Normalize & apply intensity
+    mask_f = (mask.astype(np.float32) / 255.0) * np.float32(alpha)
+
+    # Lip overlay (convert RGB → BGR)
+    overlay = np.array(lips_color[::-1], np.float32)
+
+    # Final blending
+    with stage_timer("blend"):
+        img = (
+            overlay * mask_f[..., None]
+            + img * (1 - mask_f[..., None])
+        ).astype(np.uint8)
+
+    # ---------------------------------------------------
+    # Encode final output image
+    # ---------------------------------------------------
+    with stage_timer("encode"):
+        _, buf = cv2.imencode(".jpg", img)
+    final_b64 = base64.b64encode(buf).decode()
+
+    return final_b64
+
@@ -0,0 +1,228 @@
+# ============================================================
+# logging_config.py — NON-BLOCKING LOGGING
+# ============================================================
+# One setup for the whole backend (idempotent, called from main.py):
+#   * every logger propagates to a single QueueHandler on the root
+#     logger; a QueueListener thread does the file + console I/O, so
+#     a request never waits on disk or a slow terminal
+#   * handlers added elsewhere on the app loggers are removed, so
+#     each line is written once
+#   * records carry the request id (X-Request-ID or generated) and
+#     one structured "request" record is written per request
+#   * high-volume lines are sampled (should_log)
+#
+# Environment:
+#   AURA_LOG_FILE            aura_errors.log
+#   AURA_LOG_LEVEL           INFO
+#   AURA_LOG_FORMAT          text | json
+#   AURA_LOG_REQUEST_SAMPLE  fraction of request records kept (errors
+#                            and slow requests are always kept), 1.0
+#   AURA_LOG_SLOW_MS         1000
+#   AURA_LOG_SAMPLE          per-key rates, "face_shape_probs=0.01,..."
+# ============================================================
+
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOGFILE = os.environ.get("AURA_LOG_FILE", "aura_errors.log")
+LOG_LEVEL = os.environ.get("AURA_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("AURA_LOG_FORMAT", "text").lower()
+REQUEST_LOG_RATE = float(os.environ.get("AURA_LOG_REQUEST_SAMPLE", "1.0"))
+SLOW_REQUEST_MS = float(os.environ.get("AURA_LOG_SLOW_MS", "1000"))
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# Loggers the backend writes to (their own handlers are dropped)
+APP_LOGGERS = ("aura", "aura.access", "makeup-guide")
+
+
+def _parse_rates(spec):
+    rates = {}
+    for part in spec.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            rates[key.strip()] = float(value)
+    return rates
+
+
+SAMPLE_RATES = {"face_shape_probs": 0.01}
+SAMPLE_RATES.update(_parse_rates(os.environ.get("AURA_LOG_SAMPLE", "")))
+
+request_id_var = contextvars.ContextVar("aura_request_id", default="-")
+
+access_logger = logging.getLogger("aura.access")
+
+
+# ============================================================
+# SAMPLING
+# ============================================================
+def should_log(logger, level, key):
+    """
+    True if `logger` would emit at `level` and this call wins the
+    sampling draw for `key`. Check it before building expensive args.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    rate = SAMPLE_RATES.get(key, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+# ============================================================
+# FORMATTING
+# ============================================================
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+# ============================================================
+# SETUP
+# ============================================================
+_listener = None
+
+
+def setup_logging():
+    """Install the queue handler once per process; later calls are no-ops."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT)
+
+    file_handler = logging.FileHandler(LOGFILE, encoding="utf-8")
+    console_handler = logging.StreamHandler()
+    for h in (file_handler, console_handler):
+        h.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, console_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_listener)
+
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    for name in APP_LOGGERS:
+        lg = logging.getLogger(name)
+        for h in list(lg.handlers):
+            lg.removeHandler(h)
+        lg.setLevel(logging.NOTSET)
+        lg.propagate = True
+
+    return _listener
+
+
+def stop_listener():
+    """Flush the queue and stop the writer thread (also before os.fork())."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def start_listener():
+    """Restart the writer thread, e.g. in a forked worker (threads don't survive fork)."""
+    if _listener is None:
+        return setup_logging()
+    if _listener._thread is None:
+        _listener.start()
+    return _listener
+
+
+# ============================================================
+# PER-REQUEST RECORDS (ASGI MIDDLEWARE)
+# ============================================================
+_request_counter = itertools.count(1)
+
+
+class RequestLogMiddleware:
+    """
+    Sets the request id for every log line of the request, echoes it
+    as X-Request-ID and writes one structured "request" record
+    (sampled; 5xx and slow requests always).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._prefix = f"{os.getpid():x}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                rid = value.decode("latin-1")[:64]
+                break
+        if rid is None:
+            rid = f"{self._prefix}-{next(_request_counter):x}"
+        token = request_id_var.set(rid)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", rid.encode("latin-1"))
+                ]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            code = status[0]
+            keep = (code >= 500 or ms >= SLOW_REQUEST_MS
+                    or REQUEST_LOG_RATE >= 1.0 or random.random() < REQUEST_LOG_RATE)
+            if keep and access_logger.isEnabledFor(logging.INFO):
+                access_logger.info("request", extra={"fields": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": code,
+                    "ms": round(ms, 2),
+                }})
+            request_id_var.reset(token)
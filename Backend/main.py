@@ -9,29 +9,74 @@ Unified backend for:
 
 import datetime
 import logging
+import os
 from typing import Optional
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+
+# Queue-backed logging before anything below starts logging (the
+# runtime config logs the thread counts it applies)
+from logging_config import setup_logging, RequestLogMiddleware
+setup_logging()
+
+# Thread limits must be in place before torch / cv2 are imported below
+from runtime_config import apply_runtime_config, runtime_diagnostics
+apply_runtime_config()
 
 # ------------ Internal Models & Engines ------------ #
 from classification import router as classify_router
 from makeup_guide_api import router as makeup_guide_router
 from lipstick import router as lipstick_router
+from image_sessions import router as session_router, resolve_image
 
-from predict_tone_shape import SkinFaceClassifierAPI, load_image_bytes_to_bgr
-from recommendation_model import make_recommendation
+from predict_tone_shape import (
+    SkinFaceClassifierAPI,
+    load_image_bytes_to_bgr,
+    cascade_stats,
+    reset_model_version,
+)
+from recommendation_model import (
+    make_recommendation,
+    make_recommendations,
+    cache_key,
+    current_state,
+    lookup_entry,
+    reload_rules,
+    start_rules_watcher,
+)
+from recommendation_matrix import (
+    get_matrix,
+    reset_matrix,
+    encode_response,
+    etag_for,
+    validate_response,
+)
+from fast_json import FastJSONResponse
+from result_cache import LRUCache
+from result_store import get_store
+from model_registry import registry, ModelUnavailable
+import metrics
+import profiler
+import memory_diagnostics
 from models import (
     RecommendationRequest,
     RecommendationsResponse,
+    BatchRecommendationRequest,
+    BatchRecommendationsResponse,
 )
 
 
 # ============================================================
 # FASTAPI SETUP
 # ============================================================
-app = FastAPI(title="AURA AI Backend", version="3.0")
+app = FastAPI(
+    title="AURA AI Backend",
+    version="3.0",
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -40,45 +85,47 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(RequestLogMiddleware)
 
 # Routers for other modules
 app.include_router(makeup_guide_router, prefix="/api/makeup_guide", tags=["makeup_guide"])
 app.include_router(lipstick_router, prefix="/api/lipstick", tags=["lipstick"])
 app.include_router(classify_router, prefix="/api/face", tags=["classification"])
+app.include_router(session_router, prefix="/api/session", tags=["session"])
+
+# Models loaded at startup (comma-separated registry names, "" = all lazy)
+WARMUP_MODELS = [
+    n.strip()
+    for n in os.environ.get("AURA_WARMUP_MODELS", "face_mesh,face_shape,face_landmarker").split(",")
+    if n.strip()
+]
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Picks up edits to data/recommendation_rules.json (and the catalog file)
+    start_rules_watcher()
+    # kill -USR2 <pid> writes a profile of this worker to AURA_PROFILE_DIR
+    profiler.install_signal_handler()
+    # Load the models the first requests need now instead of on demand
+    if WARMUP_MODELS:
+        await run_in_threadpool(registry.warm_up, WARMUP_MODELS)
 
 
 # ============================================================
-# LOGGING CONFIG
+# LOGGING (see logging_config.py)
 # ============================================================
-LOGFILE = "aura_errors.log"
-logging.basicConfig(
-    filename=LOGFILE,
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("aura")
-logger.addHandler(logging.StreamHandler())  # also to console
 
 
 # ============================================================
-# CLASSIFIER SINGLETON
+# CLASSIFIER (shared with the routers via model_registry.py)
 # ============================================================
-_classifier: Optional[SkinFaceClassifierAPI] = None
-
-
-def get_classifier(force_reload=False) -> SkinFaceClassifierAPI:
-    global _classifier
-
-    if _classifier is not None and not force_reload:
-        return _classifier
-
+def get_classifier() -> SkinFaceClassifierAPI:
     try:
-        logger.info("Loading SkinFaceClassifierAPI…")
-        _classifier = SkinFaceClassifierAPI()
-        logger.info("Classifier loaded successfully.")
-        return _classifier
-    except Exception as e:
-        logger.exception("Failed to load classifier")
+        return registry.get("classifier")
+    except ModelUnavailable as e:
         raise HTTPException(500, f"Classifier initialization failed: {e}")
 
 
@@ -99,11 +146,100 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Per-stage / per-endpoint metrics of this worker (Prometheus text format)."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/diagnostics/runtime")
+async def diagnostics_runtime():
+    return runtime_diagnostics()
+
+
+@app.get("/api/diagnostics/memory")
+async def diagnostics_memory(top: int = 20, x_admin_token: Optional[str] = Header(None)):
+    """
+    RSS / USS, per-component memory and (when tracing) top allocators
+    since the snapshot. Walks the whole heap, so admin only (X-Admin-Token).
+    """
+    if not profiler.check_token(x_admin_token):
+        raise HTTPException(403, "Forbidden")
+    return await run_in_threadpool(memory_diagnostics.memory_report, top)
+
+
+@app.get("/api/diagnostics/models")
+async def diagnostics_models():
+    """Registered models: loaded or not, instances, load time, last error."""
+    return registry.status()
+
+
+@app.get("/api/diagnostics/result_store")
+async def diagnostics_result_store():
+    store = get_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **await run_in_threadpool(store.stats)}
+
+
+@app.get("/api/diagnostics/cascade")
+async def diagnostics_cascade():
+    return cascade_stats()
+
+
+# ============================================================
+# ADMIN — SAMPLING PROFILER
+# ============================================================
+@app.post("/api/admin/profile")
+async def admin_profile(
+    seconds: float = 10.0,
+    requests: int = 0,
+    interval_ms: float = profiler.DEFAULT_INTERVAL_MS,
+    include_idle: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Sample this worker for `seconds` (or until `requests` more requests
+    are served) and return collapsed stacks for flamegraph.pl / speedscope.
+    Requires AURA_ADMIN_TOKEN to be set and sent as X-Admin-Token.
+    """
+    if not profiler.check_token(x_admin_token):
+        raise HTTPException(403, "Forbidden")
+
+    try:
+        text, info = await run_in_threadpool(
+            profiler.sample, seconds, requests, interval_ms, include_idle
+        )
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(409, str(e))
+
+    headers = {f"X-Profile-{k.replace('_', '-').title()}": str(v) for k, v in info.items()}
+    return Response(content=text, media_type="text/plain", headers=headers)
+
+
+@app.post("/api/admin/memory/snapshot")
+async def admin_memory_snapshot(frames: int = 1, x_admin_token: Optional[str] = Header(None)):
+    """Start tracemalloc (if needed) and set the baseline for /api/diagnostics/memory."""
+    if not profiler.check_token(x_admin_token):
+        raise HTTPException(403, "Forbidden")
+    return memory_diagnostics.snapshot(frames)
+
+
+@app.post("/api/admin/memory/stop")
+async def admin_memory_stop(x_admin_token: Optional[str] = Header(None)):
+    if not profiler.check_token(x_admin_token):
+        raise HTTPException(403, "Forbidden")
+    return memory_diagnostics.stop_tracing()
+
+
 # ============================================================
 # CLASSIFICATION — SKIN TONE + FACE SHAPE
 # ============================================================
 @app.post("/api/classify")
-async def classify_api(file: UploadFile = File(...)):
+async def classify_api(
+    file: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
     """
     Returns Skin Tone + Face Shape:
     {
@@ -115,14 +251,14 @@ async def classify_api(file: UploadFile = File(...)):
     """
     clf = get_classifier()
 
-    img_bytes = await file.read()
-    img = load_image_bytes_to_bgr(img_bytes)
+    img, _ = await resolve_image(file, image_id, load_image_bytes_to_bgr)
 
     if img is None:
         raise HTTPException(400, "Invalid image")
 
     try:
-        result = clf.classify_image(img)
+        # Blocking inference (stage pool joins): off the event loop
+        result = await run_in_threadpool(clf.classify_image, img)
 
         # Format face shape title case
         if isinstance(result.get("face_shape"), dict):
@@ -130,7 +266,7 @@ async def classify_api(file: UploadFile = File(...)):
                 result["face_shape"]["shape"].capitalize()
             )
 
-        return JSONResponse(result)
+        return FastJSONResponse(result)
 
     except Exception as e:
         logger.exception("Error during classification")
@@ -141,17 +277,20 @@ async def classify_api(file: UploadFile = File(...)):
 # SKIN TONE ONLY (Legacy/Fallback)
 # ============================================================
 @app.post("/api/skin_tone")
-async def skin_tone_api(file: UploadFile = File(...)):
+async def skin_tone_api(
+    file: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
     clf = get_classifier()
 
-    img_bytes = await file.read()
-    img = load_image_bytes_to_bgr(img_bytes)
+    img, _ = await resolve_image(file, image_id, load_image_bytes_to_bgr)
 
     if img is None:
         raise HTTPException(400, "Invalid image")
 
     try:
-        result = clf.classify_image(img)
+        # Blocking inference (stage pool joins): off the event loop
+        result = await run_in_threadpool(clf.classify_image, img)
 
         if not result.get("success"):
             return {"skin_tone": "unknown", "error": result.get("error")}
@@ -171,22 +310,51 @@ async def skin_tone_api(file: UploadFile = File(...)):
 # ============================================================
 @app.post("/api/reload-models")
 async def reload_models():
-    global _classifier
-    _classifier = None
+    # Takes the registry init locks (waits out any lazy load in progress)
+    reloaded = await run_in_threadpool(registry.reload)
+    reset_matrix()
+    reset_model_version()
 
     try:
-        get_classifier(force_reload=True)
-        return {"success": True}
+        await run_in_threadpool(registry.get, "classifier")
+        return {"success": True, "reloaded": reloaded}
     except Exception as e:
         logger.exception("Reload failed")
         raise HTTPException(500, f"Reload error: {e}")
 
 
+@app.post("/api/reload-rules")
+async def reload_recommendation_rules():
+    """Reload recommendation rules / catalog now (the watcher does this on file change)."""
+    try:
+        # Recompiling the index is CPU work; keep it off the event loop
+        info = await run_in_threadpool(reload_rules)
+        reset_matrix()
+        return {"success": True, **info}
+    except Exception as e:
+        logger.exception("Rules reload failed")
+        raise HTTPException(500, f"Rules reload error: {e}")
+
+
 # ============================================================
 # MAKEUP + FASHION RECOMMENDATIONS
 # ============================================================
+# Deterministic responses: cache key -> (etag, JSON bytes)
+_recommendation_cache = LRUCache(maxsize=4096, name="recommendations")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
 @app.post("/api/makeup_recommendation", response_model=RecommendationsResponse)
-async def makeup_recommendation(req: RecommendationRequest):
+async def makeup_recommendation(
+    req: RecommendationRequest,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Returns:
     {
@@ -194,21 +362,89 @@ async def makeup_recommendation(req: RecommendationRequest):
         "fashion": {...},
         "summary": "..."
     }
+    Responses are deterministic per request (see `seed` / `variant`)
+    and carry an ETag; send it back as If-None-Match to get a 304.
     """
     try:
-        result = make_recommendation(req)
-
-        return RecommendationsResponse(
-            makeup=result["makeup"],
-            fashion=result["fashion"],
-            summary=result["summary"]
-        )
+        cached = None
+        # One rules snapshot for the whole request (a hot reload may swap it)
+        state = current_state()
+
+        # Precomputed default responses (no seed / variant override)
+        matrix = get_matrix()
+        if matrix is not None and req.seed is None and not req.variant:
+            cached = matrix.lookup(lookup_entry(req, state)[0])
+
+        key = cache_key(req, state) if cached is None else None
+        if cached is None and key is not None:
+            cached = _recommendation_cache.get(key)
+
+        if cached is None:
+            result = make_recommendation(req, state)
+            if key is None:
+                return FastJSONResponse(validate_response(result))
+
+            body = encode_response(result)
+            cached = (etag_for(body), body)
+            _recommendation_cache.set(key, cached)
+
+        etag, body = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
 
     except Exception as e:
         logger.exception("Recommendation engine failed")
         raise HTTPException(500, f"Recommendation error: {e}")
 
 
+MAX_BATCH_RECOMMENDATIONS = 32
+
+
+@app.post("/api/makeup_recommendation/batch", response_model=BatchRecommendationsResponse)
+async def makeup_recommendation_batch(req: BatchRecommendationRequest):
+    """
+    Several recommendations in one call. Body is either
+        {"requests": [RecommendationRequest, ...]}
+    or one profile across events:
+        {"profile": {face_shape, skin_tone, gender, body_type},
+         "events": ["casual", "formal", "party", "wedding"]}
+    Returns {"results": [...]} in request order.
+    """
+    if req.requests is not None and req.profile is None and req.events is None:
+        items = req.requests
+    elif req.requests is None and req.profile is not None and req.events:
+        p = req.profile
+        items = [
+            RecommendationRequest(
+                face_shape=p.face_shape,
+                skin_tone=p.skin_tone,
+                gender=p.gender,
+                event=event,
+                body_type=p.body_type,
+                variant=p.variant,
+            )
+            for event in req.events
+        ]
+    else:
+        raise HTTPException(422, "Provide either 'requests' or 'profile' with 'events'")
+
+    if len(items) > MAX_BATCH_RECOMMENDATIONS:
+        raise HTTPException(413, f"At most {MAX_BATCH_RECOMMENDATIONS} recommendations per batch")
+
+    try:
+        # Up to MAX_BATCH_RECOMMENDATIONS builds + validations: off the loop
+        results = await run_in_threadpool(
+            lambda: [validate_response(r) for r in make_recommendations(items)])
+
+        return FastJSONResponse({"results": results})
+
+    except Exception as e:
+        logger.exception("Batch recommendation failed")
+        raise HTTPException(500, f"Recommendation error: {e}")
+
+
 # ============================================================
 # SERVER STARTER
 # ============================================================
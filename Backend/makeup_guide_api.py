@@ -12,16 +12,27 @@
 
 import base64
 import logging
-from typing import Optional, List, Tuple
+import os
+from typing import Optional
 
 import cv2
 import numpy as np
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from mediapipe.tasks import python as mp_tasks
 from mediapipe.tasks.python import vision
 import mediapipe as mp
 
+from face_landmarks import (
+    FaceLandmarks, FACE_OVAL, OUTER_LIPS, LEFT_EYE_UPPER, RIGHT_EYE_UPPER,
+    LEFT_CHEEK, RIGHT_CHEEK, HIGHLIGHT,
+)
+from metrics import stage_timer
+from model_registry import registry
+from result_cache import make_cache, image_key
+from image_sessions import resolve_image
+
 # ============================================================
 # ROUTER & LOGGER
 # ============================================================
@@ -36,20 +47,18 @@ MAX_DIM = 1280
 MODEL_PATH = "models/face_landmarker.task"
 
 # ============================================================
-# GLOBAL FACE LANDMARKER (SAFE)
+# FACE LANDMARKER (owned by model_registry: "face_landmarker")
 # ============================================================
-try:
+def create_face_landmarker():
     base_options = mp_tasks.BaseOptions(model_asset_path=MODEL_PATH)
     options = vision.FaceLandmarkerOptions(
         base_options=base_options,
         num_faces=1,
         running_mode=vision.RunningMode.IMAGE,
     )
-    GLOBAL_LANDMARKER = vision.FaceLandmarker.create_from_options(options)
+    landmarker = vision.FaceLandmarker.create_from_options(options)
     logger.info("FaceLandmarker loaded successfully")
-except Exception as e:
-    GLOBAL_LANDMARKER = None
-    logger.exception("Failed to load FaceLandmarker: %s", e)
+    return landmarker
 
 # ============================================================
 # IMAGE HELPERS
@@ -60,21 +69,56 @@ def decode_image(data: bytes) -> np.ndarray:
     if len(data) > MAX_UPLOAD_BYTES:
         raise ValueError("Image too large")
 
-    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    with stage_timer("decode"):
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
     if img is None:
         raise ValueError("Invalid image")
 
+    return fit_max_dim(img)
+
+
+def fit_max_dim(img: np.ndarray) -> np.ndarray:
     if MAX_DIM:
         h, w = img.shape[:2]
         scale = max(h, w) / MAX_DIM
         if scale > 1:
-            img = cv2.resize(img, (int(w / scale), int(h / scale)))
-
+            with stage_timer("resize"):
+                img = cv2.resize(img, (int(w / scale), int(h / scale)))
     return img
 
 
+def _session_guide_image(session):
+    return session.memo("guide_image", lambda: fit_max_dim(session.image))
+
+
+def _image_and_landmarks(img, session):
+    if session is None:
+        return img, get_landmarks(img)
+    img = _session_guide_image(session)
+    return img, session.memo("guide_landmarks", lambda: get_landmarks(img))
+
+
+async def image_and_landmarks(image: Optional[UploadFile], image_id: Optional[str]):
+    """
+    Guide-sized image + landmarks from an upload, or from a session
+    handle (image_sessions.py) where both are computed once. The
+    landmark pass waits on the leased FaceLandmarker, so it runs in the
+    threadpool, not on the event loop.
+    """
+    img, session = await resolve_image(image, image_id, decode_image)
+    return await run_in_threadpool(_image_and_landmarks, img, session)
+
+
+async def guide_image(image: Optional[UploadFile], image_id: Optional[str]):
+    img, session = await resolve_image(image, image_id, decode_image)
+    if session is None:
+        return img
+    return await run_in_threadpool(_session_guide_image, session)
+
+
 def encode_jpg(img: np.ndarray) -> str:
-    ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+    with stage_timer("encode"):
+        ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
     if not ok:
         raise RuntimeError("JPG encode failed")
     return base64.b64encode(buf).decode("utf-8")
@@ -85,7 +129,8 @@ def encode_mask_png(mask: np.ndarray) -> str:
     rgba = np.zeros((h, w, 4), np.uint8)
     rgba[..., :3] = 255
     rgba[..., 3] = mask
-    ok, buf = cv2.imencode(".png", rgba)
+    with stage_timer("encode"):
+        ok, buf = cv2.imencode(".png", rgba)
     if not ok:
         raise RuntimeError("PNG encode failed")
     return base64.b64encode(buf).decode("utf-8")
@@ -93,37 +138,37 @@ def encode_mask_png(mask: np.ndarray) -> str:
 # ============================================================
 # LANDMARK EXTRACTION
 # ============================================================
-def get_landmarks(img: np.ndarray) -> Optional[List[Tuple[int, int]]]:
-    if GLOBAL_LANDMARKER is None:
+# (norm, w, h) per image content, () when no face was found
+LANDMARK_CACHE = make_cache("landmarks", int(os.environ.get("AURA_LANDMARK_CACHE_SIZE", "512")))
+
+def get_landmarks(img: np.ndarray) -> Optional[FaceLandmarks]:
+    if not registry.available("face_landmarker"):
         return None
 
+    key = image_key(img)
+    cached = LANDMARK_CACHE.get(key)
+    if cached is not None:
+        return FaceLandmarks(*cached) if cached else None
+
     rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
-    result = GLOBAL_LANDMARKER.detect(mp_image)
+    with stage_timer("landmarks"), registry.lease("face_landmarker") as landmarker:
+        result = landmarker.detect(mp_image)
 
     if not result.face_landmarks:
+        LANDMARK_CACHE.set(key, ())
         return None
 
     h, w = img.shape[:2]
-    return [(int(p.x * w), int(p.y * h)) for p in result.face_landmarks[0]]
+    lm = FaceLandmarks.from_mediapipe(result.face_landmarks[0], w, h)
+    LANDMARK_CACHE.set(key, (lm.norm, w, h))
+    return lm
 
 # ============================================================
 # LANDMARK INDICES
 # ============================================================
-FACE_OVAL = [
-    10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
-    397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150,
-    136, 172, 58, 132, 93, 234, 127,
-    162, 21, 54, 103, 67, 109
-]
-
-OUTER_LIPS = [
-    61,185,40,39,37,0,267,269,270,409,
-    291,308,415,310,311,312,13,82,81,
-    80,191,78,95,88,178,87,14,317,
-    402,318,324,308,291,375,321,405,
-    314,17,84,181,91,146,61
-]
+# Region index arrays (FACE_OVAL, OUTER_LIPS, eyes, cheeks) live in
+# face_landmarks.py; lm.region(idx) returns the (k, 2) pixel points.
 
 # ============================================================
 # MASK HELPERS
@@ -131,7 +176,7 @@ OUTER_LIPS = [
 def convex_mask(points, shape):
     mask = np.zeros(shape, np.uint8)
     if len(points) >= 3:
-        hull = cv2.convexHull(np.array(points, np.int32))
+        hull = cv2.convexHull(np.asarray(points, np.int32))
         cv2.fillConvexPoly(mask, hull, 255)
     return mask
 
@@ -145,7 +190,7 @@ def blur_mask(mask, k):
 # REGION MASKS
 # ============================================================
 def foundation_mask(lm, shape):
-    pts = [lm[i] for i in FACE_OVAL if i < len(lm)]
+    pts = lm.region(FACE_OVAL)
     base = convex_mask(pts, shape)
     kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (25, 25))
     expanded = cv2.dilate(base, kernel, iterations=1)
@@ -153,14 +198,14 @@ def foundation_mask(lm, shape):
 
 
 def blush_mask(lm, shape):
-    L = [lm[i] for i in [101,118,50,205] if i < len(lm)]
-    R = [lm[i] for i in [330,347,280,425] if i < len(lm)]
+    L = lm.region(LEFT_CHEEK)
+    R = lm.region(RIGHT_CHEEK)
     return blur_mask(cv2.bitwise_or(convex_mask(L, shape), convex_mask(R, shape)), 21)
 
 
 def eyeshadow_mask(lm, shape):
-    L = [lm[i] for i in [33,160,158,157,173,133] if i < len(lm)]
-    R = [lm[i] for i in [263,387,385,384,398,362] if i < len(lm)]
+    L = lm.region(LEFT_EYE_UPPER)
+    R = lm.region(RIGHT_EYE_UPPER)
     return blur_mask(cv2.bitwise_or(convex_mask(L, shape), convex_mask(R, shape)), 19)
 
 
@@ -174,30 +219,27 @@ def eyeliner_mask(lm, shape):
     """
     mask = np.zeros(shape, np.uint8)
 
-    LEFT_UPPER = [33, 160, 158, 157, 173, 133]
-    RIGHT_UPPER = [263, 387, 385, 384, 398, 362]
-
-    L = [lm[i] for i in LEFT_UPPER if i < len(lm)]
-    R = [lm[i] for i in RIGHT_UPPER if i < len(lm)]
+    L = lm.region(LEFT_EYE_UPPER)
+    R = lm.region(RIGHT_EYE_UPPER)
 
     if len(L) >= 2:
-        cv2.polylines(mask, [np.array(L, np.int32)], False, 255, 2, cv2.LINE_AA)
+        cv2.polylines(mask, [L], False, 255, 2, cv2.LINE_AA)
     if len(R) >= 2:
-        cv2.polylines(mask, [np.array(R, np.int32)], False, 255, 2, cv2.LINE_AA)
+        cv2.polylines(mask, [R], False, 255, 2, cv2.LINE_AA)
 
     return cv2.GaussianBlur(mask, (3, 3), 0)
 
 
 def lipstick_mask(lm, shape):
     mask = np.zeros(shape, np.uint8)
-    pts = [lm[i] for i in OUTER_LIPS if i < len(lm)]
+    pts = lm.region(OUTER_LIPS)
     if len(pts) >= 3:
-        cv2.fillPoly(mask, [np.array(pts, np.int32)], 255)
+        cv2.fillPoly(mask, [pts], 255)
     return blur_mask(mask, 9)
 
 
 def highlighter_mask(lm, shape):
-    pts = [lm[i] for i in [101,118,50,330,347,280,168,5] if i < len(lm)]
+    pts = lm.region(HIGHLIGHT)
     return blur_mask(convex_mask(pts, shape), 17)
 
 
@@ -241,10 +283,11 @@ OPACITY = {
 # BLENDING
 # ============================================================
 def blend(img, mask, color, opacity):
-    mask_f = (mask.astype(np.float32) / 255.0) * opacity
-    mask3 = np.dstack([mask_f] * 3)
-    out = img * (1 - mask3) + np.array(color) * mask3
-    return np.clip(out, 0, 255).astype(np.uint8)
+    with stage_timer("blend"):
+        mask_f = (mask.astype(np.float32) / 255.0) * opacity
+        mask3 = np.dstack([mask_f] * 3)
+        out = img * (1 - mask3) + np.array(color, np.float32) * mask3
+        return np.clip(out, 0, 255).astype(np.uint8)
 
 # ============================================================
 # FEEDBACK
@@ -269,31 +312,39 @@ def get_feedback(before, after):
 # ============================================================
 @router.get("/health")
 async def health():
-    return {"status": "OK", "face_landmarker": GLOBAL_LANDMARKER is not None}
+    return {"status": "OK", "face_landmarker": registry.available("face_landmarker")}
 
 
 @router.post("/analyze_face")
-async def analyze_face(image: UploadFile = File(...)):
-    img = decode_image(await image.read())
-    lm = get_landmarks(img)
-    if not lm:
+async def analyze_face(
+    image: Optional[UploadFile] = File(None),
+    image_id: Optional[str] = Form(None),
+):
+    img, lm = await image_and_landmarks(image, image_id)
+    if lm is None:
         raise HTTPException(400, "No face detected")
     return {"success": True, "landmarks": len(lm)}
 
 
 @router.post("/get_makeup_guide")
 async def get_makeup_guide(
-    image: UploadFile = File(...),
+    image: Optional[UploadFile] = File(None),
     makeupLooks: str = Form(...),
     lipstickColor: Optional[str] = Form(None),
     returnMaskPNG: bool = Form(True),
+    image_id: Optional[str] = Form(None),
 ):
-    img = decode_image(await image.read())
-    lm = get_landmarks(img)
-    if not lm:
+    img, lm = await image_and_landmarks(image, image_id)
+    if lm is None:
         raise HTTPException(400, "No face detected")
 
     looks = [l.strip().lower() for l in makeupLooks.split(",") if l.strip()]
+    guides = await run_in_threadpool(render_guides, img, lm, looks, lipstickColor, returnMaskPNG)
+    return {"success": True, "guides": guides}
+
+
+def render_guides(img, lm, looks, lipstickColor, returnMaskPNG):
+    """Masks, blends and encodings of every look (CPU-bound; threadpool)."""
     h, w = img.shape[:2]
     guides = []
 
@@ -322,17 +373,22 @@ async def get_makeup_guide(
 
         guides.append(item)
 
-    return {"success": True, "guides": guides}
+    return guides
 
 
 @router.post("/compare_makeup")
 async def compare_makeup(
-    originalImage: UploadFile = File(...),
-    afterImage: UploadFile = File(...),
+    originalImage: Optional[UploadFile] = File(None),
+    afterImage: Optional[UploadFile] = File(None),
+    originalImageId: Optional[str] = Form(None),
+    afterImageId: Optional[str] = Form(None),
 ):
-    before = decode_image(await originalImage.read())
-    after = decode_image(await afterImage.read())
+    before = await guide_image(originalImage, originalImageId)
+    after = await guide_image(afterImage, afterImageId)
+    return await run_in_threadpool(render_comparison, before, after)
+
 
+def render_comparison(before, after):
     if before.shape != after.shape:
         after = cv2.resize(after, (before.shape[1], before.shape[0]))
 
@@ -0,0 +1,221 @@
+# ============================================================
+# memory_diagnostics.py — MEMORY ACCOUNTING / LEAK HUNTING
+# ============================================================
+# GET /api/diagnostics/memory (admin token: it walks the whole heap)
+# reports, for the worker that answers:
+#   process     current / peak RSS, USS (psutil or smaps_rollup)
+#   components  model weights (torch params + buffers), which native
+#               models are loaded, classifier instances, cache entries
+#               and approximate bytes, thread / pool counts, gc counts
+#   tracemalloc top allocators since the last snapshot, once tracing
+#               has been started with POST /api/admin/memory/snapshot
+#
+# Native memory (MediaPipe graphs, dlib, YOLO, STONE, OpenCV) is not
+# visible to tracemalloc; compare the RSS numbers with the Python-side
+# totals to tell the two apart. Modules are looked up in sys.modules
+# so this file never loads a model itself.
+# ============================================================
+
+import gc
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024.0 * 1024.0
+
+
+# ============================================================
+# PROCESS
+# ============================================================
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        pass
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r if sys.platform == "darwin" else r * 1024
+
+
+def smaps_rollup(pid="self"):
+    """RSS / PSS / USS bytes of any process from /proc (None if unreadable)."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                parts = rest.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[key] = int(parts[0]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def uss_bytes():
+    """Memory unique to this process (not shared with forked siblings)."""
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process().memory_full_info().uss
+        except Exception:
+            pass
+    rollup = smaps_rollup()
+    return rollup["uss"] if rollup else None
+
+
+def process_memory():
+    uss = uss_bytes()
+    rollup = smaps_rollup()
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(current_rss_bytes() / MB, 1),
+        "peak_rss_mb": round(peak_rss_bytes() / MB, 1),
+        "uss_mb": round(uss / MB, 1) if uss is not None else None,
+        # PSS splits pages shared with forked siblings (serve.py) evenly
+        "pss_mb": round(rollup["pss"] / MB, 1) if rollup else None,
+    }
+
+
+# ============================================================
+# COMPONENTS
+# ============================================================
+def torch_module_bytes(module):
+    if module is None:
+        return 0
+    total = 0
+    for t in list(module.parameters()) + list(module.buffers()):
+        total += t.numel() * t.element_size()
+    return total
+
+
+def _models():
+    out = {}
+    reg = sys.modules.get("model_registry")
+    if reg is not None:
+        registry = reg.registry
+        out["face_shape_efficientnet_mb"] = round(torch_module_bytes(registry.loaded("face_shape")) / MB, 1)
+        out["skin_tone_cnn_mb"] = round(torch_module_bytes(registry.loaded("skin_tone_cnn")) / MB, 1)
+        out["instances"] = {name: s["instances"] for name, s in registry.status().items()}
+    pts = sys.modules.get("predict_tone_shape")
+    if pts is not None:
+        out["classifier_instances"] = len(pts.classifier_instances())
+    return out
+
+
+def _caches():
+    from result_cache import all_caches
+    return {
+        c.name: {"entries": len(c), "maxsize": c.maxsize,
+                 "approx_mb": round(c.approx_bytes() / MB, 2)}
+        for c in all_caches()
+    }
+
+
+def _pools():
+    out = {"threads": threading.active_count()}
+    pts = sys.modules.get("predict_tone_shape")
+    if pts is not None and pts._stage_pool is not None:
+        out["stage_pool_threads"] = len(pts._stage_pool._threads)
+    return out
+
+
+def _sessions():
+    mod = sys.modules.get("image_sessions")
+    if mod is None:
+        return None
+    s = mod.SESSIONS.stats()
+    return {"sessions": s["sessions"], "approx_mb": round(s["bytes"] / MB, 1),
+            "max_mb": round(s["max_bytes"] / MB, 1)}
+
+
+def component_report():
+    return {
+        "models": _models(),
+        "caches": _caches(),
+        "image_sessions": _sessions(),
+        "pools": _pools(),
+        "gc": {"counts": gc.get_count(), "tracked_objects": len(gc.get_objects()),
+               "frozen": gc.get_freeze_count() if hasattr(gc, "get_freeze_count") else None},
+    }
+
+
+# ============================================================
+# TRACEMALLOC
+# ============================================================
+_baseline = None
+_lock = threading.Lock()
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def snapshot(frames=1):
+    """Start tracing if needed and make the current heap the baseline."""
+    global _baseline
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _baseline = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "traced_mb": round(traced / MB, 2), "peak_mb": round(peak / MB, 2)}
+
+
+def stop_tracing():
+    global _baseline
+    with _lock:
+        _baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return {"tracing": False}
+
+
+def top_allocators(top=20):
+    """Largest growth by source line since the last snapshot()."""
+    with _lock:
+        if not tracemalloc.is_tracing() or _baseline is None:
+            return {"tracing": False}
+        current = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        stats = current.compare_to(_baseline, "lineno")
+        traced, peak = tracemalloc.get_traced_memory()
+
+    rows = []
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        rows.append({
+            "where": f"{frame.filename}:{frame.lineno}",
+            "size_diff_kb": round(stat.size_diff / 1024.0, 1),
+            "count_diff": stat.count_diff,
+            "size_kb": round(stat.size / 1024.0, 1),
+        })
+    return {"tracing": True, "traced_mb": round(traced / MB, 2),
+            "peak_mb": round(peak / MB, 2), "top": rows}
+
+
+def memory_report(top=20):
+    return {
+        "process": process_memory(),
+        "components": component_report(),
+        "tracemalloc": top_allocators(top),
+    }
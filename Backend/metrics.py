@@ -0,0 +1,298 @@
+# ============================================================
+# metrics.py — PROMETHEUS METRICS (NO EXTRA DEPENDENCY)
+# ============================================================
+# Served as Prometheus text format on GET /metrics:
+#   aura_stage_seconds{stage}               pipeline stage histograms
+#       decode, resize, landmarks, face_shape, skin_tone, blend, encode
+#   aura_request_seconds{endpoint,method}   request latency histograms
+#   aura_requests_total{endpoint,method,status}
+#   aura_request_errors_total{endpoint,method}   5xx + unhandled
+#   aura_requests_in_flight                 requests being served
+#   aura_stage_queue_depth                  jobs waiting for the stage pool
+#   aura_cache_*{cache}                     LRUCache hits / misses / size
+#
+# Hot path cost is one perf_counter pair, a bisect and a short lock
+# per observation. Values are per worker process (Prometheus sums
+# them across scrape targets).
+# ============================================================
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; covers a cached recommendation (~0.1 ms) up to a cold
+# EfficientNet forward on CPU.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in sorted(items):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_fmt(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for labels, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = _labels(self.labelnames + ("le",), labels + (_fmt(bound),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lbl = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{lbl} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{lbl} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time: fn() returns a number or {label values: number}."""
+    def __init__(self, name, help, fn, labelnames=()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                if not isinstance(labels, tuple):
+                    labels = (labels,)
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_fmt(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_fmt(value)}")
+        return lines
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def register(metric):
+    with _registry_lock:
+        if all(m.name != metric.name for m in _registry):
+            _registry.append(metric)
+    return metric
+
+
+def register_gauge(name, help, fn, labelnames=()):
+    return register(Gauge(name, help, fn, labelnames))
+
+
+def render():
+    """Prometheus text exposition of every registered metric."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for m in metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = register(Histogram(
+    "aura_stage_seconds", "Time spent per pipeline stage", ("stage",)))
+REQUEST_SECONDS = register(Histogram(
+    "aura_request_seconds", "Request latency", ("endpoint", "method")))
+REQUESTS_TOTAL = register(Counter(
+    "aura_requests_total", "Requests served", ("endpoint", "method", "status")))
+ERRORS_TOTAL = register(Counter(
+    "aura_request_errors_total", "Requests that failed with 5xx or an exception",
+    ("endpoint", "method")))
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+register_gauge("aura_requests_in_flight", "Requests currently being served",
+               lambda: _in_flight)
+
+
+def total_requests():
+    return REQUESTS_TOTAL.total()
+
+
+# ============================================================
+# STAGE TIMING
+# ============================================================
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage)
+
+
+@contextmanager
+def stage_timer(stage):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage)
+
+
+def timed_stage(stage, fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage)
+
+
+# ============================================================
+# CACHES
+# ============================================================
+def _cache_stats():
+    from result_cache import all_caches
+    return [c.stats() for c in all_caches()]
+
+
+register_gauge("aura_cache_hits", "Cache hits since start",
+               lambda: {s["name"]: s["hits"] for s in _cache_stats()}, ("cache",))
+register_gauge("aura_cache_misses", "Cache misses since start",
+               lambda: {s["name"]: s["misses"] for s in _cache_stats()}, ("cache",))
+register_gauge("aura_cache_hit_ratio", "Cache hit ratio since start",
+               lambda: {s["name"]: s["hit_rate"] for s in _cache_stats()}, ("cache",))
+register_gauge("aura_cache_entries", "Entries currently cached",
+               lambda: {s["name"]: s["size"] for s in _cache_stats()}, ("cache",))
+
+
+# ============================================================
+# ASGI MIDDLEWARE
+# ============================================================
+def endpoint_label(scope):
+    """
+    Full request path with the matched path parameters put back as
+    {name} (/api/session/{image_id}, not every session token), or
+    "<unmatched>" when no route matched. Built from the path rather
+    than route.path, which is relative to the router in some FastAPI
+    versions (/health of /api/makeup_guide would merge with main's).
+    """
+    if scope.get("route") is None and scope.get("endpoint") is None:
+        return "<unmatched>"
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        value = str(value)
+        if not value:
+            continue
+        if "/" in value:
+            head, sep, tail = path.rpartition(value)
+            if sep:
+                path = head + "{%s}" % name + tail
+            continue
+        segments = path.split("/")
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] == value:
+                segments[i] = "{%s}" % name
+                break
+        path = "/".join(segments)
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Per-endpoint latency, status counts, errors and in-flight requests.
+    Endpoints are route templates (endpoint_label); requests no route
+    matched are folded into one "<unmatched>" label so scans can't blow
+    up cardinality.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        with _in_flight_lock:
+            _in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status[0] = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with _in_flight_lock:
+                _in_flight -= 1
+            code = status[0]
+            # The router fills in route / path_params on a match
+            endpoint = endpoint_label(scope)
+            method = scope["method"]
+            REQUEST_SECONDS.observe(elapsed, endpoint, method)
+            REQUESTS_TOTAL.inc(endpoint, method, str(code))
+            if code >= 500:
+                ERRORS_TOTAL.inc(endpoint, method)
@@ -0,0 +1,288 @@
+# ============================================================
+# model_registry.py — ONE INSTANCE OF EVERY MODEL PER PROCESS
+# ============================================================
+# Every model the backend uses is registered here by name with a
+# factory; routers ask the registry instead of building their own.
+#
+#   registry.get(name)           shared instance (thread-safe models:
+#                                torch in eval mode, STONE module)
+#   with registry.lease(name)    exclusive use of one pooled instance
+#                                (MediaPipe graphs are not thread-safe)
+#   registry.get_optional(name)  None instead of ModelUnavailable
+#   registry.warm_up(names)      load (+ optional dummy inference)
+#   registry.reload(names)       drop instances; next use rebuilds
+#   registry.status()            what is loaded, load time, errors
+#
+# Loading is lazy and double-checked per model, so concurrent first
+# requests build one instance. A failed load is remembered (no retry
+# on every request) until reload().
+#
+# Pool sizes: AURA_POOL_<NAME>=n (e.g. AURA_POOL_FACE_MESH=2).
+# Startup warm-up list: AURA_WARMUP_MODELS (see main.py).
+# ============================================================
+
+import importlib
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("aura")
+
+
+class ModelUnavailable(RuntimeError):
+    pass
+
+
+def _close(name, inst):
+    close = getattr(inst, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            logger.exception("Closing '%s' failed", name)
+
+
+class _Pool:
+    """The leasable instances of one load; retired by reload()."""
+
+    def __init__(self, insts):
+        self.idle = queue.Queue()
+        for inst in insts:
+            self.idle.put(inst)
+        self.retired = False
+        self.lock = threading.Lock()
+
+    def give_back(self, name, inst):
+        # Leased across a reload: close it now that nothing uses it
+        with self.lock:
+            if not self.retired:
+                self.idle.put(inst)
+                return
+        _close(name, inst)
+
+    def retire(self):
+        """Mark retired; returns the idle instances (safe to close)."""
+        with self.lock:
+            self.retired = True
+            idle = []
+            while True:
+                try:
+                    idle.append(self.idle.get_nowait())
+                except queue.Empty:
+                    return idle
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._specs = {}
+        self._instances = {}     # name -> [instance, ...]
+        self._pools = {}         # name -> _Pool of the same instances
+        self._errors = {}
+        self._load_ms = {}
+        self._init_locks = {}
+        self._lock = threading.Lock()
+
+    # -------------------- registration --------------------
+    def register(self, name, factory, warmup=None, pool_size=1, description=""):
+        env = os.environ.get(f"AURA_POOL_{name.upper()}")
+        self._specs[name] = {
+            "factory": factory,
+            "warmup": warmup,
+            "pool_size": max(1, int(env)) if env else pool_size,
+            "description": description,
+        }
+        self._init_locks[name] = threading.Lock()
+
+    def names(self):
+        return list(self._specs)
+
+    # -------------------- access --------------------
+    def _load(self, name):
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown model '{name}'")
+
+        with self._init_locks[name]:
+            insts = self._instances.get(name)
+            if insts is not None:
+                return insts
+            if name in self._errors:
+                raise ModelUnavailable(f"{name}: {self._errors[name]}")
+
+            t0 = time.perf_counter()
+            try:
+                insts = [spec["factory"]() for _ in range(spec["pool_size"])]
+            except Exception as e:
+                self._errors[name] = e
+                if isinstance(e, (ImportError, FileNotFoundError)):
+                    logger.warning("⚠️ Model '%s' unavailable: %s", name, e)
+                else:
+                    logger.exception("Failed to load model '%s'", name)
+                raise ModelUnavailable(f"{name}: {e}") from e
+
+            self._pools[name] = _Pool(insts)
+            self._instances[name] = insts
+            self._load_ms[name] = (time.perf_counter() - t0) * 1000.0
+            logger.info("✔ Model '%s' loaded (%d instance(s), %.0f ms)",
+                        name, len(insts), self._load_ms[name])
+            return insts
+
+    def get(self, name):
+        insts = self._instances.get(name)
+        if insts is None:
+            insts = self._load(name)
+        return insts[0]
+
+    def get_optional(self, name):
+        try:
+            return self.get(name)
+        except ModelUnavailable:
+            return None
+
+    def available(self, name):
+        return self.get_optional(name) is not None
+
+    @contextmanager
+    def lease(self, name):
+        """Borrow one instance exclusively; blocks while the pool is empty."""
+        while True:
+            pool = self._pools.get(name)
+            if pool is None:
+                self._load(name)
+                continue
+            try:
+                inst = pool.idle.get(timeout=0.5)
+                break
+            except queue.Empty:
+                # Still busy, or retired by reload() while waiting
+                continue
+        try:
+            yield inst
+        finally:
+            pool.give_back(name, inst)
+
+    # -------------------- lifecycle --------------------
+    def warm_up(self, names=None, inference=True):
+        """
+        Load the given models (all registered if None) and run their
+        warm-up; inference=False only loads (serve.py, before fork).
+        """
+        out = {}
+        for name in names if names is not None else self.names():
+            t0 = time.perf_counter()
+            inst = self.get_optional(name)
+            warmup = self._specs[name]["warmup"]
+            if inst is not None and warmup is not None and inference:
+                try:
+                    warmup(inst)
+                except Exception:
+                    logger.exception("Warm-up of '%s' failed", name)
+            out[name] = {"loaded": inst is not None,
+                         "ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+        return out
+
+    def reload(self, names=None):
+        """
+        Forget instances (and remembered failures); the next use rebuilds.
+        Idle pooled instances are closed now, leased ones when returned.
+        """
+        names = list(names) if names is not None else self.names()
+        for name in names:
+            with self._init_locks[name]:
+                self._instances.pop(name, None)
+                pool = self._pools.pop(name, None)
+                idle = pool.retire() if pool is not None else []
+                self._errors.pop(name, None)
+                self._load_ms.pop(name, None)
+            for inst in idle:
+                _close(name, inst)
+        return names
+
+    def status(self):
+        out = {}
+        for name, spec in self._specs.items():
+            err = self._errors.get(name)
+            out[name] = {
+                "loaded": name in self._instances,
+                "instances": len(self._instances.get(name, ())),
+                "pool_size": spec["pool_size"],
+                "load_ms": round(self._load_ms[name], 1) if name in self._load_ms else None,
+                "error": str(err) if err else None,
+                "description": spec["description"],
+            }
+        return out
+
+    def loaded(self, name):
+        insts = self._instances.get(name)
+        return insts[0] if insts else None
+
+
+registry = ModelRegistry()
+
+
+# ============================================================
+# FACTORIES (imports are lazy so importing the registry is cheap)
+# ============================================================
+def _face_shape():
+    import predict_tone_shape
+    return predict_tone_shape.load_face_shape_model()
+
+
+def _face_shape_warmup(model):
+    import predict_tone_shape
+    predict_tone_shape.warm_up_face_shape_model(model)
+
+
+def _face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True, max_num_faces=1, refine_landmarks=True
+    )
+
+
+def _face_landmarker():
+    import makeup_guide_api
+    return makeup_guide_api.create_face_landmarker()
+
+
+def _classifier():
+    import predict_tone_shape
+    return predict_tone_shape.SkinFaceClassifierAPI()
+
+
+def _stone():
+    return importlib.import_module("stone")
+
+
+def _skin_tone_cnn():
+    import skin_tone_cnn
+    return skin_tone_cnn.build_model()
+
+
+def _yolo_face():
+    from ultralytics import YOLO
+    model = YOLO("yolov8n-face-lindevs.pt")
+    model.conf = 0.5
+    return model
+
+
+def _dlib_predictor():
+    import dlib
+    return dlib.shape_predictor("models/shape_predictor_68_face_landmarks.dat")
+
+
+registry.register("face_shape", _face_shape, warmup=_face_shape_warmup,
+                  description="EfficientNet face shape classifier (torch)")
+registry.register("face_mesh", _face_mesh,
+                  description="MediaPipe FaceMesh (classify, lipstick)")
+registry.register("face_landmarker", _face_landmarker,
+                  description="MediaPipe Tasks FaceLandmarker (makeup guide)")
+registry.register("classifier", _classifier,
+                  description="SkinFaceClassifierAPI pipeline")
+registry.register("stone", _stone, description="STONE skin tone library")
+registry.register("skin_tone_cnn", _skin_tone_cnn, description="ResNetHSV skin tone CNN (torch)")
+registry.register("yolo_face", _yolo_face, description="YOLOv8 face detector (face_detection)")
+registry.register("dlib_predictor", _dlib_predictor, description="dlib 68-point landmark predictor")
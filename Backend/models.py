@@ -62,6 +62,8 @@ class RecommendationRequest(BaseModel):
     gender: str
     event: str
     body_type: str
+    seed: Optional[int] = None       # explicit seed for the random picks
+    variant: Optional[int] = None    # alternative looks for the same profile
 
 
 class RecommendationsResponse(BaseModel):
@@ -70,6 +72,25 @@ class RecommendationsResponse(BaseModel):
     summary: str
 
 
+class RecommendationProfile(BaseModel):
+    face_shape: str
+    skin_tone: str
+    gender: str
+    body_type: str
+    variant: Optional[int] = None
+
+
+class BatchRecommendationRequest(BaseModel):
+    # Either a list of full requests, or one profile + several events
+    requests: Optional[List[RecommendationRequest]] = None
+    profile: Optional[RecommendationProfile] = None
+    events: Optional[List[str]] = None
+
+
+class BatchRecommendationsResponse(BaseModel):
+    results: List[RecommendationsResponse]
+
+
 # ============================================================
 # LOOK FEEDBACK (GAN + CNN evaluation)
 # ============================================================
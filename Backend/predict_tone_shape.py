@@ -4,23 +4,35 @@
 
 import os
 import io
+import copy
 import cv2
 import json
+import time
 import torch
-import hashlib
+import random
+import threading
+import weakref
 import tempfile
 import traceback
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image, ImageOps
 import mediapipe as mp
 
+from face_landmarks import FaceLandmarks
+import metrics
+from result_cache import make_cache, image_key
+from result_store import get_store, file_digest
+from model_registry import registry
+from logging_config import should_log
+
 # ============================================================
 # LOGGING
 # ============================================================
+# Handlers / level are set once in logging_config.setup_logging()
 logger = logging.getLogger("aura")
-logger.setLevel(logging.INFO)
-logger.addHandler(logging.StreamHandler())
 
 # ============================================================
 # DEVICE
@@ -38,18 +50,25 @@ FACE_LABELS = ["Diamond", "Heart", "Oval", "Round", "Square"]
 # 🔥 UPDATED THRESHOLD (was 0.45)
 CONFIDENCE_THRESHOLD = 0.35
 
+# Input resolution for the face shape CNN. 380 is the EfficientNet-B4
+# training size; smaller values trade accuracy for latency.
+# Pick the operating point with bench_face_shape_resolution.py.
+FACE_SHAPE_INPUT_SIZE = int(os.environ.get("AURA_FACE_SHAPE_SIZE", "380"))
+
 # ============================================================
 # LOAD FACE SHAPE MODEL
 # ============================================================
-_face_model = None
-_transform = None
+# Owned by model_registry ("face_shape"): one instance per process.
 
-def init_face_shape_model():
-    global _face_model, _transform
-
-    if _face_model is not None:
-        return
+# ImageNet statistics (RGB order). ToTensor's 1/255 and Normalize are
+# folded into a single per-channel scale + bias.
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+_NORM_SCALE = 1.0 / (255.0 * IMAGENET_STD)
+_NORM_BIAS = -IMAGENET_MEAN / IMAGENET_STD
 
+def load_face_shape_model():
+    """Registry factory; use registry.get("face_shape") / init_face_shape_model()."""
     logger.info("Loading face shape model...")
 
     model = torch.load(FACE_SHAPE_MODEL_PATH, map_location=DEVICE)
@@ -59,27 +78,84 @@ def init_face_shape_model():
     if out_features != len(FACE_LABELS):
         raise RuntimeError("Face shape class count mismatch")
 
-    _face_model = model
+    logger.info("✔ Face shape model loaded successfully (input %dpx)",
+                FACE_SHAPE_INPUT_SIZE)
+    return model
+
+def warm_up_face_shape_model(model):
+    """One dummy forward so the first request doesn't pay for lazy init."""
+    size = FACE_SHAPE_INPUT_SIZE
+    with torch.no_grad():
+        model(torch.zeros((1, 3, size, size), dtype=torch.float32, device=DEVICE))
+
+def init_face_shape_model():
+    return registry.get("face_shape")
 
+def build_face_transform(size):
+    """Reference torchvision pipeline (PIL input) the model was trained with."""
     import torchvision.transforms as transforms
-    _transform = transforms.Compose([
-        transforms.Resize((380, 380)),
+    return transforms.Compose([
+        transforms.Resize((size, size)),
         transforms.ToTensor(),
         transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225],
+            mean=IMAGENET_MEAN.tolist(),
+            std=IMAGENET_STD.tolist(),
         ),
     ])
 
-    logger.info("✔ Face shape model loaded successfully")
+def set_face_shape_input_size(size):
+    """Change the CNN input resolution at runtime."""
+    global FACE_SHAPE_INPUT_SIZE
+
+    size = int(size)
+    if size < 32:
+        raise ValueError("Face shape input size must be >= 32")
+
+    FACE_SHAPE_INPUT_SIZE = size
+    # The size is part of the classify cache / result store key
+    reset_model_version()
+    CLASSIFY_CACHE.clear()
+
+def preprocess_face_crop(crop_bgr, out=None, size=None):
+    """
+    BGR uint8 crop -> normalized RGB CHW float32, without PIL.
+
+    One cv2 resize (INTER_AREA when shrinking, which approximates the
+    antialiased PIL resize) then a fused BGR->RGB swap + normalize
+    written straight into `out` (shape (3, size, size), float32).
+    """
+    size = size or FACE_SHAPE_INPUT_SIZE
+    h, w = crop_bgr.shape[:2]
+    interp = cv2.INTER_AREA if (h > size or w > size) else cv2.INTER_LINEAR
+    resized = cv2.resize(crop_bgr, (size, size), interpolation=interp)
+
+    if out is None:
+        out = np.empty((3, size, size), dtype=np.float32)
+
+    # RGB channel c reads BGR channel 2 - c: swap and normalize in one pass
+    for c in range(3):
+        np.multiply(resized[:, :, 2 - c], _NORM_SCALE[c], out=out[c], dtype=np.float32)
+        out[c] += _NORM_BIAS[c]
+
+    return out
+
+def preprocess_face_batch(crops_bgr, size=None):
+    """Fill one preallocated (N, 3, size, size) tensor from a list of crops."""
+    size = size or FACE_SHAPE_INPUT_SIZE
+    batch = torch.empty((len(crops_bgr), 3, size, size), dtype=torch.float32)
+    buf = batch.numpy()
+    for i, crop in enumerate(crops_bgr):
+        preprocess_face_crop(crop, out=buf[i], size=size)
+    return batch
 
 # ============================================================
 # IMAGE UTILITIES
 # ============================================================
 def load_image_bytes_to_bgr(img_bytes: bytes):
-    pil = Image.open(io.BytesIO(img_bytes))
-    pil = ImageOps.exif_transpose(pil).convert("RGB")
-    return cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
+    with metrics.stage_timer("decode"):
+        pil = Image.open(io.BytesIO(img_bytes))
+        pil = ImageOps.exif_transpose(pil).convert("RGB")
+        return cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2BGR)
 
 def resize_for_mediapipe(img, max_dim=1024):
     h, w = img.shape[:2]
@@ -94,13 +170,10 @@ def resize_for_mediapipe(img, max_dim=1024):
 mp_face_mesh = mp.solutions.face_mesh
 FaceMesh = mp_face_mesh.FaceMesh
 
-def crop_face_from_landmarks(bgr, lm):
+def crop_face_from_landmarks(bgr, face):
+    """face: FaceLandmarks for bgr (same width / height)."""
     h, w = bgr.shape[:2]
-    xs = [int(p.x * w) for p in lm.landmark]
-    ys = [int(p.y * h) for p in lm.landmark]
-
-    xmin, xmax = min(xs), max(xs)
-    ymin, ymax = min(ys), max(ys)
+    xmin, ymin, xmax, ymax = face.bbox()
 
     size = int(max(xmax - xmin, ymax - ymin) * 0.6)
     cx, cy = (xmin + xmax) // 2, (ymin + ymax) // 2
@@ -114,22 +187,30 @@ def crop_face_from_landmarks(bgr, lm):
 # ============================================================
 # FACE SHAPE CLASSIFICATION
 # ============================================================
+def face_shape_probs_batch(crops_bgr):
+    """Softmax probabilities over FACE_LABELS, one row per BGR crop."""
+    model = registry.get("face_shape")
+
+    batch = preprocess_face_batch(crops_bgr).to(DEVICE)
+
+    with torch.no_grad():
+        logits = model(batch)
+        return torch.softmax(logits, dim=1).cpu().numpy()
+
+def face_shape_probs(crop_bgr):
+    """Softmax probabilities over FACE_LABELS for a single BGR crop."""
+    return face_shape_probs_batch([crop_bgr])[0]
+
 def classify_face_shape(crop_bgr):
     if crop_bgr is None:
         return {"shape": "Unknown", "confidence": 0.0}
 
-    init_face_shape_model()
-
-    rgb = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2RGB)
-    pil = Image.fromarray(rgb)
-    img_t = _transform(pil).unsqueeze(0).to(DEVICE)
+    probs = face_shape_probs(crop_bgr)
 
-    with torch.no_grad():
-        logits = _face_model(img_t)
-        probs = torch.softmax(logits, dim=1)[0].cpu().numpy()
-
-    logger.info("Face shape probs: %s",
-                dict(zip(FACE_LABELS, probs.round(3))))
+    # Sampled (AURA_LOG_SAMPLE=face_shape_probs=<rate>, default 1%)
+    if should_log(logger, logging.DEBUG, "face_shape_probs"):
+        logger.debug("Face shape probs: %s",
+                     dict(zip(FACE_LABELS, probs.round(3))))
 
     idx = int(np.argmax(probs))
     conf = float(probs[idx])
@@ -142,16 +223,129 @@ def classify_face_shape(crop_bgr):
         "confidence": conf
     }
 
+# ============================================================
+# FACE SHAPE CASCADE (GEOMETRY FIRST, CNN WHEN AMBIGUOUS)
+# ============================================================
+# Ratio features over the FaceMesh landmarks already computed for the
+# crop (same idea as face_detection.classify_face_shape on dlib points)
+# are matched against one prototype per class. When the best class
+# wins by CASCADE_MARGIN the CNN forward is skipped; otherwise it
+# falls through to EfficientNet. A sample of confident requests
+# (CASCADE_AUDIT_RATE) still runs the CNN so the agreement rate of the
+# short-circuited population stays measurable.
+#
+# Off by default (AURA_FACE_SHAPE_CASCADE=1 to enable); calibrate
+# GEOMETRIC_PROTOTYPES / the margin against cascade_stats() first.
+CASCADE_ENABLED = os.environ.get("AURA_FACE_SHAPE_CASCADE", "0") == "1"
+CASCADE_MARGIN = float(os.environ.get("AURA_CASCADE_MARGIN", "0.25"))
+CASCADE_AUDIT_RATE = float(os.environ.get("AURA_CASCADE_AUDIT_RATE", "0.05"))
+CASCADE_TEMPERATURE = 0.01
+
+# FaceMesh indices
+LM_FOREHEAD_TOP, LM_CHIN = 10, 152
+LM_CHEEK_L, LM_CHEEK_R = 234, 454
+LM_JAW_L, LM_JAW_R = 172, 397
+LM_TEMPLE_L, LM_TEMPLE_R = 54, 284
+
+# measured pairs: cheek width, face length, jaw width, forehead width
+_RATIO_A = np.array([LM_CHEEK_L, LM_FOREHEAD_TOP, LM_JAW_L, LM_TEMPLE_L], dtype=np.intp)
+_RATIO_B = np.array([LM_CHEEK_R, LM_CHIN, LM_JAW_R, LM_TEMPLE_R], dtype=np.intp)
+
+# (length / cheek width, jaw / cheek width, forehead / cheek width)
+GEOMETRIC_PROTOTYPES = {
+    "Diamond": (1.45, 0.74, 0.74),
+    "Heart": (1.40, 0.74, 0.92),
+    "Oval": (1.50, 0.80, 0.84),
+    "Round": (1.20, 0.86, 0.86),
+    "Square": (1.25, 0.95, 0.90),
+}
+
+_cascade_lock = threading.Lock()
+_cascade_counts = {
+    "requests": 0,
+    "short_circuited": 0,
+    "cnn_fallthrough": 0,
+    "audited": 0,
+    "audit_agree": 0,
+    "fallthrough_agree": 0,
+}
+
+def landmark_ratio_features(face):
+    d = face.distances(_RATIO_A, _RATIO_B)
+    if d[0] <= 0:
+        return None
+    return (d[1:] / d[0]).astype(np.float32)
+
+def classify_face_shape_geometric(face):
+    """Cheap prototype match; returns shape, confidence and margin."""
+    feats = landmark_ratio_features(face)
+    if feats is None:
+        return {"shape": "Unknown", "confidence": 0.0, "margin": 0.0}
+
+    labels = list(GEOMETRIC_PROTOTYPES.keys())
+    protos = np.array([GEOMETRIC_PROTOTYPES[k] for k in labels], dtype=np.float32)
+    d2 = ((protos - feats) ** 2).sum(axis=1)
+    logits = -d2 / CASCADE_TEMPERATURE
+    probs = np.exp(logits - logits.max())
+    probs /= probs.sum()
+
+    order = np.argsort(probs)[::-1]
+    return {
+        "shape": labels[order[0]],
+        "confidence": float(probs[order[0]]),
+        "margin": float(probs[order[0]] - probs[order[1]]),
+    }
+
+def _count(**inc):
+    with _cascade_lock:
+        for k, v in inc.items():
+            _cascade_counts[k] += v
+
+def classify_face_shape_cascade(crop_bgr, face):
+    geo = classify_face_shape_geometric(face)
+    confident = geo["margin"] >= CASCADE_MARGIN
+    audit = confident and random.random() < CASCADE_AUDIT_RATE
+
+    if confident and not audit:
+        _count(requests=1, short_circuited=1)
+        return {"shape": geo["shape"], "confidence": geo["confidence"],
+                "method": "geometric"}
+
+    cnn = classify_face_shape(crop_bgr)
+    cnn["method"] = "efficientnet"
+    agree = int(cnn["shape"] == geo["shape"])
+    if audit:
+        _count(requests=1, short_circuited=1, audited=1, audit_agree=agree)
+        # Audited requests still answer with the cheap result they would have got
+        return {"shape": geo["shape"], "confidence": geo["confidence"],
+                "method": "geometric"}
+    _count(requests=1, cnn_fallthrough=1, fallthrough_agree=agree)
+    return cnn
+
+def cascade_stats():
+    with _cascade_lock:
+        c = dict(_cascade_counts)
+    return {
+        "enabled": CASCADE_ENABLED,
+        "margin": CASCADE_MARGIN,
+        "audit_rate": CASCADE_AUDIT_RATE,
+        **c,
+        "short_circuit_rate": c["short_circuited"] / c["requests"] if c["requests"] else 0.0,
+        "audit_agreement": c["audit_agree"] / c["audited"] if c["audited"] else None,
+        "fallthrough_agreement": (c["fallthrough_agree"] / c["cnn_fallthrough"]
+                                  if c["cnn_fallthrough"] else None),
+    }
+
 # ============================================================
 # SKIN TONE (STONE) — SAFE VERSION
 # ============================================================
-try:
-    import stone
-    STONE_AVAILABLE = True
-except:
-    STONE_AVAILABLE = False
+stone = registry.get_optional("stone")
+STONE_AVAILABLE = stone is not None
 
-SKIN_CACHE = {}
+# Bounded: keyed by image content, so every new upload adds an entry.
+# Shared across workers with AURA_CACHE_BACKEND=sqlite (result_cache.py).
+SKIN_CACHE_SIZE = int(os.environ.get("AURA_SKIN_CACHE_SIZE", "1024"))
+SKIN_CACHE = make_cache("skin_tone", SKIN_CACHE_SIZE)
 
 def hex_to_color_name(hex_color):
     if not hex_color:
@@ -173,9 +367,10 @@ def classify_skin_tone(img_bgr):
         return {"bucket": "Unknown", "confidence": 0.0}
 
     try:
-        md5 = hashlib.md5(img_bgr.tobytes()).hexdigest()
-        if md5 in SKIN_CACHE:
-            return SKIN_CACHE[md5]
+        key = image_key(img_bgr)
+        cached = SKIN_CACHE.get(key)
+        if cached is not None:
+            return cached
 
         with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
             cv2.imwrite(tmp.name, img_bgr)
@@ -207,39 +402,212 @@ def classify_skin_tone(img_bgr):
             "method": "stone"
         }
 
-        SKIN_CACHE[md5] = out
+        SKIN_CACHE.set(key, out)
         return out
 
     except Exception:
         logger.exception("Skin tone classification failed")
         return {"bucket": "Unknown", "confidence": 0.0}
 
+# ============================================================
+# SKIN TONE BACKEND SELECTION
+# ============================================================
+# AURA_SKIN_TONE_BACKEND=cnn serves the trained ResNetHSV model
+# (skin_tone_cnn.py) on the FaceMesh crop: one forward, no temp
+# JPEG. STONE stays the default and the fallback when the weights
+# are missing or the CNN fails.
+SKIN_TONE_BACKEND = os.environ.get("AURA_SKIN_TONE_BACKEND", "stone").lower()
+
+def classify_skin_tone_auto(img_bgr, crop_bgr=None):
+    if SKIN_TONE_BACKEND == "cnn" and crop_bgr is not None:
+        import skin_tone_cnn
+        if skin_tone_cnn.available():
+            try:
+                return skin_tone_cnn.classify_skin_tone_cnn(crop_bgr)
+            except Exception:
+                logger.exception("Skin tone CNN failed, falling back to STONE")
+    return classify_skin_tone(img_bgr)
+
+# ============================================================
+# STAGE POOL
+# ============================================================
+# After landmarks, face shape (torch forward) and skin tone (STONE)
+# are independent; both release the GIL for most of their work, so
+# they run side by side and the request pays max(shape, tone).
+# AURA_PARALLEL_STAGES=0 runs them one after the other.
+PARALLEL_STAGES = os.environ.get("AURA_PARALLEL_STAGES", "1") != "0"
+STAGE_WORKERS = int(os.environ.get("AURA_STAGE_WORKERS", "2"))
+
+_stage_pool = None
+
+def get_stage_pool():
+    global _stage_pool
+    if _stage_pool is None:
+        _stage_pool = ThreadPoolExecutor(max_workers=STAGE_WORKERS,
+                                         thread_name_prefix="aura-stage")
+    return _stage_pool
+
+def stage_queue_depth():
+    return _stage_pool._work_queue.qsize() if _stage_pool is not None else 0
+
+metrics.register_gauge("aura_stage_queue_depth",
+                       "Shape / tone jobs waiting for a stage pool thread",
+                       stage_queue_depth)
+
+def _timed(stage, fn, *args):
+    """Run one pipeline stage; returns (result, ms) and records the metric."""
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+    metrics.observe_stage(stage, elapsed)
+    return out, elapsed * 1000.0
+
 # ============================================================
 # MAIN PIPELINE CLASS
 # ============================================================
+_classifiers = weakref.WeakSet()
+
+# Whole classify_image results by image content + model_version(), in
+# memory / shared (result_cache.py) and, if enabled, on disk
+# (result_store.py). New weights change the version (re-read on
+# /api/reload-models), so nothing needs clearing on reload.
+CLASSIFY_CACHE = make_cache("classify", int(os.environ.get("AURA_CLASSIFY_CACHE_SIZE", "1024")))
+
+def _skin_tone_version():
+    try:
+        from importlib.metadata import version
+        stone_version = version("skin-tone-classifier")
+    except Exception:
+        stone_version = getattr(stone, "__version__", "unknown") if STONE_AVAILABLE else "none"
+    if SKIN_TONE_BACKEND == "cnn":
+        import skin_tone_cnn
+        return f"cnn:{file_digest(skin_tone_cnn.MODEL_PATH)}+stone:{stone_version}"
+    return f"stone:{stone_version}"
+
+_model_version = None
+
+def model_version():
+    """
+    Short digest of everything that changes a classify result. Computed
+    once per process (it stats and may hash the weights); cleared by
+    reset_model_version() when the models are reloaded.
+    """
+    global _model_version
+    if _model_version is None:
+        parts = (
+            f"face_shape={file_digest(FACE_SHAPE_MODEL_PATH)}@{FACE_SHAPE_INPUT_SIZE}",
+            f"cascade={int(CASCADE_ENABLED)}",
+            f"skin_tone={_skin_tone_version()}",
+        )
+        _model_version = image_key("|".join(parts).encode())[:16]
+    return _model_version
+
+def reset_model_version():
+    global _model_version
+    _model_version = None
+
+def classifier_instances():
+    """Live SkinFaceClassifierAPI objects (the registry keeps one)."""
+    return list(_classifiers)
+
+def detect_face_mesh(rgb):
+    """FaceMesh on an RGB image with a leased (shared, pooled) graph."""
+    with registry.lease("face_mesh") as fm:
+        return fm.process(rgb)
+
 class SkinFaceClassifierAPI:
+    """Use registry.get("classifier"); models come from the registry."""
     def __init__(self):
-        self.fm = FaceMesh(static_image_mode=True, max_num_faces=1, refine_landmarks=True)
+        registry.get("face_mesh")
         init_face_shape_model()
+        _classifiers.add(self)
+
+    @staticmethod
+    def _remember(cache_key, digest, version, result):
+        # "Unknown" is also what a stage returns when it swallowed an
+        # error (STONE / CNN failure); don't pin that until the next
+        # model version
+        if result.get("success") and (
+            result["face_shape"].get("shape") == "Unknown"
+            or result["skin_tone"].get("bucket") == "Unknown"
+        ):
+            return
+        CLASSIFY_CACHE.set(cache_key, copy.deepcopy(result))
+        store = get_store()
+        if store is not None:
+            store.put(digest, version, result)
 
     def classify_image(self, img_bgr):
         try:
-            img = resize_for_mediapipe(img_bgr)
+            t_start = time.perf_counter()
+            timings = {}
+
+            digest, version = image_key(img_bgr), model_version()
+            cache_key = f"{digest}:{version}"
+            cached = CLASSIFY_CACHE.get(cache_key)
+            source = "hit"
+            store = get_store()
+            if cached is None and store is not None:
+                cached = store.get(digest, version)
+                if cached is not None:
+                    CLASSIFY_CACHE.set(cache_key, cached)
+                    source = "store"
+            if cached is not None:
+                # Copy: the routers edit the result (e.g. capitalize the shape)
+                cached = copy.deepcopy(cached)
+                if "debug" in cached:
+                    # This request's timings, not the run that filled the cache
+                    lookup_ms = round((time.perf_counter() - t_start) * 1000.0, 2)
+                    cached["debug"]["cache"] = source
+                    cached["debug"]["timings_ms"] = {"cache_lookup": lookup_ms, "total": lookup_ms}
+                return cached
+
+            img, timings["resize"] = _timed("resize", resize_for_mediapipe, img_bgr)
             rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
-            res = self.fm.process(rgb)
+            res, timings["landmarks"] = _timed("landmarks", detect_face_mesh, rgb)
             if not res.multi_face_landmarks:
-                return {"success": False, "error": "no_face_detected"}
-
-            lm = res.multi_face_landmarks[0]
-            crop = crop_face_from_landmarks(img, lm)
-
-            return {
+                result = {"success": False, "error": "no_face_detected"}
+                self._remember(cache_key, digest, version, result)
+                return result
+
+            h, w = img.shape[:2]
+            face = FaceLandmarks.from_mediapipe(res.multi_face_landmarks[0], w, h)
+            crop = crop_face_from_landmarks(img, face)
+
+            if CASCADE_ENABLED:
+                shape_fn, shape_args = classify_face_shape_cascade, (crop, face)
+            else:
+                shape_fn, shape_args = classify_face_shape, (crop,)
+
+            if PARALLEL_STAGES:
+                pool = get_stage_pool()
+                # copy_context: log lines from the stage threads keep the request id
+                shape_job = pool.submit(contextvars.copy_context().run,
+                                        _timed, "face_shape", shape_fn, *shape_args)
+                tone_job = pool.submit(contextvars.copy_context().run,
+                                       _timed, "skin_tone", classify_skin_tone_auto, img, crop)
+                face_shape, timings["face_shape"] = shape_job.result()
+                skin_tone, timings["skin_tone"] = tone_job.result()
+            else:
+                face_shape, timings["face_shape"] = _timed("face_shape", shape_fn, *shape_args)
+                skin_tone, timings["skin_tone"] = _timed("skin_tone", classify_skin_tone_auto, img, crop)
+
+            timings["total"] = (time.perf_counter() - t_start) * 1000.0
+
+            result = {
                 "success": True,
-                "face_shape": classify_face_shape(crop),
-                "skin_tone": classify_skin_tone(img),
-                "landmarks_detected": len(lm.landmark)
+                "face_shape": face_shape,
+                "skin_tone": skin_tone,
+                "landmarks_detected": len(face),
+                "debug": {
+                    "parallel_stages": PARALLEL_STAGES,
+                    "skin_tone_backend": SKIN_TONE_BACKEND,
+                    "timings_ms": {k: round(v, 2) for k, v in timings.items()},
+                },
             }
+            self._remember(cache_key, digest, version, result)
+            return result
 
         except Exception:
             return {
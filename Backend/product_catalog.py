@@ -0,0 +1,271 @@
+# ============================================================
+# product_catalog.py — INDEXED PRODUCT CATALOG
+# ============================================================
+# Products are plain dicts:
+#   {
+#     "sku": "fnd-0001",
+#     "category": "foundation",          # see CATEGORIES
+#     "name": "Maybelline Fit Me 110",
+#     "tones": ["porcelain"],            # [] = any tone
+#     "faces": [],                       # [] = any face shape
+#     "genders": [],                     # [] = any gender
+#     "events": [],                      # [] = any event
+#     "score": 1.0                       # higher ranks first
+#   }
+#
+# Sources (AURA_CATALOG_PATH):
+#   .json           list of products, or {"products": [...]}
+#   .csv            same columns, list fields separated by "|"
+#   .db / .sqlite   table `products` with the same columns
+# Without a file the catalog is generated from the rule tables
+# (data/recommendation_rules.json), one product per table entry.
+#
+# Retrieval: one inverted index per category, with a posting list per
+# (attribute, value) already in score order and "any" products merged
+# in. top_k walks the shortest posting list and stops after k hits
+# (AURA_CATALOG_TOP_K; unset = every match, so no rule list is cut);
+# results are memoized per query (the query space is small and finite).
+# Reloads reuse the index of every category whose products are unchanged.
+# ============================================================
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("aura")
+
+CATALOG_PATH = os.environ.get("AURA_CATALOG_PATH", "")
+# None = no limit
+TOP_K = int(os.environ["AURA_CATALOG_TOP_K"]) if os.environ.get("AURA_CATALOG_TOP_K") else None
+
+CATEGORIES = (
+    "foundation", "lipstick", "blush", "hair_color", "hairstyle",
+    "accessory_face", "accessory_tone", "accessory_event",
+    "clothing_color", "outfit", "bag", "shoes",
+)
+
+# query keyword -> product field
+ATTRS = {"tone": "tones", "face": "faces", "gender": "genders", "event": "events"}
+
+# rule table -> (category, attribute(s) its keys describe)
+_TABLE_SOURCES = {
+    "FOUNDATION_PRODUCTS": ("foundation", ("tones",)),
+    "LIPSTICK_PRODUCTS": ("lipstick", ("tones",)),
+    "BLUSH_PRODUCTS": ("blush", ("tones",)),
+    "HAIR_COLOR_BY_TONE": ("hair_color", ("tones",)),
+    "HAIRSTYLE_BY_FACE": ("hairstyle", ("faces",)),
+    "ACCESSORIES_BY_FACE": ("accessory_face", ("faces",)),
+    "ACCESSORIES_BY_TONE": ("accessory_tone", ("tones",)),
+    "ACCESSORIES_BY_EVENT": ("accessory_event", ("events",)),
+    "CLOTHING_COLORS": ("clothing_color", ("tones",)),
+    "BAG_MAP": ("bag", ("events",)),
+    "EVENT_CLOTHING": ("outfit", ("genders", "events")),
+    "SHOE_MAP": ("shoes", ("genders", "events")),
+}
+
+
+def _as_list(value) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [v.strip().lower() for v in value.split("|") if v.strip()]
+    return [str(v).strip().lower() for v in value]
+
+
+def normalize_product(raw: Dict[str, Any]) -> Dict[str, Any]:
+    category = str(raw["category"]).strip().lower()
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown product category: {category!r}")
+    return {
+        "sku": str(raw.get("sku") or ""),
+        "category": category,
+        "name": str(raw["name"]),
+        "tones": _as_list(raw.get("tones")),
+        "faces": _as_list(raw.get("faces")),
+        "genders": _as_list(raw.get("genders")),
+        "events": _as_list(raw.get("events")),
+        "score": float(raw.get("score") or 0.0),
+    }
+
+
+def _fingerprint(obj) -> str:
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class _CategoryIndex:
+    """Inverted index + memoized top-k for the products of one category."""
+
+    def __init__(self, products: List[Dict[str, Any]], fingerprint: str):
+        # Stable sort: ids ascending == score descending, ties keep file order
+        self.products = sorted(products, key=lambda p: -p["score"])
+        self.fingerprint = fingerprint
+        self.cache: Dict[Tuple, List[str]] = {}
+
+        values: Dict[str, set] = {}
+        for p in self.products:
+            for field in ATTRS.values():
+                values.setdefault(field, set()).update(p[field])
+
+        postings: Dict[Tuple[str, str], List[int]] = {}
+        wildcards: Dict[str, List[int]] = {}
+        for pid, p in enumerate(self.products):
+            for field in ATTRS.values():
+                if p[field]:
+                    for v in p[field]:
+                        postings.setdefault((field, v), []).append(pid)
+                else:
+                    # "any" products belong to every value's posting list
+                    wildcards.setdefault(field, []).append(pid)
+                    for v in values[field]:
+                        postings.setdefault((field, v), []).append(pid)
+
+        self.postings = postings
+        self.wildcards = wildcards
+        self.attr_sets = [
+            {field: frozenset(p[field]) for field in ATTRS.values() if p[field]}
+            for p in self.products
+        ]
+
+    def top_k(self, k: Optional[int], query: Tuple[Tuple[str, str], ...]) -> List[str]:
+        cached = self.cache.get((k, query))
+        if cached is not None:
+            return cached
+
+        if query:
+            lists = [self.postings.get((field, v), self.wildcards.get(field, []))
+                     for field, v in query]
+            candidates = min(lists, key=len)
+        else:
+            candidates = range(len(self.products))
+
+        out: List[str] = []
+        for pid in candidates:
+            attrs = self.attr_sets[pid]
+            if all(field not in attrs or v in attrs[field] for field, v in query):
+                out.append(self.products[pid]["name"])
+                if len(out) == k:
+                    break
+
+        self.cache[(k, query)] = out
+        return out
+
+
+class ProductCatalog:
+    def __init__(self, products: Iterable[Dict[str, Any]], source: str = "memory",
+                 previous: Optional["ProductCatalog"] = None):
+        """
+        Index `products`. With `previous`, categories whose products are
+        unchanged reuse its index (and warm top-k cache) as-is.
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for p in products:
+            p = normalize_product(p)
+            grouped.setdefault(p["category"], []).append(p)
+
+        old = previous._categories if previous is not None else {}
+        self._categories: Dict[str, _CategoryIndex] = {}
+        self.rebuilt: List[str] = []
+        for category, items in grouped.items():
+            fp = _fingerprint(items)
+            if category in old and old[category].fingerprint == fp:
+                self._categories[category] = old[category]
+            else:
+                self._categories[category] = _CategoryIndex(items, fp)
+                self.rebuilt.append(category)
+
+        self.source = source
+        self.fingerprint = _fingerprint(
+            sorted((c, idx.fingerprint) for c, idx in self._categories.items())
+        )
+
+    def __len__(self):
+        return sum(len(idx.products) for idx in self._categories.values())
+
+    def updated(self, products: Iterable[Dict[str, Any]], source: Optional[str] = None) -> "ProductCatalog":
+        """New catalog for `products`, rebuilding only the categories that changed."""
+        return ProductCatalog(products, source=source or self.source, previous=self)
+
+    def top_k(self, category: str, k: Optional[int] = TOP_K, **filters: Optional[str]) -> List[str]:
+        """
+        Names of the k best products in `category` (all of them when k
+        is None) matching every given filter (tone=, face=, gender=,
+        event=). Products with no value for an attribute match any value.
+        """
+        index = self._categories.get(category)
+        if index is None:
+            return []
+        query = tuple(sorted((ATTRS[a], v) for a, v in filters.items() if v is not None))
+        return index.top_k(k, query)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "products": len(self),
+            "categories": {c: len(idx.products) for c, idx in self._categories.items()},
+            "posting_lists": sum(len(idx.postings) for idx in self._categories.values()),
+            "cached_queries": sum(len(idx.cache) for idx in self._categories.values()),
+        }
+
+    # ========================================================
+    # LOADERS
+    # ========================================================
+    @classmethod
+    def from_rule_tables(cls, tables: Dict[str, Any],
+                         previous: Optional["ProductCatalog"] = None) -> "ProductCatalog":
+        return cls(products_from_rule_tables(tables), source="rule_tables", previous=previous)
+
+    @classmethod
+    def from_file(cls, path: str, previous: Optional["ProductCatalog"] = None) -> "ProductCatalog":
+        return cls(read_products(path), source=path, previous=previous)
+
+
+def products_from_rule_tables(tables: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One product per table entry; list position becomes the score."""
+    products = []
+    for table_name, (category, fields) in _TABLE_SOURCES.items():
+        table = tables[table_name]
+        if len(fields) == 1:
+            groups = [((k,), names) for k, names in table.items()]
+        else:
+            groups = [((k1, k2), names)
+                      for k1, sub in table.items() for k2, names in sub.items()]
+        for keys, names in groups:
+            for pos, name in enumerate(names):
+                p = {"category": category, "name": name, "score": -float(pos),
+                     "sku": f"{category}:{'/'.join(keys)}:{pos}"}
+                for field, key in zip(fields, keys):
+                    p[field] = [key]
+                products.append(p)
+    return products
+
+
+def read_products(path: str) -> List[Dict[str, Any]]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["products"] if isinstance(data, dict) else data
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(r) for r in conn.execute("SELECT * FROM products")]
+        finally:
+            conn.close()
+    raise ValueError(f"Unsupported catalog format: {path}")
+
+
+def load_catalog(tables: Dict[str, Any], path: str = CATALOG_PATH,
+                 previous: Optional[ProductCatalog] = None) -> ProductCatalog:
+    if path:
+        catalog = ProductCatalog.from_file(path, previous=previous)
+        logger.info("Product catalog loaded from %s: %d products", path, len(catalog))
+        return catalog
+    return ProductCatalog.from_rule_tables(tables, previous=previous)
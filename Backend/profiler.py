@@ -0,0 +1,183 @@
+# ============================================================
+# profiler.py — ON-DEMAND SAMPLING PROFILER
+# ============================================================
+# Samples the Python stacks of every thread in this worker
+# (sys._current_frames) for N seconds or until N more requests have
+# been served, and returns them in collapsed-stack format:
+#
+#   stage:landmarks;main:classify_api;predict_tone_shape:_timed;mediapipe...:process 42
+#
+# which flamegraph.pl / speedscope / inferno read directly. Each stack
+# is rooted at the pipeline stage it was sampled in (the `stage`
+# argument of predict_tone_shape._timed, or the helper that owns the
+# stage: blend, encode_jpg, decode_image, ...). Time inside native
+# code (torch, MediaPipe, STONE, cv2) is attributed to the innermost
+# Python frame that called it.
+#
+# Nothing runs until a profile is requested: no tracing hooks, no
+# per-request work. Triggered by
+#   POST /api/admin/profile?seconds=10      (X-Admin-Token: $AURA_ADMIN_TOKEN)
+#   kill -USR2 <worker pid>                 (writes AURA_PROFILE_DIR/*.collapsed)
+# ============================================================
+
+import hmac
+import os
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+
+import metrics
+
+logger = logging.getLogger("aura")
+
+ADMIN_TOKEN = os.environ.get("AURA_ADMIN_TOKEN", "")
+PROFILE_DIR = os.environ.get("AURA_PROFILE_DIR", "profiles")
+DEFAULT_INTERVAL_MS = float(os.environ.get("AURA_PROFILE_INTERVAL_MS", "5"))
+SIGNAL_SECONDS = float(os.environ.get("AURA_PROFILE_SECONDS", "30"))
+MAX_SECONDS = 300
+
+# Functions that own one pipeline stage (besides _timed's `stage` arg)
+STAGE_FUNCTIONS = {
+    "load_image_bytes_to_bgr": "decode",
+    "decode_image": "decode",
+    "resize_for_mediapipe": "resize",
+    "get_landmarks": "landmarks",
+    "classify_face_shape": "face_shape",
+    "classify_face_shape_cascade": "face_shape",
+    "classify_skin_tone": "skin_tone",
+    "classify_skin_tone_cnn_batch": "skin_tone",
+    "blend": "blend",
+    "encode_jpg": "encode",
+    "encode_mask_png": "encode",
+    "make_recommendation": "recommendation",
+    "make_recommendations": "recommendation",
+}
+
+# Threads whose innermost frame is in one of these stdlib files are
+# parked (event loop select, pool threads waiting for work, ...)
+_IDLE_FILES = {"threading.py", "queue.py", "selectors.py", "base_events.py",
+               "socket.py", "thread.py"}
+
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(code):
+    path = code.co_filename.replace("\\", "/")
+    marker = "site-packages/"
+    if marker in path:
+        module = path.split(marker, 1)[1].rsplit(".", 1)[0].replace("/", ".")
+    else:
+        module = os.path.splitext(os.path.basename(path))[0]
+    return f"{module}:{code.co_name}"
+
+
+def _is_idle(frame):
+    return os.path.basename(frame.f_code.co_filename) in _IDLE_FILES
+
+
+def _collapse(frame):
+    """Root-first frame labels and the stage the stack is in."""
+    labels = []
+    stage = None
+    while frame is not None:
+        code = frame.f_code
+        labels.append(_frame_label(code))
+        if stage is None:
+            if code.co_name == "_timed":
+                stage = frame.f_locals.get("stage")
+            else:
+                stage = STAGE_FUNCTIONS.get(code.co_name)
+        frame = frame.f_back
+    labels.reverse()
+    return labels, stage
+
+
+def sample(seconds=10.0, requests=0, interval_ms=DEFAULT_INTERVAL_MS, include_idle=False):
+    """
+    Sample all other threads; stop after `seconds` or once `requests`
+    more requests have completed (0 = time only). Returns
+    (collapsed text, info dict). Raises ProfilerBusy if one is running.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already being captured")
+
+    try:
+        seconds = min(max(float(seconds), 0.1), MAX_SECONDS)
+        interval = max(float(interval_ms), 1.0) / 1000.0
+        me = threading.get_ident()
+        stacks = Counter()
+        n_samples = 0
+        start_requests = metrics.total_requests()
+        t0 = time.perf_counter()
+        deadline = t0 + seconds
+
+        while time.perf_counter() < deadline:
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                labels, stage = _collapse(frame)
+                labels.insert(0, f"stage:{stage or 'other'}")
+                stacks[";".join(labels)] += 1
+            n_samples += 1
+            if requests and metrics.total_requests() - start_requests >= requests:
+                break
+            time.sleep(interval)
+
+        elapsed = time.perf_counter() - t0
+        served = metrics.total_requests() - start_requests
+    finally:
+        _busy.release()
+
+    text = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    info = {
+        "pid": os.getpid(),
+        "seconds": round(elapsed, 3),
+        "sampling_rounds": n_samples,
+        "interval_ms": interval * 1000.0,
+        "requests_served": served,
+        "unique_stacks": len(stacks),
+    }
+    logger.info("🔬 Profile captured: %s", info)
+    return text, info
+
+
+def check_token(token):
+    """Admin endpoints are disabled unless AURA_ADMIN_TOKEN is set."""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or "", ADMIN_TOKEN)
+
+
+# ============================================================
+# SIGNAL TRIGGER (SIGUSR2)
+# ============================================================
+def _profile_to_file():
+    try:
+        text, info = sample(SIGNAL_SECONDS)
+    except ProfilerBusy:
+        logger.warning("Profile already running; SIGUSR2 ignored")
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"aura-{info['pid']}-{int(time.time())}.collapsed")
+    with open(path, "w") as f:
+        f.write(text)
+    logger.info("🔬 Profile written to %s", path)
+
+
+def install_signal_handler():
+    """kill -USR2 <pid> profiles that worker for AURA_PROFILE_SECONDS."""
+    import signal
+    if not hasattr(signal, "SIGUSR2") or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handler(signum, frame):
+        threading.Thread(target=_profile_to_file, name="aura-profiler", daemon=True).start()
+
+    signal.signal(signal.SIGUSR2, handler)
+    return True
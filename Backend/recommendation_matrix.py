@@ -0,0 +1,198 @@
+# ============================================================
+# recommendation_matrix.py — PRECOMPUTED RECOMMENDATIONS (MMAP)
+# ============================================================
+# The default (variant 0, no explicit seed) response for every
+# (tone, face, gender, event, body) combination is rendered once by
+# build_recommendation_matrix.py into a single binary file. Workers
+# mmap it read-only, so the OS page cache holds one copy per node,
+# and a request is answered with an index computation + a byte slice.
+#
+# File layout (little endian):
+#   8s   magic  b"AURARM02"
+#   I    header length, then header JSON:
+#          {"fingerprint": ..., "dims": [tones, faces, genders, events, bodies]}
+#   I    entry count
+#   count x (I offset, I length, 16s blake2b digest)   — offsets into data
+#   data: concatenated JSON bodies
+# ============================================================
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+from fast_json import dumps, model_to_dict
+from models import RecommendationsResponse
+import recommendation_model as rm
+
+logger = logging.getLogger("aura")
+
+MATRIX_PATH = os.environ.get("AURA_RECOMMENDATION_MATRIX", "models/recommendation_matrix.bin")
+
+MAGIC = b"AURARM02"
+_ENTRY = struct.Struct("<II16s")
+
+
+# ============================================================
+# SHARED ENCODING
+# ============================================================
+def encode_response(result: Dict[str, Any]) -> bytes:
+    """Validated (once), compact JSON body for one make_recommendation() result."""
+    return dumps(validate_response(result))
+
+
+def validate_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Run RecommendationsResponse validation once and return the plain dict."""
+    return model_to_dict(RecommendationsResponse(
+        makeup=result["makeup"],
+        fashion=result["fashion"],
+        summary=result["summary"]
+    ))
+
+
+def etag_for(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+# ============================================================
+# BUILD
+# ============================================================
+def build_matrix(path: str = MATRIX_PATH) -> int:
+    dims = [rm.TONES, rm.FACES, rm.GENDERS, rm.EVENTS, rm.BODY_TYPES]
+
+    bodies = []
+    for tone in rm.TONES:
+        for face in rm.FACES:
+            for gender in rm.GENDERS:
+                for event in rm.EVENTS:
+                    for body in rm.BODY_TYPES:
+                        req = rm.RecommendationRequest(
+                            face_shape=face, skin_tone=tone, gender=gender,
+                            event=event, body_type=body,
+                        )
+                        bodies.append(encode_response(rm.make_recommendation(req)))
+
+    header = json.dumps({
+        "fingerprint": rm.rules_fingerprint(),
+        "dims": dims,
+    }).encode()
+
+    table = bytearray()
+    offset = 0
+    for body in bodies:
+        table += _ENTRY.pack(offset, len(body),
+                             hashlib.blake2b(body, digest_size=16).digest())
+        offset += len(body)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(struct.pack("<I", len(bodies)))
+        f.write(table)
+        for body in bodies:
+            f.write(body)
+    os.replace(tmp, path)  # atomic for workers that reopen it
+    return len(bodies)
+
+
+# ============================================================
+# SERVE
+# ============================================================
+class RecommendationMatrix:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a recommendation matrix "
+                             f"(or was built by an older version; rebuild it)")
+
+        (hlen,) = struct.unpack_from("<I", self._mm, 8)
+        header = json.loads(self._mm[12:12 + hlen])
+        self.fingerprint = header["fingerprint"]
+
+        tones, faces, genders, events, bodies = header["dims"]
+        self._index = [{v: i for i, v in enumerate(d)} for d in header["dims"]]
+        self._strides = [
+            len(faces) * len(genders) * len(events) * len(bodies),
+            len(genders) * len(events) * len(bodies),
+            len(events) * len(bodies),
+            len(bodies),
+            1,
+        ]
+
+        (self.count,) = struct.unpack_from("<I", self._mm, 12 + hlen)
+        self._table = 16 + hlen
+        self._data = self._table + self.count * _ENTRY.size
+
+    def lookup(self, key: Tuple[str, str, str, str, str]) -> Optional[Tuple[str, bytes]]:
+        """(etag, JSON body) for a normalized index key, or None."""
+        idx = 0
+        for value, index, stride in zip(key, self._index, self._strides):
+            pos = index.get(value)
+            if pos is None:
+                return None
+            idx += pos * stride
+
+        offset, length, digest = _ENTRY.unpack_from(self._mm, self._table + idx * _ENTRY.size)
+        start = self._data + offset
+        return '"%s"' % digest.hex(), self._mm[start:start + length]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+_matrix: Optional[RecommendationMatrix] = None
+_matrix_checked = False
+
+
+def get_matrix(path: str = MATRIX_PATH) -> Optional[RecommendationMatrix]:
+    """
+    Open the artifact once; None if missing or built from other rules.
+    Also None once the rules are hot-reloaded away from the artifact.
+    """
+    global _matrix, _matrix_checked
+
+    if _matrix_checked:
+        if _matrix is not None and _matrix.fingerprint != rm.rules_fingerprint():
+            return None
+        return _matrix
+    _matrix_checked = True
+
+    if not os.path.exists(path):
+        return None
+    try:
+        matrix = RecommendationMatrix(path)
+    except Exception:
+        logger.exception("Failed to open recommendation matrix %s", path)
+        return None
+
+    if matrix.fingerprint != rm.rules_fingerprint():
+        logger.warning("Recommendation matrix %s is stale (rules changed); "
+                       "rebuild with build_recommendation_matrix.py", path)
+        matrix.close()
+        return None
+
+    logger.info("Recommendation matrix loaded: %d entries", matrix.count)
+    _matrix = matrix
+    return matrix
+
+
+def reset_matrix():
+    """
+    Forget the open artifact so the next get_matrix() reopens it. The
+    old mapping is not closed here: requests may still be reading it,
+    and it is unmapped when the last of them drops its reference.
+    """
+    global _matrix, _matrix_checked
+    _matrix = None
+    _matrix_checked = False
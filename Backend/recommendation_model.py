@@ -4,10 +4,20 @@ FINAL VERSION – VTU READY ✔
 Rule-based, Personalized, Explainable
 """
 
+import os
+import json
+import time
 import random
-from typing import Dict, Any, List
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from pydantic import BaseModel
 
+from product_catalog import CATALOG_PATH, ProductCatalog, load_catalog
+
+logger = logging.getLogger("aura")
+
 
 # ============================================================
 # REQUEST MODEL
@@ -19,268 +29,463 @@ class RecommendationRequest(BaseModel):
     gender: str
     event: str
     body_type: str   # average | slim | muscular | heavy
+    seed: Optional[int] = None     # explicit seed for the random picks
+    variant: Optional[int] = None  # 0, 1, 2… alternative looks for the same profile
 
 
 # ============================================================
-# SKIN TONE NORMALIZATION
+# RULE TABLES (data/recommendation_rules.json)
 # ============================================================
+# All tables live in one JSON file so they can change without a
+# deploy. The file is watched and reloaded in place (see RELOAD below):
+#
+#   LEGACY_TONE_MAP       skin tone label  -> canonical tone
+#   FOUNDATION_PRODUCTS   tone  -> products     LIPSTICK_PRODUCTS  tone -> shades
+#   BLUSH_PRODUCTS        tone  -> shades       HAIR_COLOR_BY_TONE tone -> hair colors
+#   HAIRSTYLE_BY_FACE     face  -> hairstyles   BODY_TYPE_FIT      body -> fits
+#   ACCESSORIES_BY_FACE / _BY_TONE / _BY_EVENT  accessory rules
+#   CLOTHING_COLORS       tone  -> palette
+#   EVENT_CLOTHING        gender -> event -> clothing items
+#   BAG_MAP               event -> bags         SHOE_MAP gender -> event -> shoes
+
+RULES_PATH = os.environ.get("AURA_RULES_PATH", "data/recommendation_rules.json")
+
+# Seconds between checks of the rules / catalog files (0 = no watcher)
+RULES_RELOAD_INTERVAL = float(os.environ.get("AURA_RULES_RELOAD_INTERVAL", "2"))
+
+TABLE_NAMES = (
+    "LEGACY_TONE_MAP", "FOUNDATION_PRODUCTS", "LIPSTICK_PRODUCTS", "BLUSH_PRODUCTS",
+    "HAIR_COLOR_BY_TONE", "HAIRSTYLE_BY_FACE", "BODY_TYPE_FIT",
+    "ACCESSORIES_BY_FACE", "ACCESSORIES_BY_TONE", "ACCESSORIES_BY_EVENT",
+    "CLOTHING_COLORS", "EVENT_CLOTHING", "BAG_MAP", "SHOE_MAP",
+)
+
+# With DETERMINISTIC on (default), picks are seeded per request (see
+# DETERMINISTIC SEEDING). AURA_DETERMINISTIC_RECOMMENDATIONS=0 restores
+# fully random picks.
+DETERMINISTIC = os.environ.get("AURA_DETERMINISTIC_RECOMMENDATIONS", "1") != "0"
+
+
+def load_rule_tables(path: str = RULES_PATH) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        tables = json.load(f)
+    missing = [name for name in TABLE_NAMES if name not in tables]
+    if missing:
+        raise ValueError(f"{path} is missing rule tables: {', '.join(missing)}")
+    return {name: tables[name] for name in TABLE_NAMES}
 
-LEGACY_TONE_MAP = {
-    "very fair": "porcelain",
-    "fair": "fair beige",
-    "light": "fair beige",
-    "wheatish": "warm beige",
-    "medium": "warm beige",
-    "olive": "warm beige",
-    "tan": "tan",
-    "caramel": "caramel",
-    "brown": "brown",
-    "dark": "brown",
-    "deep": "deep brown",
-}
 
-def normalize_tone(raw: str) -> str:
-    if not raw:
-        return "warm beige"
-    raw = raw.lower()
-    for k, v in LEGACY_TONE_MAP.items():
+# ============================================================
+# COMPILED ENGINE STATE
+# ============================================================
+# Everything that depends only on (tone, face, gender, event, body)
+# is resolved once per rules version: candidate lists (top-k from the
+# product catalog), outfit links and the summary text. A request is
+# then a few dict lookups plus the seeded picks.
+#
+# The whole compiled state is one dict swapped by a single assignment.
+# A reload builds the new state beside the live one; a request takes
+# one snapshot (current_state()) and passes it down, so it never mixes
+# two versions.
+
+def _key(raw: str) -> str:
+    return raw.strip().lower() if raw else ""
+
+
+def _scan_tone(tone_map: Dict[str, str], raw: str) -> str:
+    # Same first-match substring rule as the original normalize_tone
+    for k, v in tone_map.items():
         if k in raw:
             return v
     return "warm beige"
 
 
-# ============================================================
-# MAKEUP DATABASE
-# ============================================================
+_TONE_ALIAS_LIMIT = 4096
 
-FOUNDATION_PRODUCTS = {
-    "porcelain": ["Maybelline Fit Me 110", "MAC NC10"],
-    "fair beige": ["Maybelline 115 Ivory", "MAC NC15"],
-    "warm beige": ["Maybelline 220 Natural Beige", "MAC NC35"],
-    "tan": ["MAC NC42", "Maybelline 310 Sun Beige"],
-    "caramel": ["Fenty 310 Honey", "MAC NC44"],
-    "brown": ["Maybelline 355 Coconut", "MAC NW45"],
-    "deep brown": ["Fenty 480", "MAC NW50"],
-}
+# (item, color) -> search link, filled as entries are compiled
+_OUTFIT_LINKS: Dict[Tuple[str, str], str] = {}
 
-LIPSTICK_PRODUCTS = {
-    "porcelain": ["Soft Pink Nude", "Peach Nude"],
-    "fair beige": ["Nude Peach", "Warm Pink"],
-    "warm beige": ["Terracotta", "Warm Berry"],
-    "tan": ["Brick Red", "Rust Nude"],
-    "caramel": ["Copper Brown", "Wine Red"],
-    "brown": ["Burgundy", "Deep Plum"],
-    "deep brown": ["Dark Berry", "Espresso Brown"],
-}
 
-BLUSH_PRODUCTS = {
-    "porcelain": ["Soft Peach", "Baby Pink"],
-    "fair beige": ["Rosy Pink"],
-    "warm beige": ["Warm Rose"],
-    "tan": ["Coral"],
-    "caramel": ["Terracotta"],
-    "brown": ["Brick Brown"],
-    "deep brown": ["Berry"],
+def _outfit_link(item: str, color: str) -> str:
+    link = _OUTFIT_LINKS.get((item, color))
+    if link is None:
+        link = f"https://www.google.com/search?q={item.replace(' ','+')}+{color.replace(' ','+')}"
+        _OUTFIT_LINKS[(item, color)] = link
+    return link
+
+
+# Used when an external catalog has nothing for a tone / event / gender
+# in a category every response needs one pick from
+_FALLBACKS = {
+    "foundation": ["Shade-matched Foundation"],
+    "lipstick": ["Nude Lipstick"],
+    "blush": ["Soft Peach Blush"],
+    "clothing_color": ["Neutral"],
+    "bag": ["Classic Tote"],
+    "shoes": ["Classic Neutral Shoes"],
 }
 
 
-# ============================================================
-# HAIR COLOR BY SKIN TONE  ✅ (FIX)
-# ============================================================
+def _compile_entry(catalog: ProductCatalog, tone: str, face: str, gender: str,
+                   event: str, body: str) -> Dict[str, Any]:
+    def top(category, **filters):
+        return catalog.top_k(category, **filters) or _FALLBACKS.get(category, [])
 
-HAIR_COLOR_BY_TONE = {
-    "porcelain": ["Natural Black", "Dark Brown"],
-    "fair beige": ["Chocolate Brown", "Ash Brown"],
-    "warm beige": ["Chestnut Brown", "Soft Caramel"],
-    "tan": ["Warm Brown", "Auburn"],
-    "caramel": ["Golden Brown", "Honey Highlights"],
-    "brown": ["Espresso Brown"],
-    "deep brown": ["Natural Black"],
-}
+    palette = top("clothing_color", tone=tone)
+    return {
+        "foundation": top("foundation", tone=tone),
+        "lipstick": top("lipstick", tone=tone),
+        "blush": top("blush", tone=tone),
+        "hairstyles": top("hairstyle", face=face),
+        "hairColors": top("hair_color", tone=tone),
+        "acc_face": top("accessory_face", face=face) or ["Stud Earrings"],
+        "acc_tone": top("accessory_tone", tone=tone) or ["Gold Jewelry"],
+        "acc_event": top("accessory_event", event=event) or ["Minimal Accessories"],
+        "palette": palette,
+        # per clothing item: [(color, link), ...] over the palette
+        "outfits": [
+            (item, [(color, _outfit_link(item, color)) for color in palette])
+            for item in top("outfit", gender=gender, event=event)
+        ],
+        "bag": top("bag", event=event),
+        "shoes": top("shoes", gender=gender, event=event),
+        "summary": (
+            f"For the {tone} skin tone and {face} face shape, "
+            f"the AI suggests suitable makeup shades and hairstyles. "
+            f"Based on the {body} body type and {event} event, "
+            f"it recommends well-fitted outfits, accessories, and footwear for a complete look."
+        ),
+    }
 
 
-# ============================================================
-# FACE SHAPE → HAIRSTYLE
-# ============================================================
+def _build_state(tables: Dict[str, Any], previous: Optional[Dict[str, Any]] = None,
+                 catalog: Optional[ProductCatalog] = None) -> Dict[str, Any]:
+    """
+    Compile `tables` into a new engine state. Parts whose inputs did not
+    change since `previous` (tone aliases, catalog categories, the
+    recommendation index) are reused instead of rebuilt.
+    """
+    prev_tables = previous["tables"] if previous else {}
+    changed = [name for name in TABLE_NAMES if prev_tables.get(name) != tables[name]]
+
+    if previous and "LEGACY_TONE_MAP" not in changed:
+        # Copy: the live state keeps serving (and caching aliases into
+        # its own table) while this one is built
+        aliases = dict(previous["aliases"])
+    else:
+        tone_map = tables["LEGACY_TONE_MAP"]
+        aliases = {raw: _scan_tone(tone_map, raw)
+                   for raw in list(tone_map.keys()) + list(tone_map.values())}
+
+    if catalog is None:
+        catalog = load_catalog(tables, previous=previous["catalog"] if previous else None)
+
+    dims = (
+        list(tables["FOUNDATION_PRODUCTS"].keys()),
+        list(tables["HAIRSTYLE_BY_FACE"].keys()),
+        list(tables["EVENT_CLOTHING"].keys()),
+        list(tables["BAG_MAP"].keys()),
+        list(tables["BODY_TYPE_FIT"].keys()),
+    )
+    for tone in dims[0]:
+        aliases.setdefault(tone, _scan_tone(tables["LEGACY_TONE_MAP"], tone))
+
+    if (previous and previous["catalog"].fingerprint == catalog.fingerprint
+            and previous["dims"] == dims):
+        index = previous["index"]
+    else:
+        index = {
+            (tone, face, gender, event, body): _compile_entry(catalog, tone, face, gender, event, body)
+            for tone in dims[0]
+            for face in dims[1]
+            for gender in dims[2]
+            for event in dims[3]
+            for body in dims[4]
+        }
+
+    blob = (json.dumps(tables, sort_keys=True)
+            + f"|catalog={catalog.fingerprint}|deterministic={DETERMINISTIC}")
 
-HAIRSTYLE_BY_FACE = {
-    "oval": ["Loose Waves", "Sleek Bun", "High Ponytail"],
-    "round": ["Long Layers", "Side Part", "Voluminous Bun"],
-    "square": ["Soft Waves", "Side Swept Hair"],
-    "heart": ["Low Bun", "Soft Curls"],
-}
+    return {
+        "tables": tables,
+        "aliases": aliases,
+        "catalog": catalog,
+        "dims": dims,
+        "index": index,
+        "fingerprint": hashlib.blake2b(blob.encode(), digest_size=16).hexdigest(),
+        "version": (previous["version"] + 1) if previous else 1,
+        "changed": changed,
+        "rebuilt_categories": list(catalog.rebuilt),
+    }
 
 
-# ============================================================
-# BODY TYPE → FIT
-# ============================================================
+def _publish(state: Dict[str, Any]) -> None:
+    """Swap in a compiled state and refresh the module-level table names."""
+    global _STATE, RULE_TABLES, CATALOG, RECOMMENDATION_INDEX
+    global TONES, FACES, GENDERS, EVENTS, BODY_TYPES
 
-BODY_TYPE_FIT = {
-    "slim": ["Tailored Fit", "Layered Outfits"],
-    "average": ["Classic Fit", "Balanced Silhouettes"],
-    "muscular": ["Structured Fit", "Relaxed Fit"],
-    "heavy": ["Straight Cut", "Flowy Fabrics"],
-}
+    _STATE = state
+    RULE_TABLES = state["tables"]
+    CATALOG = state["catalog"]
+    RECOMMENDATION_INDEX = state["index"]
+    TONES, FACES, GENDERS, EVENTS, BODY_TYPES = state["dims"]
+    globals().update(state["tables"])
 
-#ACCESSORY RULE TABLES
-#Face Shape → Accessory Shape
-ACCESSORIES_BY_FACE = {
-    "round": ["Long Drop Earrings", "Vertical Pendants"],
-    "oval": ["Stud Earrings", "Hoop Earrings"],
-    "square": ["Round Hoops", "Curved Necklaces"],
-    "heart": ["Teardrop Earrings", "Chokers"],
-}
 
-# Skin Tone → Metal / Color
-ACCESSORIES_BY_TONE = {
-    "porcelain": ["Silver Jewelry", "Pearl Accessories"],
-    "fair beige": ["Rose Gold Jewelry", "Pearls"],
-    "warm beige": ["Gold Jewelry", "Bronze Accessories"],
-    "tan": ["Antique Gold", "Beaded Jewelry"],
-    "caramel": ["Gold Jewelry", "Copper Accessories"],
-    "brown": ["Oxidized Silver", "Gold Jewelry"],
-    "deep brown": ["Bold Gold", "Black Metal Accessories"],
-}
+_STATE: Dict[str, Any] = {}
+RULE_TABLES: Dict[str, Any] = {}
+CATALOG: ProductCatalog
+RECOMMENDATION_INDEX: Dict[Tuple[str, str, str, str, str], Dict[str, Any]] = {}
+TONES: List[str] = []
+FACES: List[str] = []
+GENDERS: List[str] = []
+EVENTS: List[str] = []
+BODY_TYPES: List[str] = []
 
-# Event → Styling Level
-ACCESSORIES_BY_EVENT = {
-    "casual": ["Minimal Accessories"],
-    "formal": ["Elegant Jewelry"],
-    "party": ["Statement Accessories"],
-    "wedding": ["Traditional Jewelry"],
-}
+_publish(_build_state(load_rule_tables()))
 
 
 # ============================================================
-# SKIN TONE → COLOR PALETTE
+# SKIN TONE NORMALIZATION
 # ============================================================
 
-CLOTHING_COLORS = {
-    "porcelain": ["Pastel Blue", "Lavender", "Rose Pink"],
-    "fair beige": ["Peach", "Sky Blue", "Blush Pink"],
-    "warm beige": ["Mustard", "Olive", "Teal"],
-    "tan": ["Emerald Green", "Rust", "Navy Blue"],
-    "caramel": ["Wine", "Gold", "Deep Teal"],
-    "brown": ["Burgundy", "Forest Green", "Royal Blue"],
-    "deep brown": ["Plum", "Black", "Metallic Gold"],
-}
+def current_state() -> Dict[str, Any]:
+    """The live compiled state; take it once per request."""
+    return _STATE
 
 
-# ============================================================
-# EVENT & GENDER → CLOTHING
-# ============================================================
+def resolve_tone(raw: str, state: Optional[Dict[str, Any]] = None) -> str:
+    """Canonical tone through the precompiled alias table."""
+    key = _key(raw)
+    if not key:
+        return "warm beige"
+    state = state or _STATE
+    aliases = state["aliases"]
+    tone = aliases.get(key)
+    if tone is None:
+        tone = _scan_tone(state["tables"]["LEGACY_TONE_MAP"], key)
+        if len(aliases) < _TONE_ALIAS_LIMIT:
+            aliases[key] = tone
+    return tone
 
-EVENT_CLOTHING = {
-    "female": {
-        "casual": ["T-shirt", "Jeans", "Kurti"],
-        "formal": ["Blazer", "Trousers", "Midi Dress"],
-        "party": ["Bodycon Dress", "Satin Skirt"],
-        "wedding": ["Saree", "Lehenga", "Anarkali"],
-    },
-    "male": {
-        "casual": ["T-shirt", "Jeans"],
-        "formal": ["Blazer", "Trousers"],
-        "party": ["Printed Shirt"],
-        "wedding": ["Sherwani", "Kurta Pyjama"],
-    },
-}
 
-BAG_MAP = {
-    "casual": ["Crossbody Bag"],
-    "formal": ["Structured Handbag"],
-    "party": ["Clutch"],
-    "wedding": ["Potli Bag"],
-}
+def normalize_tone(raw: str) -> str:
+    return resolve_tone(raw)
 
-SHOE_MAP = {
-    "female": {
-        "casual": ["Sneakers"],
-        "formal": ["Block Heels"],
-        "party": ["Stilettos"],
-        "wedding": ["Juttis"],
-    },
-    "male": {
-        "casual": ["Sneakers"],
-        "formal": ["Oxford Shoes"],
-        "party": ["Designer Shoes"],
-        "wedding": ["Mojaris"],
-    },
-}
+
+def lookup_entry(req: RecommendationRequest, state: Optional[Dict[str, Any]] = None
+                 ) -> Tuple[Tuple[str, str, str, str, str], Dict[str, Any]]:
+    """Normalized index key and compiled entry for a request."""
+    state = state or _STATE
+    face, gender, event = _key(req.face_shape), _key(req.gender), _key(req.event)
+    tone = resolve_tone(req.skin_tone, state)
+    body = _key(req.body_type)
+
+    entry = state["index"].get((tone, face, gender, event, body))
+    if entry is None:
+        tables = state["tables"]
+        if face not in tables["HAIRSTYLE_BY_FACE"]:
+            raise KeyError(f"Unsupported face_shape: {req.face_shape!r}")
+        if gender not in tables["EVENT_CLOTHING"]:
+            raise KeyError(f"Unsupported gender: {req.gender!r}")
+        if event not in tables["BAG_MAP"]:
+            raise KeyError(f"Unsupported event: {req.event!r}")
+        # Unknown body types only change the summary wording
+        entry = _compile_entry(state["catalog"], tone, face, gender, event, body)
+    return (tone, face, gender, event, body), entry
+
+
+def rules_fingerprint(state: Optional[Dict[str, Any]] = None) -> str:
+    """Changes whenever any rule table, the catalog or the seeding mode changes."""
+    return (state or _STATE)["fingerprint"]
+
+
+# ACCESSORY GENERATION FUNCTION
+def generate_accessories(face: str, tone: str, event: str, rng=random) -> List[str]:
+    tables = _STATE["tables"]
+    face_items = tables["ACCESSORIES_BY_FACE"].get(face, ["Stud Earrings"])
+    tone_items = tables["ACCESSORIES_BY_TONE"].get(tone, ["Gold Jewelry"])
+    event_items = tables["ACCESSORIES_BY_EVENT"].get(event, ["Minimal Accessories"])
+
+    # Combine intelligently (dedupe in a stable order — set order
+    # depends on the per-process string hash seed)
+    return list(dict.fromkeys([
+        rng.choice(face_items),
+        rng.choice(tone_items),
+        rng.choice(event_items),
+    ]))
 
 
 # ============================================================
-# DYNAMIC SUMMARY
+# RELOAD
 # ============================================================
+# reload_rules() re-reads the rules file (and the catalog file, if one
+# is configured), recompiles only what changed and swaps the state in
+# one assignment. Classifier models living in the same process are not
+# touched. The watcher thread calls it whenever a file's mtime moves.
+
+_reload_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+
+
+def set_catalog(catalog: ProductCatalog) -> None:
+    """Recompile the index against another catalog and swap it in."""
+    with _reload_lock:
+        _publish(_build_state(_STATE["tables"], previous=_STATE, catalog=catalog))
+
+
+def reload_rules(path: str = RULES_PATH) -> Dict[str, Any]:
+    with _reload_lock:
+        t0 = time.perf_counter()
+        state = _build_state(load_rule_tables(path), previous=_STATE)
+        unchanged = state["fingerprint"] == _STATE["fingerprint"]
+        if not unchanged:
+            _publish(state)
+        info = {
+            "reloaded": not unchanged,
+            "version": _STATE["version"],
+            "fingerprint": _STATE["fingerprint"],
+            "changed_tables": state["changed"],
+            "rebuilt_categories": state["rebuilt_categories"],
+            "seconds": round(time.perf_counter() - t0, 4),
+        }
+    if not unchanged:
+        logger.info("Recommendation rules reloaded: %s", info)
+    return info
+
+
+def _mtimes() -> Tuple:
+    out = []
+    for path in (RULES_PATH, CATALOG_PATH):
+        try:
+            out.append(os.stat(path).st_mtime_ns if path else None)
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+def _watch(interval: float) -> None:
+    last = _mtimes()
+    while True:
+        time.sleep(interval)
+        current = _mtimes()
+        if current == last:
+            continue
+        last = current
+        try:
+            reload_rules()
+        except Exception:
+            # Keep serving the previous state on a bad edit
+            logger.exception("Recommendation rules reload failed")
+
+
+def start_rules_watcher(interval: float = RULES_RELOAD_INTERVAL) -> bool:
+    """Start the background file watcher once per process."""
+    global _watcher
+    if interval <= 0 or _watcher is not None:
+        return False
+    _watcher = threading.Thread(target=_watch, args=(interval,),
+                                name="rules-watcher", daemon=True)
+    _watcher.start()
+    return True
 
-def generate_summary(req: RecommendationRequest, tone: str) -> str:
-    return (
-        f"For the {tone} skin tone and {req.face_shape.lower()} face shape, "
-        f"the AI suggests suitable makeup shades and hairstyles. "
-        f"Based on the {req.body_type.lower()} body type and {req.event.lower()} event, "
-        f"it recommends well-fitted outfits, accessories, and footwear for a complete look."
-    )
 
-# ACCESSORY GENERATION FUNCTION
-def generate_accessories(face: str, tone: str, event: str) -> List[str]:
-    face_items = ACCESSORIES_BY_FACE.get(face, ["Stud Earrings"])
-    tone_items = ACCESSORIES_BY_TONE.get(tone, ["Gold Jewelry"])
-    event_items = ACCESSORIES_BY_EVENT.get(event, ["Minimal Accessories"])
+# ============================================================
+# DETERMINISTIC SEEDING
+# ============================================================
+# With DETERMINISTIC on (default), the picks are seeded from the
+# normalized request (+ variant), so identical requests give identical
+# bodies in every worker and can be cached. An explicit `seed` wins.
+
+
+def request_seed(key: Tuple[str, str, str, str, str], req: RecommendationRequest) -> int:
+    seed = getattr(req, "seed", None)
+    if seed is not None:
+        return int(seed)
+    variant = getattr(req, "variant", None) or 0
+    # Not hash(): str hashing is salted per process
+    digest = hashlib.blake2b(f"{'|'.join(key)}|{variant}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
 
-    # Combine intelligently
-    return list({
-        random.choice(face_items),
-        random.choice(tone_items),
-        random.choice(event_items),
-    })
+def cache_key(req: RecommendationRequest, state: Optional[Dict[str, Any]] = None) -> Optional[Tuple]:
+    """Key identifying the response body, or None when not deterministic."""
+    if not DETERMINISTIC:
+        return None
+    state = state or _STATE
+    key, _ = lookup_entry(req, state)
+    return key + (request_seed(key, req), rules_fingerprint(state))
 
 
+def _rng_for(key: Tuple[str, str, str, str, str], req: RecommendationRequest):
+    if not DETERMINISTIC:
+        return random
+    return random.Random(request_seed(key, req))
+
 
 # ============================================================
 # MAIN RECOMMENDATION ENGINE (MODEL SAFE)
 # ============================================================
 
-def make_recommendation(req: RecommendationRequest) -> Dict[str, Any]:
-
-    tone = normalize_tone(req.skin_tone)
-    face = req.face_shape.lower()
-    gender = req.gender.lower()
-    event = req.event.lower()
-    body = req.body_type.lower()
+def make_recommendation(req: RecommendationRequest,
+                        state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    key, entry = lookup_entry(req, state)
+    return build_recommendation(entry, _rng_for(key, req))
+
+
+def make_recommendations(reqs: List[RecommendationRequest]) -> List[Dict[str, Any]]:
+    """
+    Batch version of make_recommendation. Repeated requests inside the
+    batch reuse one index lookup, and the tone of a profile sent with
+    several events is resolved once through the alias table.
+    """
+    state = _STATE
+    entries: Dict[Tuple[str, str, str, str, str], Tuple] = {}
+    results = []
+    for req in reqs:
+        raw = (req.skin_tone, req.face_shape, req.gender, req.event, req.body_type)
+        found = entries.get(raw)
+        if found is None:
+            found = entries[raw] = lookup_entry(req, state)
+        key, entry = found
+        results.append(build_recommendation(entry, _rng_for(key, req)))
+    return results
+
+
+def build_recommendation(entry: Dict[str, Any], rng=random) -> Dict[str, Any]:
+    choice = rng.choice
 
     # ---------------- MAKEUP ----------------
     makeup = {
-        "foundation": random.choice(FOUNDATION_PRODUCTS[tone]),
-        "lipstick": random.choice(LIPSTICK_PRODUCTS[tone]),
-        "blush": random.choice(BLUSH_PRODUCTS[tone]),
-        "hairstyles": HAIRSTYLE_BY_FACE.get(face, HAIRSTYLE_BY_FACE[face]),
-        "hairColors": HAIR_COLOR_BY_TONE[tone],  
-        "accessories": generate_accessories(face, tone, event),
+        "foundation": choice(entry["foundation"]),
+        "lipstick": choice(entry["lipstick"]),
+        "blush": choice(entry["blush"]),
+        "hairstyles": entry["hairstyles"],
+        "hairColors": entry["hairColors"],
+        "accessories": list(dict.fromkeys([
+            choice(entry["acc_face"]),
+            choice(entry["acc_tone"]),
+            choice(entry["acc_event"]),
+        ])),
     }
 
     # ---------------- FASHION ----------------
-    palette = CLOTHING_COLORS[tone]
-    body_fit = BODY_TYPE_FIT.get(body, ["Classic Fit"])
-    clothing_items = EVENT_CLOTHING[gender][event]
-
     outfits: List[Dict[str, str]] = []
-    for item in clothing_items:
-        color = random.choice(palette)
-        outfits.append({
-            "item": item,
-            "color": color,
-            "link": f"https://www.google.com/search?q={item.replace(' ','+')}+{color.replace(' ','+')}"
-        })
+    for item, options in entry["outfits"]:
+        color, link = choice(options)
+        outfits.append({"item": item, "color": color, "link": link})
 
+    palette = entry["palette"]
     fashion = {
         "colorPalette": palette,
         "recommendedColor": palette[0],
         "outfits": outfits,
-        "bag": random.choice(BAG_MAP[event]),
-        "shoes": random.choice(SHOE_MAP[gender][event]),
+        "bag": choice(entry["bag"]),
+        "shoes": choice(entry["shoes"]),
     }
 
     return {
         "makeup": makeup,
         "fashion": fashion,
-        "summary": generate_summary(req, tone),
+        "summary": entry["summary"],
     }
@@ -0,0 +1,319 @@
+# ============================================================
+# result_cache.py — RESULT CACHES (IN-PROCESS / SHARED)
+# ============================================================
+# LRUCache      small thread-safe LRU for computed responses and
+#               analysis results; values are stored as-is.
+# SQLiteCache   same interface, one SQLite file shared by every
+#               worker on the host (values as JSON, arrays and bytes
+#               base64-tagged; never pickle, so a tampered file can't
+#               run code), so a retry hits no matter which worker it
+#               lands on.
+# make_cache()  picks one for analysis results:
+#               AURA_CACHE_BACKEND=memory|sqlite|auto (auto = sqlite
+#               with more than one worker: AURA_WORKERS,
+#               WEB_CONCURRENCY, UVICORN_WORKERS or `--workers N` on
+#               the command line), AURA_CACHE_PATH.
+#
+# Every cache registers itself so /metrics can report hit rates.
+# ============================================================
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from runtime_config import worker_count
+
+logger = logging.getLogger("aura")
+
+_caches = weakref.WeakSet()
+
+
+def all_caches():
+    return sorted(_caches, key=lambda c: c.name)
+
+
+def _sizeof(obj):
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(_sizeof(o) for o in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_sizeof(k) + _sizeof(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, name="cache"):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _caches.add(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def approx_bytes(self):
+        """Rough footprint of keys + values (O(n); diagnostics only)."""
+        with self._lock:
+            items = list(self._data.items())
+        return sum(_sizeof(k) + _sizeof(v) for k, v in items)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backend": "memory",
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# ============================================================
+# SHARED (CROSS-WORKER) CACHE
+# ============================================================
+CACHE_BACKEND = os.environ.get("AURA_CACHE_BACKEND", "auto").lower()
+CACHE_PATH = os.environ.get("AURA_CACHE_PATH", "cache/results.sqlite3")
+
+# Hits only rewrite the access time when it is older than this, so
+# reads stay reads; eviction order is LRU to this granularity.
+_TOUCH_SECONDS = 30.0
+# Sets between eviction passes (per process); the table may overshoot
+# maxsize by about this many entries per worker in between.
+_EVICT_EVERY = 32
+
+
+# Tuples come back as lists; callers only unpack / index them
+def _encode_default(obj):
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return {"__bytes__": base64.b64encode(bytes(obj)).decode("ascii")}
+    if hasattr(obj, "dtype") and hasattr(obj, "shape"):
+        if not obj.shape:                      # NumPy scalar
+            return obj.item()
+        if obj.dtype.hasobject:
+            raise TypeError("object arrays are not cacheable")
+        return {"__ndarray__": base64.b64encode(obj.tobytes()).decode("ascii"),
+                "dtype": obj.dtype.str, "shape": list(obj.shape)}
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not cacheable")
+
+
+def _decode_hook(d):
+    if "__bytes__" in d:
+        return base64.b64decode(d["__bytes__"])
+    if "__ndarray__" in d:
+        import numpy as np
+        data = base64.b64decode(d["__ndarray__"])
+        return np.frombuffer(data, dtype=np.dtype(d["dtype"])).reshape(d["shape"]).copy()
+    return d
+
+
+def encode_value(value):
+    return json.dumps(value, default=_encode_default, separators=(",", ":")).encode("utf-8")
+
+
+def decode_value(blob):
+    return json.loads(bytes(blob), object_hook=_decode_hook)
+
+
+class SQLiteCache:
+    """
+    LRUCache interface over a table in a SQLite file (WAL mode). Each
+    name is its own namespace, so several caches share one file.
+    Writes are single transactions, so readers never see a partial
+    entry. Errors are logged and treated as misses; the cache never
+    fails a request.
+    """
+
+    def __init__(self, path=CACHE_PATH, maxsize=1024, name="cache"):
+        self.path = path
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._sets = 0
+        self._local = threading.local()
+        self._stat_lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " atime REAL NOT NULL, PRIMARY KEY (ns, key)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_atime ON entries (ns, atime)")
+        _caches.add(self)
+
+    def _conn(self):
+        # One connection per thread and per process (forked workers
+        # must not reuse the parent's)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._stat_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, atime FROM entries WHERE ns = ? AND key = ?",
+                (self.name, str(key)),
+            ).fetchone()
+            if row is None:
+                self._count(False)
+                return default
+            value = decode_value(row[0])
+            now = time.time()
+            if now - row[1] > _TOUCH_SECONDS:
+                conn.execute("UPDATE entries SET atime = ? WHERE ns = ? AND key = ?",
+                             (now, self.name, str(key)))
+        except Exception:
+            logger.warning("⚠️ Shared cache '%s' read failed", self.name, exc_info=True)
+            self._count(False)
+            return default
+        self._count(True)
+        return value
+
+    def set(self, key, value):
+        try:
+            blob = encode_value(value)
+            conn = self._conn()
+            with self._stat_lock:
+                self._sets += 1
+                evict = self._sets % _EVICT_EVERY == 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO entries (ns, key, value, atime) VALUES (?, ?, ?, ?)",
+                             (self.name, str(key), blob, time.time()))
+                if evict:
+                    self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception:
+            logger.warning("⚠️ Shared cache '%s' write failed", self.name, exc_info=True)
+
+    def _evict(self, conn):
+        conn.execute(
+            "DELETE FROM entries WHERE ns = ? AND key IN ("
+            " SELECT key FROM entries WHERE ns = ? ORDER BY atime DESC LIMIT -1 OFFSET ?)",
+            (self.name, self.name, self.maxsize),
+        )
+
+    def delete(self, key):
+        try:
+            self._conn().execute("DELETE FROM entries WHERE ns = ? AND key = ?", (self.name, str(key)))
+        except Exception:
+            logger.warning("⚠️ Shared cache '%s' delete failed", self.name, exc_info=True)
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries WHERE ns = ?", (self.name,))
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM entries WHERE ns = ?",
+                                    (self.name,)).fetchone()[0]
+
+    def __contains__(self, key):
+        return self._conn().execute("SELECT 1 FROM entries WHERE ns = ? AND key = ?",
+                                    (self.name, str(key))).fetchone() is not None
+
+    def approx_bytes(self):
+        """Encoded size of the values in this namespace."""
+        return self._conn().execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM entries WHERE ns = ?",
+                                    (self.name,)).fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backend": "sqlite",
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def cache_backend():
+    """"memory" or "sqlite", resolving AURA_CACHE_BACKEND=auto."""
+    if CACHE_BACKEND == "auto":
+        return "sqlite" if worker_count() > 1 else "memory"
+    return CACHE_BACKEND
+
+
+def make_cache(name, maxsize):
+    """Cache for analysis results: shared across workers when configured (see top)."""
+    if cache_backend() == "sqlite":
+        try:
+            return SQLiteCache(CACHE_PATH, maxsize=maxsize, name=name)
+        except Exception:
+            logger.exception("Shared cache at %s unavailable; '%s' stays in-process", CACHE_PATH, name)
+    return LRUCache(maxsize=maxsize, name=name)
+
+
+def image_key(img):
+    """Content key of a decoded image (shape + pixels) or of raw bytes."""
+    h = hashlib.blake2b(digest_size=16)
+    shape = getattr(img, "shape", None)
+    if shape is not None:
+        h.update(repr((shape, str(img.dtype))).encode())
+        h.update(memoryview(img if img.flags["C_CONTIGUOUS"] else img.copy()).cast("B"))
+    else:
+        h.update(img)
+    return h.hexdigest()
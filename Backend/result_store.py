@@ -0,0 +1,304 @@
+# ============================================================
+# result_store.py — PERSISTENT FACE ANALYSIS RESULTS
+# ============================================================
+# Optional on-disk store behind the in-memory / shared caches
+# (result_cache.py) that survives restarts, deploys and
+# /api/reload-models, so a release doesn't start with every photo
+# needing a full inference again.
+#
+#   key      image content digest (result_cache.image_key) + the
+#            model version: a digest of the face shape weights, the
+#            skin tone backend (STONE version / CNN weights) and the
+#            pipeline settings (predict_tone_shape.model_version())
+#   value    JSON (orjson when installed), zlib-compressed
+#   writes   write-behind: put() only enqueues; one background thread
+#            batches them into a transaction (dropped if the queue is
+#            full — it's a cache)
+#   eviction least recently used rows once the file holds more than
+#            AURA_RESULT_STORE_MAX_MB of values
+#   versions rows of other model versions (an older release, or a
+#            worker with other settings sharing the file mid-deploy)
+#            are never read; they age out through the LRU eviction
+#
+# Enable with AURA_RESULT_STORE=path/to/results.db (off by default).
+# One SQLite file (WAL) may be shared by every worker on the host.
+# ============================================================
+
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+import fast_json
+import metrics
+
+logger = logging.getLogger("aura")
+
+STORE_PATH = os.environ.get("AURA_RESULT_STORE", "")
+MAX_BYTES = int(float(os.environ.get("AURA_RESULT_STORE_MAX_MB", "256")) * 1024 * 1024)
+
+_QUEUE_SIZE = 4096
+_BATCH = 64
+_FLUSH_SECONDS = 0.5
+_COMPRESS_OVER = 256      # bytes; smaller values are stored raw
+
+_RAW, _ZLIB = b"j", b"z"
+
+
+def encode(value):
+    data = fast_json.dumps(value)
+    if len(data) > _COMPRESS_OVER:
+        return _ZLIB + zlib.compress(data, 6)
+    return _RAW + data
+
+
+def decode(blob):
+    blob = bytes(blob)
+    data = zlib.decompress(blob[1:]) if blob[:1] == _ZLIB else blob[1:]
+    if fast_json.ORJSON_AVAILABLE:
+        return fast_json.orjson.loads(data)
+    return fast_json.json.loads(data)
+
+
+class ResultStore:
+    def __init__(self, path, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.dropped = 0
+        self.evicted = 0
+        self._local = threading.local()
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT NOT NULL PRIMARY KEY, version TEXT NOT NULL,"
+            " value BLOB NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_atime ON results (atime)")
+        conn.execute("CREATE INDEX IF NOT EXISTS results_version ON results (version)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # -------------------- read --------------------
+    def get(self, digest, version):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM results WHERE key = ?", (f"{version}:{digest}",)
+            ).fetchone()
+            value = decode(row[0]) if row is not None else None
+        except Exception:
+            logger.warning("⚠️ Result store read failed", exc_info=True)
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is not None:
+            self._enqueue(("touch", f"{version}:{digest}"))
+        return value
+
+    # -------------------- write-behind --------------------
+    def put(self, digest, version, value):
+        try:
+            blob = encode(value)
+        except Exception:
+            logger.warning("⚠️ Result not storable", exc_info=True)
+            return
+        self._enqueue(("put", f"{version}:{digest}", version, blob))
+
+    def _enqueue(self, op):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self):
+        # One writer per process; forked workers start their own
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=_QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._write_loop, name="aura-result-store",
+                                            daemon=True)
+            self._writer.start()
+            self._writer_pid = os.getpid()
+
+    def _write_loop(self):
+        while True:
+            ops = [self._queue.get()]
+            deadline = time.monotonic() + _FLUSH_SECONDS
+            while len(ops) < _BATCH:
+                try:
+                    ops.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._apply(ops)
+            except Exception:
+                logger.warning("⚠️ Result store write failed (%d ops)", len(ops), exc_info=True)
+            finally:
+                for _ in ops:
+                    self._queue.task_done()
+
+    def _apply(self, ops):
+        if not ops:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            puts = 0
+            for op in ops:
+                if op[0] == "put":
+                    _, key, version, blob = op
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, version, value, size, atime)"
+                        " VALUES (?, ?, ?, ?, ?)", (key, version, blob, len(blob), now))
+                    puts += 1
+                elif op[0] == "touch":
+                    conn.execute("UPDATE results SET atime = ? WHERE key = ?", (now, op[1]))
+            if puts:
+                self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.writes += puts
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Down to 90% so eviction doesn't run on every batch
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY atime"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        with self._lock:
+            self.evicted += len(victims)
+
+    def flush(self, timeout=5.0):
+        """Wait (up to timeout) until queued writes are on disk."""
+        if self._writer_pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def stats(self):
+        try:
+            entries, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "writes": self.writes,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "queued": self._queue.qsize() if self._writer_pid == os.getpid() else 0,
+        }
+
+
+# ============================================================
+# MODEL VERSIONS
+# ============================================================
+_digests = {}
+
+
+def file_digest(path):
+    """Content digest of a weights file; recomputed only when it changes on disk."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    sig = (st.st_size, st.st_mtime_ns)
+    cached = _digests.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    _digests[path] = (sig, h.hexdigest())
+    return _digests[path][1]
+
+
+# ============================================================
+# PROCESS-WIDE STORE
+# ============================================================
+_store = None
+_store_failed = False      # open failed once: logged, not retried per request
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The configured store, or None when AURA_RESULT_STORE is unset / unusable."""
+    global _store, _store_failed
+    if _store is not None or _store_failed or not STORE_PATH:
+        return _store
+    with _store_lock:
+        if _store is None and not _store_failed:
+            try:
+                _store = ResultStore(STORE_PATH)
+                atexit.register(_store.flush)
+                logger.info("✔ Persistent result store at %s (cap %d MB)",
+                            STORE_PATH, MAX_BYTES // (1024 * 1024))
+            except Exception:
+                _store_failed = True
+                logger.exception("Result store at %s unavailable; running without it", STORE_PATH)
+    return _store
+
+
+def _store_stats():
+    store = _store
+    if store is None:
+        return {}
+    s = store.stats()
+    return {k: s[k] for k in ("hits", "misses", "writes", "dropped", "evicted", "entries", "bytes")
+            if s[k] is not None}
+
+
+metrics.register_gauge("aura_result_store", "Persistent result store counters",
+                       _store_stats, ("stat",))
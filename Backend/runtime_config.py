@@ -0,0 +1,142 @@
+# ============================================================
+# runtime_config.py — PER-WORKER THREAD CONFIGURATION
+# ============================================================
+# Every uvicorn worker runs its own torch, OpenCV and MediaPipe
+# thread pools. Left alone, each of them sizes itself to the whole
+# machine, so N workers oversubscribe the CPU N times over.
+#
+# One config (environment variables) drives all of them:
+#   AURA_WORKERS                worker processes on this node
+#                               (falls back to WEB_CONCURRENCY,
+#                               UVICORN_WORKERS, uvicorn's own
+#                               `--workers N`, then 1; worker_count())
+#   AURA_TORCH_THREADS          torch intra-op threads
+#   AURA_TORCH_INTEROP_THREADS  torch inter-op threads
+#   AURA_CV2_THREADS            OpenCV threads
+#
+# Thread counts default to cores // workers. MediaPipe does not expose
+# its TFLite pool size to Python, so it is only reported, not set.
+#
+# apply_runtime_config() must run before torch/cv2 are imported
+# elsewhere (main.py calls it first thing).
+# ============================================================
+
+import os
+import logging
+import sys
+
+logger = logging.getLogger("aura")
+
+_applied = None
+
+
+def _env_int(name, default):
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, raw)
+        return default
+
+
+def worker_count(argv=None):
+    """
+    Worker processes on this node. `uvicorn main:app --workers N` sets
+    no env var, but its workers inherit the master's argv.
+    """
+    for name in ("AURA_WORKERS", "WEB_CONCURRENCY", "UVICORN_WORKERS"):
+        if os.environ.get(name, "").strip():
+            return _env_int(name, 1)
+    args = sys.argv[1:] if argv is None else argv
+    for i, arg in enumerate(args):
+        value = None
+        if arg == "--workers" and i + 1 < len(args):
+            value = args[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        if value is not None:
+            try:
+                return max(1, int(value))
+            except ValueError:
+                return 1
+    return 1
+
+
+def load_runtime_config():
+    cores = os.cpu_count() or 1
+    workers = worker_count()
+    per_worker = max(1, cores // workers)
+
+    return {
+        "cpu_count": cores,
+        "workers": workers,
+        "torch_threads": _env_int("AURA_TORCH_THREADS", per_worker),
+        "torch_interop_threads": _env_int("AURA_TORCH_INTEROP_THREADS", 1),
+        "cv2_threads": _env_int("AURA_CV2_THREADS", per_worker),
+    }
+
+
+def apply_runtime_config(config=None):
+    """Apply thread limits once per process and return the config used."""
+    global _applied
+
+    if _applied is not None:
+        return _applied
+
+    config = config or load_runtime_config()
+
+    # Native BLAS/OpenMP pools read these at library load time
+    threads = str(config["torch_threads"])
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, threads)
+
+    import cv2
+    import torch
+
+    torch.set_num_threads(config["torch_threads"])
+    try:
+        torch.set_num_interop_threads(config["torch_interop_threads"])
+    except RuntimeError:
+        # Only allowed before the first inter-op parallel call
+        logger.warning("torch inter-op threads already fixed at %d",
+                       torch.get_num_interop_threads())
+
+    cv2.setNumThreads(config["cv2_threads"])
+
+    logger.info("Runtime threads: torch=%d interop=%d cv2=%d (workers=%d, cores=%d)",
+                config["torch_threads"], config["torch_interop_threads"],
+                config["cv2_threads"], config["workers"], config["cpu_count"])
+
+    _applied = config
+    return config
+
+
+def _process_thread_count():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def runtime_diagnostics():
+    import cv2
+    import torch
+
+    return {
+        "pid": os.getpid(),
+        "config": _applied or load_runtime_config(),
+        "effective": {
+            "torch_threads": torch.get_num_threads(),
+            "torch_interop_threads": torch.get_num_interop_threads(),
+            "cv2_threads": cv2.getNumThreads(),
+            "omp_num_threads": os.environ.get("OMP_NUM_THREADS"),
+            "mediapipe_threads": "not configurable (TFLite default)",
+        },
+        "process_threads": _process_thread_count(),
+    }
@@ -0,0 +1,184 @@
+# ============================================================
+# serve.py — PRELOAD-THEN-FORK SERVING (COPY-ON-WRITE MODELS)
+# ============================================================
+# `uvicorn main:app --workers N` imports main.py in every worker, so
+# the face shape EfficientNet, STONE, the recommendation tables and
+# the rest of the Python heap exist N times. Here the master:
+#
+#   1. imports main (app, routers, rules, product catalog) and opens
+#      the recommendation matrix (an mmap, shared by the page cache)
+#   2. loads AURA_PRELOAD_MODELS (default: face shape, STONE and, with
+#      AURA_SKIN_TONE_BACKEND=cnn, the skin tone CNN) through
+#      model_registry.py — weights only, no inference, so no OpenMP /
+#      MediaPipe threads exist yet
+#   3. gc.freeze()s the heap and forks N workers on one listening
+#      socket; each runs uvicorn on it
+#
+# Workers then share those pages copy-on-write:
+#   - torch parameters live in separate storage buffers; only the
+#     small tensor wrapper objects see refcount writes, and inference
+#     runs under no_grad, so the weight pages themselves stay shared
+#   - gc.disable() during the preload + gc.freeze() before the fork
+#     keep the collector from writing the GC headers of every object
+#     (which would copy nearly every heap page in every worker)
+#   - MediaPipe graphs (FaceMesh, FaceLandmarker) start their own
+#     threads and are not fork-safe; each worker builds its own on
+#     startup (AURA_WARMUP_MODELS), as does the warm-up forward pass
+#
+# The master restarts workers that die. SIGTERM / SIGINT stop all.
+#
+# Usage:
+#   python serve.py --workers 4 --port 8000
+#   AURA_PRELOAD_MODELS=face_shape,stone python serve.py -w 2
+#
+# bench_worker_memory.py compares per-worker USS / PSS with the
+# plain `uvicorn --workers` setup. Linux / macOS only (os.fork).
+# ============================================================
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+
+def default_preload():
+    """face_shape + STONE, and the skin tone CNN only when it serves (AURA_SKIN_TONE_BACKEND=cnn)."""
+    names = ["face_shape", "stone"]
+    if os.environ.get("AURA_SKIN_TONE_BACKEND", "stone").lower() == "cnn":
+        names.append("skin_tone_cnn")
+    return ",".join(names)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Preload models, then fork uvicorn workers")
+    parser.add_argument("-w", "--workers", type=int,
+                        default=int(os.environ.get("AURA_WORKERS", os.environ.get("WEB_CONCURRENCY", "2"))))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="warning", help="uvicorn log level")
+    return parser.parse_args()
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload(names):
+    """Everything the workers should share; runs once, in the master."""
+    import main
+    from model_registry import registry
+    from recommendation_matrix import get_matrix
+
+    loaded = registry.warm_up(names, inference=False)
+    get_matrix()
+    return main, registry, loaded
+
+
+def run_worker(app, sock, log_level):
+    import uvicorn
+    import logging_config
+
+    # The log writer thread and the collector were stopped in the master
+    logging_config.start_listener()
+    gc.enable()
+
+    # log_config=None keeps logging_config's queue handler on the root logger
+    config = uvicorn.Config(app, log_level=log_level, log_config=None, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    args = parse_args()
+    if not hasattr(os, "fork"):
+        raise SystemExit("serve.py needs os.fork(); use `uvicorn main:app --workers N` here")
+
+    # Thread limits (runtime_config.py) are sized per worker
+    os.environ["AURA_WORKERS"] = str(args.workers)
+    preload_names = [
+        n.strip() for n in os.environ.get("AURA_PRELOAD_MODELS", default_preload()).split(",") if n.strip()
+    ]
+
+    # No collections while the shared heap is built (freed holes in
+    # pages would be reused, and written, by every worker later)
+    gc.disable()
+    t0 = time.perf_counter()
+    app_module, registry, loaded = preload(preload_names)
+
+    import logging_config
+    import memory_diagnostics
+    logger = app_module.logger
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info("🚀 Preloaded %s in %.1f s (master pid %d, USS %.0f MB); forking %d workers on %s:%d",
+                ", ".join(n for n, r in loaded.items() if r["loaded"]) or "nothing",
+                time.perf_counter() - t0, os.getpid(),
+                (memory_diagnostics.uss_bytes() or 0) / memory_diagnostics.MB,
+                args.workers, args.host, args.port)
+
+    gc.freeze()
+    children = {}
+    stopping = False
+
+    def spawn(slot):
+        logging_config.stop_listener()   # flush; the queue is copied into the child
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                run_worker(app_module.app, sock, args.log_level)
+            except Exception:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                logging_config.stop_listener()
+                os._exit(code)
+        logging_config.start_listener()
+        children[pid] = slot
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for slot in range(args.workers):
+        spawn(slot)
+    gc.enable()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning("⚠️ Worker %d (slot %d) exited with status %d; restarting",
+                       pid, slot, os.waitstatus_to_exitcode(status))
+        time.sleep(1.0)
+        spawn(slot)
+
+    sock.close()
+    logger.info("Master %d stopped", os.getpid())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,22 +8,24 @@ import hashlib
 import tempfile
 import logging
 
+from model_registry import registry
+from result_cache import LRUCache
+
 logger = logging.getLogger("aura")
 
 # ============================================================
 # TRY IMPORT STONE
 # ============================================================
-try:
-    import stone
-    STONE_AVAILABLE = True
-except Exception:
-    STONE_AVAILABLE = False
+stone = registry.get_optional("stone")
+STONE_AVAILABLE = stone is not None
+if not STONE_AVAILABLE:
     logger.warning("STONE library not available")
 
 # ============================================================
 # CACHE (avoid recomputation)
 # ============================================================
-SKIN_CACHE = {}
+SKIN_CACHE = LRUCache(maxsize=int(os.environ.get("AURA_SKIN_CACHE_SIZE", "1024")),
+                      name="skin_tone_legacy")
 
 # ============================================================
 # HEX → HUMAN FRIENDLY NAME
@@ -82,8 +84,9 @@ def classify_skin_tone(img_bgr):
 
     try:
         md5 = hashlib.md5(img_bgr.tobytes()).hexdigest()
-        if md5 in SKIN_CACHE:
-            return SKIN_CACHE[md5]
+        cached = SKIN_CACHE.get(md5)
+        if cached is not None:
+            return cached
 
         # Save temp image
         with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
@@ -127,7 +130,7 @@ def classify_skin_tone(img_bgr):
             "method": "stone"
         }
 
-        SKIN_CACHE[md5] = out
+        SKIN_CACHE.set(md5, out)
         return out
 
     except Exception as e:
@@ -0,0 +1,169 @@
+# ============================================================
+# skin_tone_cnn.py — ResNetHSV SKIN TONE MODEL (TRAIN + SERVE)
+# ============================================================
+# Model and preprocessing shared by train_skin_tone.py (training)
+# and the backend (inference on the face crop from FaceMesh).
+#
+# Inference path:
+#   crop BGR -> mean HSV (on the raw crop, as in training)
+#            -> LAB histogram equalization of L (EqualizeLAB)
+#            -> 224x224 resize + ImageNet normalization
+#            -> ResNet18 features ++ HSV -> 3 classes
+# Everything is cv2/NumPy on the BGR crop, and several crops go
+# through one batched forward.
+#
+# Selected with AURA_SKIN_TONE_BACKEND=cnn (see predict_tone_shape);
+# STONE stays the fallback when the weights are missing.
+# ============================================================
+
+import os
+import logging
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision import models
+
+from model_registry import registry
+
+logger = logging.getLogger("aura")
+
+MODEL_PATH = os.environ.get("AURA_SKIN_TONE_MODEL", "models/skin_tone_cnn.pth")
+CLASS_NAMES = ['fair', 'medium', 'dark']
+INPUT_SIZE = 224
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+_NORM_SCALE = 1.0 / (255.0 * IMAGENET_STD)
+_NORM_BIAS = -IMAGENET_MEAN / IMAGENET_STD
+_HSV_SCALE = np.array([1 / 179.0, 1 / 255.0, 1 / 255.0], dtype=np.float32)
+
+
+# =================== MODEL (ResNet + HSV) ===================
+class ResNetHSV(nn.Module):
+    def __init__(self, num_classes=3, pretrained=True):
+        super().__init__()
+        weights = models.ResNet18_Weights.IMAGENET1K_V1 if pretrained else None
+        self.base = models.resnet18(weights=weights)
+        num_features = self.base.fc.in_features
+        self.base.fc = nn.Identity()  # remove default FC layer
+        self.classifier = nn.Sequential(
+            nn.Linear(num_features + 3, 256),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(256, num_classes)
+        )
+
+    def forward(self, x, hsv):
+        f = self.base(x)
+        combined = torch.cat((f, hsv), dim=1)
+        out = self.classifier(combined)
+        return out
+
+
+# =================== TRAINING PREPROCESSING (PIL) ===================
+class EqualizeLAB:
+    """Normalize lighting while keeping true skin tone."""
+    def __call__(self, img):
+        img = np.array(img)
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2LAB)
+        l, a, b = cv2.split(img)
+        l = cv2.equalizeHist(l)
+        img = cv2.merge((l, a, b))
+        img = cv2.cvtColor(img, cv2.COLOR_LAB2RGB)
+        return Image.fromarray(img)
+
+
+def compute_hsv_vector(img):
+    """Compute mean HSV values (scaled 0–1) for the image."""
+    np_img = np.array(img)
+    hsv = cv2.cvtColor(np_img, cv2.COLOR_RGB2HSV)
+    h_mean = hsv[:, :, 0].mean() / 179.0
+    s_mean = hsv[:, :, 1].mean() / 255.0
+    v_mean = hsv[:, :, 2].mean() / 255.0
+    return np.array([h_mean, s_mean, v_mean], dtype=np.float32)
+
+
+# =================== INFERENCE PREPROCESSING (BGR, vectorized) ===================
+def hsv_vector_bgr(crop_bgr):
+    """compute_hsv_vector for a BGR crop: one cvtColor + cv2.mean."""
+    hsv = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2HSV)
+    return np.asarray(cv2.mean(hsv)[:3], dtype=np.float32) * _HSV_SCALE
+
+
+def equalize_lab_bgr(crop_bgr):
+    """EqualizeLAB on a BGR crop (equalizes L in place, no PIL)."""
+    lab = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2LAB)
+    lab[:, :, 0] = cv2.equalizeHist(lab[:, :, 0])
+    return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+
+def preprocess_batch(crops_bgr):
+    """(N, 3, 224, 224) image tensor and (N, 3) HSV tensor."""
+    n = len(crops_bgr)
+    images = torch.empty((n, 3, INPUT_SIZE, INPUT_SIZE), dtype=torch.float32)
+    hsv = torch.empty((n, 3), dtype=torch.float32)
+    img_buf, hsv_buf = images.numpy(), hsv.numpy()
+
+    for i, crop in enumerate(crops_bgr):
+        hsv_buf[i] = hsv_vector_bgr(crop)
+        eq = equalize_lab_bgr(crop)
+        h, w = eq.shape[:2]
+        interp = cv2.INTER_AREA if (h > INPUT_SIZE or w > INPUT_SIZE) else cv2.INTER_LINEAR
+        resized = cv2.resize(eq, (INPUT_SIZE, INPUT_SIZE), interpolation=interp)
+        for c in range(3):
+            np.multiply(resized[:, :, 2 - c], _NORM_SCALE[c], out=img_buf[i, c], dtype=np.float32)
+            img_buf[i, c] += _NORM_BIAS[c]
+
+    return images, hsv
+
+
+# =================== SERVING ===================
+def build_model():
+    """Registry factory ("skin_tone_cnn"); raises if the weights are missing."""
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Skin tone CNN weights not found at {MODEL_PATH}")
+    model = ResNetHSV(len(CLASS_NAMES), pretrained=False)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location=DEVICE))
+    model.eval().to(DEVICE)
+    logger.info("✔ Skin tone CNN loaded from %s", MODEL_PATH)
+    return model
+
+
+def load_model():
+    """Shared instance, or None if unavailable (the failure is not retried until reload)."""
+    return registry.get_optional("skin_tone_cnn")
+
+
+def available():
+    return load_model() is not None
+
+
+def classify_skin_tone_cnn_batch(crops_bgr):
+    model = load_model()
+    if model is None:
+        raise RuntimeError("Skin tone CNN not available")
+
+    images, hsv = preprocess_batch(crops_bgr)
+    with torch.no_grad():
+        logits = model(images.to(DEVICE), hsv.to(DEVICE))
+        probs = torch.softmax(logits, dim=1).cpu().numpy()
+
+    out = []
+    for row in probs:
+        idx = int(np.argmax(row))
+        label = CLASS_NAMES[idx]
+        out.append({
+            "bucket": label.capitalize(),
+            "trained_label": label,
+            "confidence": float(row[idx]),
+            "method": "cnn",
+        })
+    return out
+
+
+def classify_skin_tone_cnn(crop_bgr):
+    return classify_skin_tone_cnn_batch([crop_bgr])[0]
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Backend modules are imported flat and read data/ relative to Backend/
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.chdir(BACKEND)
+
+import pytest
+
+# Everything main.py imports at module level (models load lazily)
+APP_DEPS = ("numpy", "cv2", "torch", "PIL", "mediapipe", "pydantic", "fastapi", "httpx")
+
+
+@pytest.fixture(scope="session")
+def client():
+    for mod in APP_DEPS:
+        pytest.importorskip(mod)
+    from fastapi.testclient import TestClient
+    import main
+    # Not entered as a context manager: no startup warm-up
+    return TestClient(main.app)
@@ -0,0 +1,26 @@
+PROFILE = {"face_shape": "Oval", "skin_tone": "Fair", "gender": "female", "body_type": "slim"}
+EVENTS = ["casual", "formal", "party", "wedding"]
+
+
+def test_profile_across_events_in_order(client):
+    r = client.post("/api/makeup_recommendation/batch", json={"profile": PROFILE, "events": EVENTS})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == len(EVENTS)
+    for event, result in zip(EVENTS, results):
+        single = client.post("/api/makeup_recommendation", json={**PROFILE, "event": event})
+        assert single.json() == result
+
+
+def test_requests_list(client):
+    reqs = [{**PROFILE, "event": e} for e in EVENTS[:2]]
+    r = client.post("/api/makeup_recommendation/batch", json={"requests": reqs})
+    assert r.status_code == 200 and len(r.json()["results"]) == 2
+
+
+def test_rejects_ambiguous_or_oversized_batches(client):
+    both = {"requests": [{**PROFILE, "event": "casual"}], "profile": PROFILE, "events": EVENTS}
+    assert client.post("/api/makeup_recommendation/batch", json=both).status_code == 422
+    assert client.post("/api/makeup_recommendation/batch", json={}).status_code == 422
+    many = {"requests": [{**PROFILE, "event": "casual"}] * 33}
+    assert client.post("/api/makeup_recommendation/batch", json=many).status_code == 413
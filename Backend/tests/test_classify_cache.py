@@ -0,0 +1,67 @@
+import pytest
+
+for _mod in ("numpy", "cv2", "torch", "PIL", "mediapipe", "fastapi"):
+    pytest.importorskip(_mod)
+
+import predict_tone_shape as pts
+from result_cache import LRUCache
+
+
+@pytest.fixture
+def version_inputs(monkeypatch):
+    calls = []
+
+    def fake_digest(path):
+        calls.append(path)
+        return "w1"
+
+    monkeypatch.setattr(pts, "file_digest", fake_digest)
+    pts.reset_model_version()
+    yield calls
+    pts.reset_model_version()
+
+
+def test_model_version_computed_once_per_process(version_inputs):
+    first = pts.model_version()
+    assert pts.model_version() == first
+    calls = len(version_inputs)
+    pts.model_version()
+    assert len(version_inputs) == calls
+
+
+def test_input_size_change_changes_version_and_clears_cache(version_inputs, monkeypatch):
+    cache = LRUCache(maxsize=8, name="classify-test")
+    cache.set("k", {"success": True})
+    monkeypatch.setattr(pts, "CLASSIFY_CACHE", cache)
+    old_size = pts.FACE_SHAPE_INPUT_SIZE
+    before = pts.model_version()
+    try:
+        pts.set_face_shape_input_size(old_size + 32)
+        assert pts.model_version() != before
+        assert len(cache) == 0
+    finally:
+        pts.set_face_shape_input_size(old_size)
+    assert pts.model_version() == before
+
+
+def result(shape="Oval", bucket="Fair"):
+    return {"success": True,
+            "face_shape": {"shape": shape, "confidence": 0.9},
+            "skin_tone": {"bucket": bucket, "confidence": 0.8}}
+
+
+@pytest.mark.parametrize("value, remembered", [
+    (result(), True),
+    ({"success": False, "error": "no_face_detected"}, True),
+    (result(bucket="Unknown"), False),     # STONE / CNN error fallback
+    (result(shape="Unknown"), False),
+])
+def test_remember_skips_unknown_fallbacks(monkeypatch, value, remembered):
+    cache = LRUCache(maxsize=8, name="classify-test")
+    stored = []
+    monkeypatch.setattr(pts, "CLASSIFY_CACHE", cache)
+    monkeypatch.setattr(pts, "get_store",
+                        lambda: type("S", (), {"put": lambda self, *a: stored.append(a)})())
+    pts.SkinFaceClassifierAPI._remember("d:v", "d", "v", value)
+    assert ("d:v" in cache) is remembered
+    assert bool(stored) is remembered
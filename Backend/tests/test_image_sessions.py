@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+for _mod in ("numpy", "cv2", "torch", "PIL", "mediapipe", "fastapi"):
+    pytest.importorskip(_mod)
+
+import numpy as np
+
+from face_landmarks import FaceLandmarks
+from image_sessions import ImageSession, ImageSessionStore, SharedSessions
+
+
+def image(nbytes):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+@pytest.fixture
+def store():
+    s = ImageSessionStore(max_bytes=1000, ttl=60)
+    s._shared = None
+    return s
+
+
+def add(store, image_id, nbytes):
+    session = ImageSession(image_id, image(nbytes), time.time() + 60, on_grow=store._trim)
+    store._add(session)
+    return session
+
+
+def test_landmarks_have_a_size():
+    lm = FaceLandmarks(np.zeros((478, 3), np.float32), 640, 480)
+    assert lm.nbytes == 478 * 12 + 478 * 16
+    assert lm.nbytes >= lm.norm.nbytes + lm.points.nbytes + lm.px.nbytes
+
+
+def test_memo_growth_evicts_over_budget(store):
+    old = add(store, "old", 400)
+    new = add(store, "new", 400)
+    assert store.get("old") is old          # old is now most recent
+    new_again = store.get("new")
+    new_again.memo("mask", lambda: image(300))
+    assert new.nbytes == 700
+    assert store.get("old") is None
+    assert store.stats()["evicted"] == 1
+
+
+def test_memo_counts_landmarks(store):
+    session = add(store, "s", 100)
+    lm = FaceLandmarks(np.zeros((478, 3), np.float32), 10, 10)
+    assert session.memo("guide_landmarks", lambda: lm) is lm
+    assert session.memo("guide_landmarks", lambda: 1 / 0) is lm
+    assert session.nbytes == 100 + lm.nbytes
+
+
+def test_expired_sessions_are_dropped(store):
+    session = add(store, "s", 100)
+    session.expires = time.time() - 1
+    assert store.get("s") is None
+
+
+def test_shared_store_capped_by_decoded_size(tmp_path):
+    shared = SharedSessions(str(tmp_path / "cache.sqlite3"), max_bytes=500)
+    later = time.time() + 60
+    shared.put("a", b"aa", 300, later)
+    shared.put("b", b"bb", 300, later)
+    assert shared.get("a") is None
+    assert shared.get("b") == (later, b"bb")
+
+
+def test_shared_expiry(tmp_path):
+    shared = SharedSessions(str(tmp_path / "cache.sqlite3"), max_bytes=10_000)
+    shared.put("gone", b"x", 10, time.time() - 1)
+    assert shared.get("gone") is None
+    # Deleted by the next write, not by the read
+    assert shared._conn().execute("SELECT COUNT(*) FROM image_sessions").fetchone()[0] == 1
+    shared.put("new", b"y", 10, time.time() + 60)
+    assert shared._conn().execute("SELECT id FROM image_sessions").fetchall() == [("new",)]
+
+
+def test_delete_of_other_workers_session(store, tmp_path):
+    store._shared = SharedSessions(str(tmp_path / "cache.sqlite3"))
+    store._shared.put("remote", b"x", 10, time.time() + 60)
+    assert store.delete("remote") is True
+    assert store.delete("remote") is False
@@ -0,0 +1,16 @@
+import profiler
+
+
+def test_memory_report_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/diagnostics/memory").status_code == 403
+    assert client.get("/api/diagnostics/memory",
+                      headers={"X-Admin-Token": "wrong"}).status_code == 403
+    r = client.get("/api/diagnostics/memory?top=5", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
+
+
+def test_memory_report_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "")
+    assert client.get("/api/diagnostics/memory",
+                      headers={"X-Admin-Token": ""}).status_code == 403
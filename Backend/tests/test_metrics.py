@@ -0,0 +1,54 @@
+import pytest
+
+import metrics
+from metrics import endpoint_label
+
+
+def scope(path, params=None, matched=True):
+    s = {"type": "http", "path": path, "method": "GET"}
+    if matched:
+        s["route"] = object()
+        s["path_params"] = params or {}
+    return s
+
+
+def test_label_is_full_path_with_params_templated():
+    assert endpoint_label(scope("/api/session/abc123", {"image_id": "abc123"})) == "/api/session/{image_id}"
+    assert endpoint_label(scope("/api/makeup_guide/health")) == "/api/makeup_guide/health"
+    assert endpoint_label(scope("/health")) == "/health"
+
+
+def test_unmatched_requests_share_one_label():
+    assert endpoint_label(scope("/wp-login.php", matched=False)) == "<unmatched>"
+
+
+def test_prefixed_router_labels():
+    fastapi = pytest.importorskip("fastapi")
+    testclient = pytest.importorskip("fastapi.testclient")
+
+    router = fastapi.APIRouter()
+
+    @router.get("/health")
+    async def sub_health():
+        return {}
+
+    @router.get("/{item_id}")
+    async def item(item_id: str):
+        return {}
+
+    app = fastapi.FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    app.include_router(router, prefix="/api/things")
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    client = testclient.TestClient(app)
+    for path in ("/health", "/api/things/health", "/api/things/a1", "/api/things/b2", "/nope"):
+        client.get(path)
+
+    seen = {labels[0] for labels in metrics.REQUESTS_TOTAL._values}
+    assert {"/health", "/api/things/health", "/api/things/{item_id}", "<unmatched>"} <= seen
+    assert "/api/things/a1" not in seen and "/{item_id}" not in seen
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from model_registry import ModelRegistry, ModelUnavailable
+
+
+class Graph:
+    built = 0
+
+    def __init__(self):
+        Graph.built += 1
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def registry():
+    reg = ModelRegistry()
+    reg.register("graph", Graph, pool_size=2)
+    return reg
+
+
+def test_lazy_single_load(registry):
+    before = Graph.built
+    first = registry.get("graph")
+    assert registry.get("graph") is first
+    assert Graph.built - before == 2
+    assert registry.status()["graph"]["instances"] == 2
+
+
+def test_failed_load_is_remembered_until_reload():
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise FileNotFoundError("weights.pth")
+
+    reg = ModelRegistry()
+    reg.register("broken", broken)
+    for _ in range(3):
+        assert reg.get_optional("broken") is None
+    assert len(calls) == 1
+    with pytest.raises(ModelUnavailable):
+        reg.get("broken")
+    reg.reload(["broken"])
+    assert reg.get_optional("broken") is None
+    assert len(calls) == 2
+
+
+def test_unknown_model():
+    with pytest.raises(KeyError):
+        ModelRegistry().get("nope")
+
+
+def test_reload_closes_idle_now_and_leased_on_return(registry):
+    with registry.lease("graph") as leased:
+        (idle,) = [g for g in registry._instances["graph"] if g is not leased]
+        registry.reload(["graph"])
+        assert idle.closed
+        assert not leased.closed
+        with registry.lease("graph") as fresh:
+            assert fresh is not leased and not fresh.closed
+    assert leased.closed
+
+
+def test_lease_during_reloads_never_sees_closed_instance(registry):
+    errors = []
+
+    def use():
+        for _ in range(200):
+            try:
+                with registry.lease("graph") as g:
+                    assert not g.closed
+            except Exception as e:      # KeyError / AssertionError
+                errors.append(e)
+
+    threads = [threading.Thread(target=use) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for _ in range(50):
+        registry.reload(["graph"])
+    for t in threads:
+        t.join()
+    assert errors == []
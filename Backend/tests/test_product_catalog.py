@@ -0,0 +1,25 @@
+import product_catalog
+from product_catalog import ProductCatalog
+
+
+def lipsticks(n):
+    return [{"category": "lipstick", "name": f"Shade {i}", "tones": ["porcelain"], "score": -i}
+            for i in range(n)]
+
+
+def test_top_k_keeps_every_rule_entry_by_default():
+    assert product_catalog.TOP_K is None
+    catalog = ProductCatalog(lipsticks(5))
+    assert catalog.top_k("lipstick", tone="porcelain") == [f"Shade {i}" for i in range(5)]
+
+
+def test_top_k_explicit_limit_in_score_order():
+    catalog = ProductCatalog(lipsticks(5))
+    assert catalog.top_k("lipstick", k=2, tone="porcelain") == ["Shade 0", "Shade 1"]
+
+
+def test_any_tone_products_match_every_tone():
+    catalog = ProductCatalog(lipsticks(1) + [{"category": "lipstick", "name": "Clear Gloss"}])
+    assert catalog.top_k("lipstick", tone="porcelain") == ["Shade 0", "Clear Gloss"]
+    assert catalog.top_k("lipstick", tone="deep") == ["Clear Gloss"]
+    assert catalog.top_k("blush", tone="deep") == []
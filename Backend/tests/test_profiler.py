@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+import profiler
+
+
+def test_admin_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "")
+    assert not profiler.check_token("")
+    assert not profiler.check_token(None)
+
+
+def test_token_must_match(monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "s3cret")
+    assert profiler.check_token("s3cret")
+    assert not profiler.check_token("s3cre")
+    assert not profiler.check_token(None)
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_sees_other_threads_and_is_exclusive():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,))
+    worker.start()
+    try:
+        text, info = profiler.sample(seconds=0.2, interval_ms=5)
+        assert "busy_worker" in text
+        assert info["sampling_rounds"] > 0
+        with profiler._busy:
+            with pytest.raises(profiler.ProfilerBusy):
+                profiler.sample(seconds=0.1)
+    finally:
+        stop.set()
+        worker.join()
+
+
+def test_profile_endpoint_requires_token(client, monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/api/admin/profile?seconds=0.1").status_code == 403
+    r = client.post("/api/admin/profile?seconds=0.1", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
@@ -0,0 +1,28 @@
+import pytest
+
+REQ = {"face_shape": "Round", "skin_tone": "Medium", "gender": "male", "event": "party",
+       "body_type": "average"}
+
+
+def test_same_request_same_body_and_etag(client):
+    first = client.post("/api/makeup_recommendation", json=REQ)
+    second = client.post("/api/makeup_recommendation", json=REQ)
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+
+def test_if_none_match_gets_304(client):
+    etag = client.post("/api/makeup_recommendation", json=REQ).headers["ETag"]
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        r = client.post("/api/makeup_recommendation", json=REQ, headers={"If-None-Match": header})
+        assert r.status_code == 304 and r.headers["ETag"] == etag
+    stale = client.post("/api/makeup_recommendation", json=REQ, headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+
+
+@pytest.mark.parametrize("extra", [{"seed": 7}, {"variant": 1}])
+def test_seed_and_variant_are_deterministic(client, extra):
+    a = client.post("/api/makeup_recommendation", json={**REQ, **extra})
+    b = client.post("/api/makeup_recommendation", json={**REQ, **extra})
+    assert a.json() == b.json()
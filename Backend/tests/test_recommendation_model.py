@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+import recommendation_model as rm
+from product_catalog import ProductCatalog
+from recommendation_matrix import validate_response
+
+
+def sparse_catalog():
+    # Only two categories stocked; everything else is empty
+    return ProductCatalog([
+        {"category": "lipstick", "name": "Ruby Woo", "tones": ["porcelain"]},
+        {"category": "outfit", "name": "Blazer", "genders": ["female"], "events": ["formal"]},
+    ], source="test")
+
+
+def test_sparse_catalog_entry_builds_valid_response():
+    entry = rm._compile_entry(sparse_catalog(), "warm beige", "oval", "female", "formal", "slim")
+    result = rm.build_recommendation(entry, random.Random(0))
+
+    validate_response(result)
+    assert result["makeup"]["lipstick"] == "Nude Lipstick"   # no lipstick for this tone
+    assert result["fashion"]["recommendedColor"] == "Neutral"
+    assert [o["item"] for o in result["fashion"]["outfits"]] == ["Blazer"]
+
+
+def test_sparse_catalog_serves_every_profile():
+    original = rm._STATE["catalog"]
+    rm.set_catalog(sparse_catalog())
+    try:
+        req = rm.RecommendationRequest(face_shape="round", skin_tone="deep", gender="male",
+                                       event="party", body_type="average")
+        validate_response(rm.make_recommendation(req))
+    finally:
+        rm.set_catalog(original)
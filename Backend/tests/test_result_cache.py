@@ -0,0 +1,63 @@
+import pytest
+
+import result_cache
+from result_cache import LRUCache, SQLiteCache
+
+
+@pytest.fixture
+def shared(tmp_path):
+    return SQLiteCache(str(tmp_path / "cache.sqlite3"), maxsize=4, name="test")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, name="lru")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+
+def test_sqlite_round_trip_without_pickle(shared):
+    value = {"shape": "oval", "confidence": 0.9, "debug": {"raw": b"\x00\xff"}}
+    shared.set("k", value)
+    assert shared.get("k") == value
+    # Tuples come back as lists; callers only unpack them
+    shared.set("t", (1.5, 2, 3))
+    assert shared.get("t") == [1.5, 2, 3]
+    assert shared.stats()["hits"] == 2
+
+
+def test_sqlite_never_unpickles(shared):
+    import pickle
+    shared._conn().execute("INSERT INTO entries (ns, key, value, atime) VALUES (?, ?, ?, 0)",
+                           ("test", "evil", pickle.dumps({"x": 1})))
+    assert shared.get("evil", "miss") == "miss"
+
+
+def test_sqlite_namespaces_and_eviction(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    a = SQLiteCache(path, maxsize=2, name="a")
+    b = SQLiteCache(path, maxsize=2, name="b")
+    a.set("k", 1)
+    b.set("k", 2)
+    assert (a.get("k"), b.get("k")) == (1, 2)
+    for i in range(40):
+        a.set(f"x{i}", i)
+    a._evict(a._conn())
+    assert len(a) == 2 and len(b) == 1
+
+
+def test_ndarray_round_trip(shared):
+    np = pytest.importorskip("numpy")
+    arr = np.arange(12, dtype=np.float32).reshape(4, 3)
+    shared.set("lm", (arr, 640, 480))
+    norm, w, h = shared.get("lm")
+    assert (w, h) == (640, 480)
+    assert norm.dtype == np.float32 and np.array_equal(norm, arr)
+    assert norm.flags.writeable
+
+
+def test_image_key_bytes():
+    assert result_cache.image_key(b"abc") == result_cache.image_key(b"abc")
+    assert result_cache.image_key(b"abc") != result_cache.image_key(b"abd")
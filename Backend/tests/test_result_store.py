@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+import result_store
+from result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.db"), max_bytes=1 << 20)
+
+
+def test_put_get_round_trip(store):
+    value = {"success": True, "face_shape": {"shape": "Oval", "confidence": 0.91}}
+    store.put("img", "v1", value)
+    store.flush()
+    assert store.get("img", "v1") == value
+    assert store.get("img", "v2") is None
+    assert store.stats()["hits"] == 1
+
+
+def test_versions_sharing_a_file_keep_their_rows(store, tmp_path):
+    other = ResultStore(store.path)          # e.g. a worker of the previous release
+    store.put("img", "new", {"v": "new"})
+    other.put("img", "old", {"v": "old"})
+    store.flush()
+    other.flush()
+    for _ in range(2):
+        assert store.get("img", "new") == {"v": "new"}
+        assert other.get("img", "old") == {"v": "old"}
+        store.flush()
+        other.flush()
+
+
+def test_evicts_least_recently_used_over_cap(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=2000)
+    for i in range(40):
+        store.put(f"img{i}", "v1", {"pad": "x" * 200, "i": i})
+        store.flush()
+    assert store.stats()["bytes"] <= 2000
+    assert store.get("img39", "v1")["i"] == 39
+    assert store.get("img0", "v1") is None
+
+
+def test_failed_open_is_remembered(monkeypatch, tmp_path):
+    opens = []
+
+    def broken(path):
+        opens.append(path)
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(result_store, "STORE_PATH", str(tmp_path / "results.db"))
+    monkeypatch.setattr(result_store, "ResultStore", broken)
+    monkeypatch.setattr(result_store, "_store", None)
+    monkeypatch.setattr(result_store, "_store_failed", False)
+    assert result_store.get_store() is None
+    assert result_store.get_store() is None
+    assert len(opens) == 1
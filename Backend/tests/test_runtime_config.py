@@ -0,0 +1,35 @@
+import pytest
+
+import result_cache
+import runtime_config
+
+
+@pytest.fixture(autouse=True)
+def no_worker_env(monkeypatch):
+    for name in ("AURA_WORKERS", "WEB_CONCURRENCY", "UVICORN_WORKERS", "AURA_CACHE_BACKEND"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_worker_count_defaults_to_one():
+    assert runtime_config.worker_count([]) == 1
+
+
+def test_worker_count_env_order(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert runtime_config.worker_count([]) == 3
+    monkeypatch.setenv("AURA_WORKERS", "5")
+    assert runtime_config.worker_count([]) == 5
+
+
+@pytest.mark.parametrize("argv", [["main:app", "--workers", "4"], ["main:app", "--workers=4"]])
+def test_worker_count_from_uvicorn_argv(argv):
+    assert runtime_config.worker_count(argv) == 4
+
+
+def test_thread_sizing_and_cache_backend_agree(monkeypatch):
+    monkeypatch.setattr(runtime_config.sys, "argv", ["uvicorn", "main:app", "--workers", "4"])
+    monkeypatch.setattr(runtime_config.os, "cpu_count", lambda: 8)
+    assert runtime_config.load_runtime_config()["workers"] == 4
+    assert runtime_config.load_runtime_config()["torch_threads"] == 2
+    monkeypatch.setattr(result_cache, "CACHE_BACKEND", "auto")
+    assert result_cache.cache_backend() == "sqlite"
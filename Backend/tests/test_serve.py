@@ -0,0 +1,11 @@
+import serve
+
+
+def test_default_preload_skips_cnn_with_stone_backend(monkeypatch):
+    monkeypatch.delenv("AURA_SKIN_TONE_BACKEND", raising=False)
+    assert serve.default_preload() == "face_shape,stone"
+
+
+def test_default_preload_includes_cnn_when_it_serves(monkeypatch):
+    monkeypatch.setenv("AURA_SKIN_TONE_BACKEND", "CNN")
+    assert serve.default_preload().split(",") == ["face_shape", "stone", "skin_tone_cnn"]
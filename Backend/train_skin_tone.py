@@ -8,6 +8,8 @@ import numpy as np
 import os
 import cv2
 
+from skin_tone_cnn import ResNetHSV, EqualizeLAB, compute_hsv_vector
+
 # =================== CONFIGURATION ===================
 DATA_DIR = r"C:\Users\hajee\Documents\A_final_demo\Aura_v1\dataset\skin_tone_dataset"
 BATCH_SIZE = 32
@@ -29,17 +31,8 @@ def safe_loader(path):
         return Image.new("RGB", (224, 224), (0, 0, 0))
 
 # =================== PREPROCESSING ===================
-class EqualizeLAB:
-    """Normalize lighting while keeping true skin tone."""
-    def __call__(self, img):
-        img = np.array(img)
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2LAB)
-        l, a, b = cv2.split(img)
-        l = cv2.equalizeHist(l)
-        img = cv2.merge((l, a, b))
-        img = cv2.cvtColor(img, cv2.COLOR_LAB2RGB)
-        return Image.fromarray(img)
-
+# EqualizeLAB / compute_hsv_vector / ResNetHSV live in skin_tone_cnn.py
+# so the served model sees exactly the training preprocessing.
 transform = transforms.Compose([
     EqualizeLAB(),
     transforms.Resize((224, 224)),
@@ -50,16 +43,6 @@ transform = transforms.Compose([
                          std=[0.229, 0.224, 0.225]),
 ])
 
-# =================== HSV FEATURE FUNCTION ===================
-def compute_hsv_vector(img):
-    """Compute mean HSV values (scaled 0–1) for the image."""
-    np_img = np.array(img)
-    hsv = cv2.cvtColor(np_img, cv2.COLOR_RGB2HSV)
-    h_mean = hsv[:, :, 0].mean() / 179.0
-    s_mean = hsv[:, :, 1].mean() / 255.0
-    v_mean = hsv[:, :, 2].mean() / 255.0
-    return np.array([h_mean, s_mean, v_mean], dtype=np.float32)
-
 # =================== CUSTOM DATASET ===================
 class ToneDataset(torch.utils.data.Dataset):
     def __init__(self, folder_path, transform, class_to_idx):
@@ -103,25 +86,6 @@ train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, sampler=sampler,
 val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False, num_workers=0)
 
 # =================== MODEL (ResNet + HSV) ===================
-class ResNetHSV(nn.Module):
-    def __init__(self, num_classes=3):
-        super().__init__()
-        self.base = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
-        num_features = self.base.fc.in_features
-        self.base.fc = nn.Identity()  # remove default FC layer
-        self.classifier = nn.Sequential(
-            nn.Linear(num_features + 3, 256),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(256, num_classes)
-        )
-
-    def forward(self, x, hsv):
-        f = self.base(x)
-        combined = torch.cat((f, hsv), dim=1)
-        out = self.classifier(combined)
-        return out
-
 model = ResNetHSV(NUM_CLASSES).to(DEVICE)
 
 # =================== LOSS & OPTIMIZER ===================